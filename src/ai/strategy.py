@@ -1,6 +1,7 @@
 import random
 from config.gg import BB
 from models.game_feature import GameFeature
+from utils.equity import get_engine
 
 
 def fetch_by_level(cd, le):
@@ -39,7 +40,13 @@ def eval_win_rate(cond, args):
 
 class Strategy:
 
-    def __init__(self):
+    def __init__(self, equity_service=None):
+        """
+        :param equity_service: utils.equity_service.EquityService，设置后翻牌后的强度取其截止时间前最好的估计
+        """
+        self.equity_service = equity_service
+        # 会话开始时启动 GameFeature 使用的胜率引擎（进程池、查找表），第一次决策不再承担启动开销
+        get_engine()
         self.preflop_strategy = self.load('strategy/preflop')
         self.flop_strategy = self.load('strategy/flop')
         # self.turn_strategy = self.load('turn')
@@ -58,14 +65,22 @@ class Strategy:
         except FileNotFoundError:
             print(f"{file_name} strategy file not found")
 
-    def predict(self, feature):
+    def predict(self, feature, deadline=None):
         """
         預測策略：
         1. 計算牌面濕潤程度：wet.  args: wet_high、wet_pair、wet_straight、wet_flush
         2. 計算玩家的成牌概率: rwin.  args: wet、c_bet、c_raise、b_bet
         3. 計算勝率：win = strength * rate.  args: stage、pos、strength、rwin、players
         4. 計算行為：action，raised. args，計算ev最大化應該採取的行為、
+        :param deadline: 决策截止时刻（time.monotonic()），后台胜率服务最多等到该时刻
         """
+        if self.equity_service is not None and feature.stage > 0 and getattr(feature, 'hand', None):
+            # 后台从读到牌起一直在细化，取截止时刻最好的估计；只接受与本次决策同一局面的估计，
+            # 后台还是上一手牌（或公共牌、对手数不同）时保留 GameFeature 同步计算的强度
+            estimate = self.equity_service.best(feature.stage, deadline, feature.hand, feature.board,
+                                                max(feature.players, 1))
+            if estimate is not None:
+                feature.strength = round(estimate.mean, 2)
         args = feature.to_dict()
         args['r'] = round(random.uniform(0, 1), 2)
         args['wet'] = self._wet(feature)
@@ -0,0 +1,158 @@
+"""
+特征块注册表
+每个特征块声明名称、维度和依赖的其他块；使用方只请求需要的块，依赖的块按需计算（每个状态只算一次），
+既没有被请求、也没有被依赖的块不计算。每个块的耗时累计在 BlockTimings 中，可查看每次决策各块的开销。
+
+用法（在类定义中注册方法，方法以所依赖块的值为关键字参数）：
+    class Extractor:
+        features = FeatureRegistry()
+
+        @features.block('pot', 2)
+        def _pot(self, state): ...
+
+        @features.block('odds', 1, depends=('pot',))
+        def _odds(self, state, pot): ...          # pot 为 'pot' 块的 float32 数组
+
+        @features.batch('pot')
+        def _batch_pot(self, states, out): ...    # 可选：整批一次写入 (N, 2) 的 out
+
+    values = Extractor.features.evaluate(extractor, state, ['odds'])   # 只计算 pot 与 odds
+"""
+import copy
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+
+class FeatureBlock:
+
+    def __init__(self, name, width, extract, depends=()):
+        """
+        :param name: 块名称
+        :param width: 维度
+        :param extract: extract(owner, state, **依赖块的值) -> 长度为 width 的序列
+        :param depends: 依赖的块名称
+        """
+        self.name = name
+        self.width = width
+        self.extract = extract
+        self.depends = tuple(depends)
+        self.batch = None           # batch(owner, states, out)，只用于没有依赖的块
+
+
+class BlockTimings:
+    """各特征块的累计耗时与计算的状态数"""
+
+    def __init__(self):
+        self.seconds = OrderedDict()
+        self.states = OrderedDict()
+
+    def add(self, name, seconds, states=1):
+        self.seconds[name] = self.seconds.get(name, 0.0) + seconds
+        self.states[name] = self.states.get(name, 0) + states
+
+    def report(self):
+        """{块名称: 每个状态的平均耗时（毫秒）}"""
+        return OrderedDict((name, self.seconds[name] / self.states[name] * 1000) for name in self.seconds)
+
+    def reset(self):
+        self.seconds.clear()
+        self.states.clear()
+
+
+class FeatureRegistry:
+
+    def __init__(self):
+        self.blocks = OrderedDict()
+
+    def block(self, name, width, depends=()):
+        """注册特征块的装饰器，被装饰的函数原样返回"""
+        def register(extract):
+            if name in self.blocks:
+                raise ValueError(f'feature block {name!r} already registered')
+            for dep in depends:
+                if dep not in self.blocks:
+                    raise ValueError(f'feature block {name!r} depends on unknown block {dep!r}')
+            self.blocks[name] = FeatureBlock(name, width, extract, depends)
+            return extract
+        return register
+
+    def copy(self):
+        """注册表的副本：子类在副本上注册新的块（可依赖已有的块），不影响原注册表"""
+        registry = FeatureRegistry()
+        registry.blocks = OrderedDict((name, copy.copy(block)) for name, block in self.blocks.items())
+        return registry
+
+    def batch(self, name):
+        """给已注册的块登记批量实现的装饰器"""
+        def register(batch):
+            if self.blocks[name].depends:
+                raise ValueError(f'feature block {name!r} has dependencies, batch version not supported')
+            self.blocks[name].batch = batch
+            return batch
+        return register
+
+    def names(self):
+        return list(self.blocks)
+
+    def width(self, names):
+        return sum(self.blocks[name].width for name in names)
+
+    def plan(self, names):
+        """names 及其依赖的块，依赖在前（注册时依赖必须已注册，注册顺序即合法顺序）"""
+        needed = set()
+        stack = list(names)
+        while stack:
+            name = stack.pop()
+            if name not in self.blocks:
+                raise KeyError(f'unknown feature block {name!r}')
+            if name not in needed:
+                needed.add(name)
+                stack.extend(self.blocks[name].depends)
+        return [block for name, block in self.blocks.items() if name in needed]
+
+    def evaluate(self, owner, state, names, timings=None):
+        """
+        计算一个状态的 names 及其依赖的块
+        :return: {块名称: (width,) float32 数组}
+        """
+        values = {}
+        for block in self.plan(names):
+            start = time.perf_counter()
+            value = _extract(block, owner, state, {dep: values[dep] for dep in block.depends})
+            values[block.name] = np.asarray(value, dtype=np.float32)
+            if timings is not None:
+                timings.add(block.name, time.perf_counter() - start)
+        return values
+
+    def evaluate_batch(self, owner, states, names, outputs=None, timings=None):
+        """
+        批量计算 names 及其依赖的块，与逐个 evaluate 结果一致
+        :param outputs: {块名称: (N, width) 数组}，请求的块直接写入（如大数组的列切片）
+        :return: {块名称: (N, width) 数组}
+        """
+        outputs = outputs or {}
+        values = {}
+        for block in self.plan(names):
+            start = time.perf_counter()
+            out = outputs.get(block.name)
+            if out is None:
+                out = np.empty((len(states), block.width), dtype=np.float32)
+            if block.batch is not None:
+                block.batch(owner, states, out)
+            else:
+                for i, state in enumerate(states):
+                    out[i] = _extract(block, owner, state, {dep: values[dep][i] for dep in block.depends})
+            values[block.name] = out
+            if timings is not None:
+                timings.add(block.name, time.perf_counter() - start, len(states))
+        return values
+
+
+def _extract(block, owner, state, deps):
+    """计算一个状态的一个块；长度与声明的维度不符时报错，不会错位"""
+    value = block.extract(owner, state, **deps)
+    if len(value) != block.width:
+        raise ValueError(f'feature block {block.name!r} returned {len(value)} values, expected {block.width}')
+    return value
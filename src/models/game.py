@@ -29,6 +29,7 @@ class Game(BaseModel):
         self.stack = state.stack
 
         self.states.clear()
+        self.feature_context = None
         sta = GameState()
         sta.code = self.code
         sta.hand = state.hand
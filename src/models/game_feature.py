@@ -1,173 +1,68 @@
 from config.db import BaseModel
 from peewee import IntegerField
-from treys import Evaluator, Card, Deck
+# 牌力计算只保留 utils.card.eval_strength 一份实现，这里导入供原有调用方使用
+from utils.card import cards_to_ints, eval_strength  # noqa: F401
+from utils.equity import get_engine
+from utils.preflop import preflop_equity
+from utils.texture import board_texture, SCORES
 from .hand_score import HandScore
 import json
-import numpy as np
-from itertools import combinations
-
-
-
-def eval_strength(hand, board=None, opp_ranges=None, trials=5000, draw_size=2):
-    """
-    计算手牌强度
-    """
-    evaluator = Evaluator()
-    community_cards = [] if board is None else [Card.new(v) if isinstance(v, str) else v for v in board]
-    hand = [Card.new(v) if isinstance(v, str) else v for v in hand]
-    used_cards = hand + community_cards
-    opp_ranges = [[Card.new(v[0:2]), Card.new(v[2:4])] for v in opp_ranges] if opp_ranges is not None else []
-    opp_hands = []
-    for r in opp_ranges:
-        if r[0] not in used_cards and r[1] not in used_cards:
-            opp_hands.append(r)
-    deck = Deck()
-
-    wins = 0
-    for _ in range(trials):
-        # try:
-        deck.shuffle()
-
-        for card in used_cards:
-            deck.cards.remove(card)
-
-        # 底牌范围中随机抽取一手牌
-        if len(opp_hands) > 0:
-            opp_hand = opp_hands[np.random.randint(0, len(opp_hands))]
-            deck.cards.remove(opp_hand[0])
-            deck.cards.remove(opp_hand[1])
-        else:
-            opp_hand = deck.draw(draw_size)
-
-        board = community_cards + deck.draw(5 - len(community_cards))
-
-        # 计算牌力
-        strength1 = evaluator.evaluate(hand, board)
-        if len(opp_hand) == 2:
-            strength2 = evaluator.evaluate(opp_hand, board)
-        else:
-            strength2 = 0
-            hand_combs = list(combinations(opp_hand, 2))
-            for han in hand_combs:
-                strength2 = max(strength2, evaluator.evaluate([han[0], han[1]], board))
-
-        if strength1 < strength2:
-            wins += 1
-        # except:
-        #     print('error', hand)
-        # wins += random.randint(0, 1)
-    return round(wins / trials, 4)
 
 
 def eval_wetness(community_cards):
     """
     评估公共牌湿润度，返回0-2的连续值（考虑成牌可能性和牌面强度）
-    :param community_cards: 牌面列表，如 ['Ah', 'Kd', 'Qc', 'Js', 'Ts']
+    3-5张公共牌直接查预计算的牌面结构表（utils.texture）
+    :param community_cards: 牌面列表，如 ['Ah', 'Kd', 'Qc', 'Js', 'Ts']，或对应的整数编码
     :return:
     三张牌：['Ah', 'Kh', 'Qh'] 返回 1.23， ['2s', '7c', 'Qh'] 返回 0.03
     """
+    texture = board_texture(community_cards)
+    return {name: texture[name] for name in SCORES}
 
-    def _card_value(card):
-        """将牌面转换为数值（A=14，2=2）"""
-        rank = card[:-1].upper()
-        if rank == 'A': return 14
-        if rank == 'K': return 13
-        if rank == 'Q': return 12
-        if rank == 'J': return 11
-        if rank == 'T': return 10
-        return int(rank)
-
-    # 初始化数据结构
-    cards = sorted([_card_value(c) for c in community_cards], reverse=True)
-    suits = [c[-1].lower() for c in community_cards]
-    result = {'straight': 0.0, 'flush': 0.0, 'pair': 0.0, 'high': 0.0}
-
-    # ------------------ 顺子计算 ------------------
-    unique_ranks = sorted(list(set(cards + [1 if r == 14 else r for r in cards])))  # 包含A作为1的情况
-    straight_scores = []
-
-    # 遍历所有可能的顺子组合
-    for high in range(14, 4, -1):  # 从最大的A-high顺子开始检查
-        target = set(range(high - 4, high + 1)) if high > 5 else {1, 2, 3, 4, 5}
-        present = [r for r in unique_ranks if r in target]
-        gap = 5 - len(present)
 
-        if gap <= 2:  # 允许最多缺2张牌
-            # 计算顺子强度：基础分 + 最大牌加成
-            dif = max(present) - min(present)
-            strength = (5 - gap) / 5 * 1.5 + (high / 14) * 0.5 - dif * 0.2
-            straight_scores.append(min(strength, 2.0))
-        elif len(community_cards) == 3 and gap == 3:
-            dif = max(present) - min(present)
-            strength = (5 - gap) / 5 * 1.5 + (high / 14) * 0.5 - dif * 0.2
-            straight_scores.append(min(strength, 2.0))
-
-    result['straight'] = max(straight_scores) if straight_scores else 0.0
-
-    # ------------------ 同花计算 ------------------
-    suit_counts = {}
-    max_suit = None
-    for s in suits:
-        suit_counts[s] = suit_counts.get(s, 0) + 1
-        if suit_counts[s] > suit_counts.get(max_suit, 0):
-            max_suit = s
-
-    if max_suit and suit_counts[max_suit] >= 3:
-        # 同花牌中的最大数值
-        flush_cards = sorted([c for c, s in zip(cards, suits) if s == max_suit], reverse=True)
-        # 计算同花强度：数量分（60%） + 最大牌分（40%）
-        count_score = (suit_counts[max_suit] / 5) * 1.2  # 3张=0.72, 4张=0.96, 5张=1.2
-        high_score = (flush_cards[0] / 14) * 0.8  # 最大牌占比
-        result['flush'] = min(count_score + high_score, 2.0)
-    elif max_suit and len(community_cards) == 3 and suit_counts[max_suit] == 2:
-        # 同花牌中的最大数值
-        flush_cards = sorted([c for c, s in zip(cards, suits) if s == max_suit], reverse=True)
-        # 计算同花强度：数量分（60%） + 最大牌分（40%）
-        count_score = (suit_counts[max_suit] / 5) * 0.6  # 3张=0.72, 4张=0.96, 5张=1.2
-        high_score = (flush_cards[0] / 14) * 0.4  # 最大牌占比
-        result['flush'] = min(count_score + high_score, 2.0)
-
-    # ------------------ 对子计算 ------------------
-    rank_counts = {}
-    for r in cards:
-        rank_counts[r] = rank_counts.get(r, 0) + 1
-
-    # 计算对子强度（考虑对子大小和数量）
-    pairs = sorted([r for r, cnt in rank_counts.items() if cnt >= 2], reverse=True)
-    set_score = 0.0
-    if len(pairs) >= 2:  # 两对
-        set_score = (pairs[0] + pairs[1]) / 28 * 1.9  # AA+KK=27/28*1.5≈1.45
-    elif len(pairs) == 1:  # 一对
-        set_score = pairs[0] / 14 * 0.9  # AA=14/14*1=1.0
-
-    # 三条/葫芦额外加分
-    trips = [r for r, cnt in rank_counts.items() if cnt >= 3]
-    if trips:
-        set_score += (sum(trips) / 14) * 0.5  # 三条加成
-
-    result['pair'] = min(set_score, 2.0)
-
-    # ------------------ 高张计算 ------------------
-    high_cards = [r for r in cards if r >= 11]  # J以上算高牌
-    unique_high = sorted(list(set(high_cards)), reverse=True)
-
-    # 强度计算规则：
-    # - 每张高牌基础分：A=0.5, K=0.4, Q=0.3, J=0.2
-    # - 组合加成：同时有AK加0.5，AQ加0.3等
-    base_scores = {14: 0.5, 13: 0.4, 12: 0.3, 11: 0.2}
-    score = sum(base_scores.get(r, 0) for r in unique_high)
-
-    # 组合加成
-    if 14 in unique_high and 13 in unique_high: score += 0.5  # AK
-    if 14 in unique_high and 12 in unique_high: score += 0.3  # AQ
-    if 13 in unique_high and 12 in unique_high: score += 0.2  # KQ
-
-    result['high'] = min(score * 1.5, 2.0)  # 最高得分2.0
+class FeatureContext:
+    """
+    一手牌内不随下注变化的特征。同一街的手牌、公共牌不变，强度、牌面结构只在换街（或公共牌、
+    活跃玩家数变化）时计算一次；翻牌前底池在翻牌后固定。之后同一街的状态只更新与下注有关的字段。
+    保存在 game.feature_context 上，换一手牌时重建。
+    """
 
-    return {k: round(v, 1) for k, v in result.items()}
-    # 四舍五入保留1位小数
-    # return wetness_level({k: round(v, 1) for k, v in result.items()}, len(community_cards))
+    def __init__(self, code, hand):
+        self.code = code
+        self.hand = hand            # 手牌（整数）
+        self.stage = None           # 已缓存的街
+        self.board = None           # 已缓存的公共牌（整数）
+        self.players = None         # 计算强度时的活跃玩家数
+        self.strength = None        # 手牌强度
+        self.wetness = None         # 牌面结构，见 utils.texture.board_texture
+        self.ppots = None           # 翻牌前底池大小（BB）
 
+    @staticmethod
+    def of(game, state):
+        """取 game 当前这手牌的上下文，没有或已换手牌时新建"""
+        hand = cards_to_ints(state.hand)
+        context = getattr(game, 'feature_context', None)
+        if context is None or context.code != game.code or context.hand != hand:
+            context = game.feature_context = FeatureContext(game.code, hand)
+        return context
+
+    def preflop_pot(self, game, state):
+        """翻牌前底池随翻牌前的下注变化，翻牌后固定"""
+        if state.stage == 0 or self.ppots is None:
+            self.ppots = round([s for s in game.states if s.stage == 0][-1].pot / game.bb, 2)
+        return self.ppots
+
+    def street(self, feature, state):
+        """换街或公共牌变化时重新计算牌面结构与强度；活跃玩家数变化时只重新计算强度"""
+        board = cards_to_ints(state.board)
+        if state.stage != self.stage or board != self.board:
+            self.stage, self.board = state.stage, board
+            self.wetness = GameFeature._wetness(board)
+            self.players = None
+        if feature.players != self.players:
+            self.players = feature.players
+            self.strength = feature._strength(self.hand, board)
 
 
 class GameFeature(BaseModel):
@@ -238,17 +133,22 @@ class GameFeature(BaseModel):
     def process(game):
         feature = GameFeature()
         state = game.states[-1]
+        context = FeatureContext.of(game, state)
         feature.stage = state.stage
         feature.pos = feature._pos(state)
         feature.pots = round(state.pot / game.bb, 2)
         feature.calls = 0 if state.call is None else round(state.call / game.bb, 2)
-        feature.ppots = round([s for s in game.states if s.stage == 0][-1].pot / game.bb, 2)
+        feature.ppots = context.preflop_pot(game, state)
         feature.players = len(state.actives())
         feature.c_bet = feature._c_bet(game.states)
         feature.c_raise = feature._check_raise(game.states)
         feature.b_bet = feature._big_bet()
-        feature.strength = feature._strength(state.hand, state.board)
-        wetness = feature._wetness(state.board)
+        # 强度与牌面结构同一街只计算一次
+        context.street(feature, state)
+        feature.strength = context.strength
+        # 本次决策的局面（不入库），Strategy.predict 据此判断后台胜率服务的估计是否属于同一局面
+        feature.hand, feature.board = context.hand, context.board
+        wetness = context.wetness
         feature.wet_high = wetness['high']
         feature.wet_pair = wetness['pair']
         feature.wet_straight = wetness['straight']
@@ -340,44 +240,20 @@ class GameFeature(BaseModel):
         """
         牌面强度。 不考虑玩家的范围及行为
         """
-        # if self.stage == 0:
-        #     strength = HandScore.get_score(hand[0], hand[1])
-        # else:
-        strength = eval_strength(hand, board, trials=10000, draw_size=3)
+        if not board:
+            # 翻牌前直接查预计算的胜率表，对手数取本阶段仍活跃的玩家数
+            strength = preflop_equity(hand, self.players)
+        else:
+            # 对本阶段仍活跃的每个对手分别发牌（平局平分），多进程分片模拟；误差±1%或超过100ms即停止。
+            # 单个对手的转牌、河牌直接穷举（同样平局平分）
+            strength = get_engine().equity(hand, board, trials=10000, opponents=max(self.players, 1),
+                                           precision=0.01, timeout=0.1).mean
         return round(strength, 2)
 
     @staticmethod
     def _wetness(board):
         """
         # 湿润程度 0 干燥  1 湿润  2 非常湿润
+        各项得分与档位都来自牌面结构表，一次查询
         """
-        result = eval_wetness(board)
-        size = len(board)
-        straight = result['straight']
-        flush = result['flush']
-        pair = result['pair']
-        high = result['high']
-        wetness = 0
-        if size == 3:
-            if high > 1.3 or pair > 0.7 or flush > 1 or straight > 1:
-                # 三同花、三连牌、大公对、两高张、三张
-                wetness = 2
-            elif high > 0.5 or pair > 0 or flush > 0.5 or straight > 0.5:
-                # 两同花、两连牌、小公对、高张、
-                wetness = 1
-        elif size == 4:
-            if high > 1.3 or pair > 0.7 or flush > 1 or straight > 1:
-                # 三同花、三连牌、大公对、两高张、三张
-                wetness = 2
-            elif high > 0.5 or pair > 0 or flush > 0.5 or straight > 0.5:
-                # 两同花、两连牌、小公对、高张、
-                wetness = 1
-        else:
-            if high > 1.3 or pair > 0.7 or flush > 1 or straight > 1:
-                # 三同花、三连牌、大公对、两高张、三张
-                wetness = 2
-            elif high > 0.5 or pair > 0 or flush > 0.5 or straight > 0.5:
-                # 两同花、两连牌、小公对、高张、
-                wetness = 1
-        result['wetness'] = wetness
-        return result
+        return board_texture(board)
@@ -1,5 +1,6 @@
 from config.db import BaseModel, db
 from peewee import CharField, AutoField, FloatField
+from utils.hand_range import Range
 
 class HandScore(BaseModel):
     class Meta:
@@ -21,3 +22,7 @@ class HandScore(BaseModel):
         for hs in lis:
             ranges.append(hs.hand)
         return ranges
+
+    @staticmethod
+    def get_range(min_score, max_score):
+        return Range.from_hands(HandScore.get_ranges(min_score, max_score))
@@ -3,7 +3,7 @@ from collections import defaultdict
 
 
 from core.game_state import GameState, Round, Player, Action, ActionType
-from utils.card import compare_hands
+from utils.card import rank_showdown
 
 class PokerGame:
     def __init__(self, player_names, small_blind=1, big_blind=2):
@@ -191,11 +191,14 @@ class PokerGame:
             active_players[0].chips += pot
             return {'winner': active_players[0], 'split_pot': False, 'message': f"{active_players[0].name} wins! Receives {pot} chips"}
 
+        # Rank every hand once; all side pots reuse this ranking
+        tiers = rank_showdown([p.hand for p in active_players], community_cards)
+
         # 2. Filter out all-in players and their all-in amounts
         all_in_players = [p for p in active_players if p.all_in]
         if not all_in_players:
             # No all-in players, distribute pot normally
-            return self.distribute_regular_pot(active_players, community_cards, pot)
+            return self.distribute_regular_pot(active_players, community_cards, pot, tiers)
 
         # 3. Calculate each player's total investment in this round (including previous bets)
         for player in active_players:
@@ -233,16 +236,8 @@ class PokerGame:
 
         for pot_size, eligible_players in side_pots:
             # Find the winner for this side pot
-            best_player = eligible_players[0]
-            tied_players = [best_player]
-
-            for player in eligible_players[1:]:
-                result = card.compare_hands(best_player.hand, player.hand, community_cards)
-                if result < 0:
-                    best_player = player
-                    tied_players = [best_player]
-                elif result == 0:
-                    tied_players.append(player)
+            tied_players = self._pot_winners(tiers, active_players, eligible_players)
+            best_player = tied_players[0]
 
             # Distribute this side pot
             if len(tied_players) > 1:
@@ -281,18 +276,22 @@ class PokerGame:
             'message': '\n'.join(messages)
         }
 
-    def distribute_regular_pot(self, active_players, community_cards, pot):
+    @staticmethod
+    def _pot_winners(tiers, players, eligible_players):
+        # Highest-ranked tier that has at least one player eligible for this pot
+        eligible = {id(p) for p in eligible_players}
+        for tier in tiers:
+            winners = [players[i] for i in tier if id(players[i]) in eligible]
+            if winners:
+                return winners
+        return []
+
+    def distribute_regular_pot(self, active_players, community_cards, pot, tiers=None):
         # Compare all players' hands
-        best_player = active_players[0]
-        tied_players = [best_player]
-
-        for player in active_players[1:]:
-            result = card.compare_hands(best_player.hand, player.hand, community_cards)
-            if result < 0:
-                best_player = player
-                tied_players = [best_player]
-            elif result == 0:
-                tied_players.append(player)
+        if tiers is None:
+            tiers = rank_showdown([p.hand for p in active_players], community_cards)
+        tied_players = self._pot_winners(tiers, active_players, active_players)
+        best_player = tied_players[0]
 
         if len(tied_players) > 1:
             # Split the pot
@@ -1,7 +1,5 @@
 from collections import Counter
-from itertools import combinations
-from treys import Evaluator, Card, Deck
-import numpy as np
+from functools import lru_cache
 
 
 # 牌型强度常量
@@ -22,24 +20,64 @@ RANK_VALUES = {
     '10': 10, 'J': 11, 'Q': 12, 'K': 13, 'A': 14
 }
 
+# ------------------ 整数编码 ------------------
+# 牌编码为 0-51 的整数：rank_index * 4 + suit_index，rank_index 0-12 对应 2-A，suit_index 对应 c/d/h/s
+# 字符串只在边界（OCR结果、模拟器牌堆、数据库）出现，进入评估/胜率/特征计算前统一转换一次
+SUITS = 'cdhs'
+RANK_CHARS = '23456789TJQKA'
+_SUIT_SPELLINGS = {0: 'cC♣', 1: 'dD♦', 2: 'hH♥', 3: 'sS♠'}
+_RANK_SPELLINGS = {8: ['T', 't', '10']}
+
+# 所有写法 -> 整数 的驻留表，转换只是一次字典查找
+CARD_IDS = {}
+for _r, _ch in enumerate(RANK_CHARS):
+    for _rank in _RANK_SPELLINGS.get(_r, [_ch, _ch.lower()]):
+        for _s, _spellings in _SUIT_SPELLINGS.items():
+            for _suit in _spellings:
+                CARD_IDS[_rank + _suit] = _r * 4 + _s
+CARD_STRS = [RANK_CHARS[c >> 2] + SUITS[c & 3] for c in range(52)]
+
+
+def card_to_int(card):
+    """
+    单张牌转换为整数，已是整数则原样返回
+    :param card: 'Ah'、'Td'、'10h'、'10♥' 或 0-51 的整数
+    """
+    return CARD_IDS[card] if isinstance(card, str) else int(card)
+
+
+def cards_to_ints(cards):
+    """牌列表转换为整数列表，None视为空列表"""
+    return [] if cards is None else [CARD_IDS[c] if isinstance(c, str) else int(c) for c in cards]
+
+
+def int_to_card(card):
+    """整数转换为 'Ah' 形式的字符串"""
+    return CARD_STRS[card]
+
+
+def card_mask(cards):
+    """牌列表转换为52位掩码，便于判断牌是否已被使用"""
+    mask = 0
+    for c in cards_to_ints(cards):
+        mask |= 1 << c
+    return mask
+
+
+def hand_to_ints(hand):
+    """两张手牌的4字符写法（如 'AhKd'，范围列表使用的格式）转换为整数对"""
+    return CARD_IDS[hand[0:2]], CARD_IDS[hand[2:4]]
+
+
 def evaluate_hand(cards):
     # 确保我们有5张牌用于评估
     if len(cards) < 5:
         return (HIGH_CARD, [])
 
     # 分离牌面和花色
-    ranks = []
-    suits = []
-    for card in cards:
-        if card.startswith('10'):
-            ranks.append('10')
-            suits.append(card[2:])
-        else:
-            ranks.append(card[0])
-            suits.append(card[1:])
-
-    # 转换牌面为数值
-    rank_values = [RANK_VALUES[rank] for rank in ranks]
+    ids = cards_to_ints(cards)
+    rank_values = [(c >> 2) + 2 for c in ids]
+    suits = [c & 3 for c in ids]
     sorted_ranks = sorted(rank_values, reverse=True)
 
     # 检查是否是同花顺
@@ -100,105 +138,211 @@ def evaluate_hand(cards):
     # 高牌
     return (HIGH_CARD, sorted_ranks)
 
-def get_best_hand(hole_cards, community_cards):
-    # 组合玩家手牌和公共牌
-    all_cards = hole_cards + community_cards
-    best_score = (HIGH_CARD, [])
-    best_details = []
+# ------------------ 查表评估 ------------------
+# 每个牌型保留的kicker数量，与evaluate_hand的返回保持一致
+_KICKER_COUNT = {HIGH_CARD: 5, ONE_PAIR: 4, TWO_PAIR: 3, THREE_OF_A_KIND: 3, STRAIGHT: 5,
+                 FLUSH: 5, FULL_HOUSE: 2, FOUR_OF_A_KIND: 2, STRAIGHT_FLUSH: 5, ROYAL_FLUSH: 5}
+
+
+def _pack(category, kickers):
+    """(牌型, kickers) 压缩成一个整数，数值越大牌力越大"""
+    value = category << 20
+    for i, k in enumerate(kickers):
+        value |= k << (16 - 4 * i)
+    return value
+
+
+def rank_to_score(rank):
+    """
+    hand_rank返回的整数还原为 (牌型, kickers)
+    """
+    category = rank >> 20
+    kickers = [(rank >> (16 - 4 * i)) & 0xF for i in range(_KICKER_COUNT[category])]
+    return category, kickers
+
+
+def _straight_high(mask):
+    """13位点数掩码中最大顺子的顶张（A=14，A-5顺为5），无顺子返回0"""
+    for high in range(12, 3, -1):
+        window = 0x1F << (high - 4)
+        if mask & window == window:
+            return high + 2
+    if mask & 0x100F == 0x100F:
+        return 5
+    return 0
+
+
+def _straight_ranks(high):
+    return [5, 4, 3, 2, 1] if high == 5 else list(range(high, high - 5, -1))
+
+
+def _score_flush(mask):
+    """同花花色的点数掩码 -> 压缩后的牌力"""
+    high = _straight_high(mask)
+    if high:
+        return _pack(ROYAL_FLUSH if high == 14 else STRAIGHT_FLUSH, _straight_ranks(high))
+    ranks = [r + 2 for r in range(12, -1, -1) if mask >> r & 1]
+    return _pack(FLUSH, ranks[:5])
+
+
+def _score_counts(counts):
+    """各点数张数（不含同花） -> 压缩后的牌力"""
+    distinct = [r + 2 for r in range(12, -1, -1) if counts[r]]
+    by_count = {n: [v for v in distinct if counts[v - 2] == n] for n in (4, 3, 2)}
+
+    if by_count[4]:
+        quad = by_count[4][0]
+        return _pack(FOUR_OF_A_KIND, [quad, [v for v in distinct if v != quad][0]])
+
+    trips, pairs = by_count[3], by_count[2]
+    if trips and len(trips) + len(pairs) >= 2:
+        return _pack(FULL_HOUSE, [trips[0], max(trips[1:] + pairs)])
+
+    high = _straight_high(sum(1 << (v - 2) for v in distinct))
+    if high:
+        return _pack(STRAIGHT, _straight_ranks(high))
+
+    if trips:
+        return _pack(THREE_OF_A_KIND, [trips[0]] + [v for v in distinct if v != trips[0]][:2])
+    if len(pairs) >= 2:
+        return _pack(TWO_PAIR, pairs[:2] + [v for v in distinct if v not in pairs[:2]][:1])
+    if pairs:
+        return _pack(ONE_PAIR, [pairs[0]] + [v for v in distinct if v != pairs[0]][:3])
+    return _pack(HIGH_CARD, distinct[:5])
+
+
+@lru_cache(maxsize=None)
+def lookup_tables():
+    """
+    预计算查找表，首次调用时构建（约1秒）：
+    RANK_TABLE  点数键（每张牌贡献 5**rank_index）-> 非同花牌力，覆盖5-7张牌的所有点数组合
+    FLUSH_TABLE 13位点数掩码 -> 同花/同花顺牌力
+    FLUSH_SUIT  花色键（每张牌贡献 1 << 4*suit）-> 同花花色，无同花为-1
+    """
+    rank_table = {}
+
+    def walk(rank, counts, total, key):
+        if rank == 13:
+            if total >= 5:
+                rank_table[key] = _score_counts(counts)
+            return
+        for n in range(min(4, 7 - total) + 1):
+            counts[rank] = n
+            walk(rank + 1, counts, total + n, key + n * 5 ** rank)
+        counts[rank] = 0
+
+    walk(0, [0] * 13, 0, 0)
+
+    flush_table = [0] * 8192
+    for mask in range(8192):
+        if bin(mask).count('1') >= 5:
+            flush_table[mask] = _score_flush(mask)
+
+    flush_suit = [-1] * 65536
+    for key in range(65536):
+        for suit in range(4):
+            if (key >> (4 * suit)) & 0xF >= 5:
+                flush_suit[key] = suit
+                break
+    return rank_table, flush_table, flush_suit
+
+
+_RANK_KEY = [5 ** (c >> 2) for c in range(52)]
+_SUIT_KEY = [1 << (4 * (c & 3)) for c in range(52)]
+
+
+def hand_rank(cards):
+    """
+    5-7张牌的最大牌力，一次查表得到可直接比较的整数（越大越好）
+    :param cards: 牌列表，如 ['Ah', 'Kh', '10h', 'Qd', '2c']
+    :return: 整数牌力，rank_to_score可还原为 (牌型, kickers)
+    """
+    rank_table, flush_table, flush_suit = lookup_tables()
+    ids = [CARD_IDS[c] if isinstance(c, str) else c for c in cards]
+    if len(ids) < 5:
+        raise ValueError(f'hand_rank needs 5-7 cards, got {len(ids)}')
+    suit_key = 0
+    rank_key = 0
+    for c in ids:
+        suit_key += _SUIT_KEY[c]
+        rank_key += _RANK_KEY[c]
+    suit = flush_suit[suit_key]
+    if suit >= 0:
+        mask = 0
+        for c in ids:
+            if c & 3 == suit:
+                mask |= 1 << (c >> 2)
+        return flush_table[mask]
+    return rank_table[rank_key]
 
-    # 生成所有可能的5张牌组合
-    for combination in combinations(all_cards, 5):
-        score, ranks = evaluate_hand(combination)
-        if (score > best_score[0] or
-            (score == best_score[0] and ranks > best_score[1])):
-            best_score = (score, ranks)
-            best_details = ranks
 
-    return best_score[0], best_details
+def get_best_hand(hole_cards, community_cards):
+    all_cards = list(hole_cards) + list(community_cards)
+    if len(all_cards) < 5:
+        return HIGH_CARD, []
+    return rank_to_score(hand_rank(all_cards))
 
 
 def compare_hands(hand1, hand2, community_cards):
-    # 获取每个玩家的最佳手牌分数和详细信息
-    score1, details1 = get_best_hand(hand1, community_cards)
-    score2, details2 = get_best_hand(hand2, community_cards)
-
-    # 比较牌型大小
-    if score1 > score2:
+    # 不足5张牌时无法成牌，与 get_best_hand 一致视为平分
+    if len(hand1) + len(community_cards) < 5 or len(hand2) + len(community_cards) < 5:
+        return 0
+    # 各自只评估一次，整数牌力已包含全部kicker
+    rank1 = hand_rank(list(hand1) + list(community_cards))
+    rank2 = hand_rank(list(hand2) + list(community_cards))
+    if rank1 > rank2:
         return 1
-    elif score1 < score2:
+    elif rank1 < rank2:
         return -1
-    else:
-        # 牌型相同，比较详细信息
-        if details1 > details2:
-            return 1
-        elif details1 < details2:
-            return -1
-        else:
-            # 完全相同的牌型，比较剩余的牌（kickers）
-            # 获取所有牌的组合
-            player1_all_cards = hand1 + community_cards
-            player2_all_cards = hand2 + community_cards
-
-            # 评估所有可能的5张牌组合
-            player1_best = (0, [])
-            for combo in combinations(player1_all_cards, 5):
-                score, details = evaluate_hand(combo)
-                if (score > player1_best[0] or 
-                    (score == player1_best[0] and details > player1_best[1])):
-                    player1_best = (score, details)
-
-            player2_best = (0, [])
-            for combo in combinations(player2_all_cards, 5):
-                score, details = evaluate_hand(combo)
-                if (score > player2_best[0] or 
-                    (score == player2_best[0] and details > player2_best[1])):
-                    player2_best = (score, details)
-
-            # 比较最终的详细信息
-            if player1_best[1] > player2_best[1]:
-                return 1
-            elif player1_best[1] < player2_best[1]:
-                return -1
-            else:
-                return 0
-
-
-def eval_strength(hand, board=None, opp_ranges=None, trials=5000):
-    evaluator = Evaluator()
-    community_cards = [] if board is None else [Card.new(v) if isinstance(v, str) else v for v in board]
-    hand = [Card.new(v) if isinstance(v, str) else v for v in hand]
-    used_cards = hand + community_cards
-    opp_ranges = [[Card.new(v[0:2]), Card.new(v[2:4])] for v in opp_ranges] if opp_ranges is not None else []
-    opp_hands = []
-    for r in opp_ranges:
-        if r[0] not in used_cards and r[1] not in used_cards:
-            opp_hands.append(r)
-    deck = Deck()
-
-    wins = 0
-    for _ in range(trials):
-        # try:
-        deck.shuffle()
-
-        for card in used_cards:
-            deck.cards.remove(card)
-
-        # 底牌范围中随机抽取一手牌
-        if len(opp_hands) > 0:
-            opp_hand = opp_hands[np.random.randint(0, len(opp_hands))]
-            deck.cards.remove(opp_hand[0])
-            deck.cards.remove(opp_hand[1])
-        else:
-            opp_hand = deck.draw(2)
-
-        board = community_cards + deck.draw(5 - len(community_cards))
-
-        # 计算牌力
-        strength1 = evaluator.evaluate(hand, board)
-        strength2 = evaluator.evaluate(opp_hand, board)
-        if strength1 < strength2:
-            wins += 1
-        # except:
-        #     print('error', hand)
-        # wins += random.randint(0, 1)
+    return 0
+
+
+def rank_showdown(hands, board):
+    """
+    多名玩家摊牌排名，每名玩家只评估一次
+    :param hands: 各玩家手牌列表，如 [['Ah', 'Kd'], ['7c', '7s']]
+    :param board: 公共牌
+    :return: 按牌力从大到小的名次分组，每组是牌力相同（平分）的玩家下标列表，
+    如 [[1], [0, 2]] 表示玩家1独赢，玩家0与2并列第二；不足5张牌时全部并列
+    """
+    board = cards_to_ints(board)
+    if len(board) < 3:
+        return [list(range(len(hands)))] if hands else []
+    tiers = {}
+    for i, hand in enumerate(hands):
+        tiers.setdefault(hand_rank(cards_to_ints(hand) + board), []).append(i)
+    return [tiers[rank] for rank in sorted(tiers, reverse=True)]
+
+
+def hands_to_ints(hands):
+    """手牌范围（'AhKd' 字符串或整数对）转换为整数对列表"""
+    if hands is None:
+        return []
+    return [hand_to_ints(h) if isinstance(h, str) else (int(h[0]), int(h[1])) for h in hands]
+
+
+def eval_strength(hand, board=None, opp_ranges=None, trials=5000, draw_size=2, precision=None, timeout=None):
+    """
+    计算手牌强度（赢的概率，平局不计为赢）
+    :param opp_ranges: 对手范围，Range 或 'AhKd' 字符串列表
+    :param trials: 模拟次数（指定精度或时限时为上限）
+    :param precision: 目标精度（95%置信区间半宽），如0.01；指定后分批模拟，达到即停止
+    :param timeout: 时限（秒），到时返回当前估计
+    """
+    from utils.equity import exact_cost, sample_cost, exact_strength, sample_wins, adaptive_strength, filter_hands
+    community_cards = cards_to_ints(board)
+    hand = cards_to_ints(hand)
+    opp_hands = filter_hands(opp_ranges, hand + community_cards)
+
+    # 穷举开销不超过模拟时（河牌、窄范围）直接穷举
+    if exact_cost(len(community_cards), len(opp_hands), draw_size) <= sample_cost(trials, draw_size):
+        return round(exact_strength(hand, community_cards, opp_hands, draw_size), 4)
+
+    # 指定精度或时限时分批模拟，提前停止；trials为上限
+    if precision is not None or timeout is not None:
+        result = adaptive_strength(hand, community_cards, opp_hands, trials, draw_size,
+                                   precision=precision, timeout=timeout)
+        return round(result.mean, 4)
+
+    wins = sample_wins(hand, community_cards, opp_hands, trials, draw_size)
     return round(wins / trials, 4)
@@ -0,0 +1,28 @@
+"""
+1326种两张牌组合的下标
+组合 (hi, lo)，hi > lo（0-51编码），下标 = hi * (hi - 1) / 2 + lo，
+范围、权重向量都使用这个顺序的 (1326,) 数组。
+"""
+import numpy as np
+
+from utils.card import cards_to_ints, card_mask, hand_to_ints
+
+COMBO_COUNT = 1326
+
+# (1326, 2) int8，每行 (hi, lo)
+COMBOS = np.array([(hi, lo) for hi in range(52) for lo in range(hi)], dtype=np.int8)
+
+# 每个组合的牌位掩码 (1 << hi) | (1 << lo)
+COMBO_MASKS = (np.uint64(1) << COMBOS[:, 0].astype(np.uint64)) | (np.uint64(1) << COMBOS[:, 1].astype(np.uint64))
+
+
+def combo_index(hand):
+    """两张手牌（'AhKd'、['Ah', 'Kd'] 或整数对） -> 组合下标"""
+    c1, c2 = hand_to_ints(hand) if isinstance(hand, str) else cards_to_ints(hand)
+    hi, lo = max(c1, c2), min(c1, c2)
+    return hi * (hi - 1) // 2 + lo
+
+
+def blocked(cards):
+    """(1326,) bool，包含任一已知牌的组合为True"""
+    return (COMBO_MASKS & np.uint64(card_mask(cards))) != 0
@@ -0,0 +1,594 @@
+"""
+胜率（手牌强度）计算
+- sample_wins: 蒙特卡洛模拟
+- multiway_shares: 多个随机对手的蒙特卡洛模拟，每次发牌所有对手共用，平局按人数平分
+- equity_difference: 两手候选牌使用同一批发牌比较胜率差
+- exact_strength: 剩余可能性较少时（转牌、河牌）直接穷举，结果无方差
+- adaptive_strength: 分批模拟，置信区间达到目标精度或到达时限即停止
+- EquityEngine: 多进程分片模拟，常驻进程池，每个分片使用确定的随机种子，结果可复现；
+  按花色同构的局面键缓存结果（utils.isomorph），可使用多进程共享的 EquityStore（utils.equity_store）
+模拟默认分层抽样（按对手组合与转牌、河牌），方差更小；标准误差仍按独立抽样计算，偏保守。
+平局约定：单个对手的胜率（eval_strength、exact_strength、sample_wins、EquityEngine.equity 不指定 opponents）
+平局不计为赢，与原 eval_strength 一致；指定对手数（opponents，GameFeature 的强度）时是分得底池的份额，
+平局按人数平分，单个对手可穷举时同样平分（exact_strength(tie=0.5)）。
+所有函数接受字符串或整数编码的牌，内部统一使用整数编码。
+"""
+import atexit
+import multiprocessing
+import os
+import threading
+import time
+from functools import lru_cache
+from itertools import combinations
+from math import comb, sqrt
+from statistics import NormalDist
+from typing import NamedTuple
+import numpy as np
+
+from utils.card import cards_to_ints, card_mask, hands_to_ints
+from utils.evaluator import evaluate, evaluate_shared, array_tables, count_wins
+from utils.hand_range import Range
+from utils.isomorph import situation_key, EquityCache
+from utils.sampler import DeckSampler
+
+
+def live_cards(used):
+    """除去已知牌后的剩余牌（整数数组）"""
+    mask = card_mask(used)
+    return np.array([c for c in range(52) if not mask >> c & 1], dtype=np.int8)
+
+
+def filter_hands(opp_hands, used):
+    """
+    去掉与已知牌冲突的范围手牌，返回 (n, 2) 整数数组
+    :param opp_hands: Range，或 'AhKd' 字符串、整数对的列表
+    """
+    if isinstance(opp_hands, Range):
+        return opp_hands.remove(used).combos()
+    if not isinstance(opp_hands, np.ndarray):
+        opp_hands = hands_to_ints(opp_hands)
+    hands = np.array(opp_hands, dtype=np.int8).reshape(-1, 2)
+    masks = (np.uint64(1) << hands[:, 0].astype(np.uint64)) | (np.uint64(1) << hands[:, 1].astype(np.uint64))
+    return hands[(masks & np.uint64(card_mask(used))) == 0]
+
+
+# 穷举时每块评估的 (发牌, 对手组合) 数，控制临时数组大小
+EXACT_CHUNK_SIZE = 1 << 18
+# 模拟中每次牌力评估（含抽牌、分层、拼接）的耗时约为批量穷举中每次评估的4倍
+SAMPLE_EVAL_COST = 4
+
+
+def exact_cost(board_size, opp_count=0, draw_size=2):
+    """
+    穷举的开销，以批量穷举中一次牌力评估为单位
+    :param board_size: 已发公共牌数
+    :param opp_count: 对手范围手牌数，0表示对手随机抽取draw_size张
+    """
+    live = 50 - board_size
+    need = 5 - board_size
+    if opp_count:
+        return comb(live, need) * (1 + opp_count)
+    if draw_size == 2:
+        # 所有发牌 × 对手所有两张组合一次批量评估
+        return comb(live, need) * (1 + comb(live - need, 2))
+    # draw_size>2 时逐个发牌，每种发牌还要在所有抽牌组合上取两张组合中的最小值
+    return comb(live, need) * (1 + comb(live - need, 2) + comb(live - need, draw_size))
+
+
+def sample_cost(trials, draw_size=2):
+    """蒙特卡洛模拟的开销，与 exact_cost 同一单位"""
+    return trials * (1 + comb(draw_size, 2)) * SAMPLE_EVAL_COST
+
+
+def exact_strength(hand, board=None, opp_hands=None, draw_size=2, tie=0.0):
+    """
+    穷举剩余公共牌与对手手牌，计算赢的概率（默认平局不计为赢，与eval_strength一致）
+    :param hand: 手牌
+    :param board: 公共牌
+    :param opp_hands: 对手范围，(n, 2) 整数对；为空时对手从剩余牌中随机抽取draw_size张，取其中最弱的两张
+    :param draw_size: 对手随机抽取的牌数
+    :param tie: 平局计为赢的份额，0.5 时为底池份额（同 multiway_shares 单个对手）；draw_size>2 时不支持
+    :return: 0-1 的胜率
+    """
+    hand = cards_to_ints(hand)
+    board = cards_to_ints(board)
+    used = hand + board
+    live = live_cards(used)
+    need = 5 - len(board)
+    opp_hands = filter_hands(opp_hands, used) if opp_hands is not None and len(opp_hands) else None
+
+    if opp_hands is None and draw_size != 2:
+        if tie:
+            raise ValueError('tie share is only supported for two-card opponents')
+        return _exact_draw_strength(hand, board, live, need, draw_size)
+    if opp_hands is None:
+        opp_hands = live[_index_combinations(len(live), 2)]
+
+    # 所有发牌 × 所有对手组合一次批量评估（按块控制内存），与发牌冲突的组合不计
+    runouts = live[_index_combinations(len(live), need)]
+    full_boards = np.concatenate([np.broadcast_to(np.array(board, dtype=np.int8), (len(runouts), len(board))),
+                                  runouts], axis=1)
+    hero = evaluate(np.concatenate([np.broadcast_to(np.array(hand, dtype=np.int8), (len(runouts), 2)),
+                                    full_boards], axis=1))
+    step = max(1, EXACT_CHUNK_SIZE // len(opp_hands))
+    wins = 0
+    total = 0
+    for start in range(0, len(runouts), step):
+        boards = full_boards[start:start + step]
+        ranks = evaluate_shared(boards, np.broadcast_to(opp_hands, (len(boards),) + opp_hands.shape))
+        free = ~(runouts[start:start + step, :, None, None] == opp_hands[None, None]).any(axis=(1, 3))
+        wins += int(((hero[start:start + step, None] > ranks) & free).sum())
+        if tie:
+            wins += tie * int(((hero[start:start + step, None] == ranks) & free).sum())
+        total += int(free.sum())
+    return wins / total if total else 0.0
+
+
+def _exact_draw_strength(hand, board, live, need, draw_size):
+    """对手随机抽取多于两张时的穷举：逐个发牌，取对手所有两张组合中最弱的"""
+    wins = 0
+    total = 0
+    for runout in combinations(live.tolist(), need):
+        full_board = board + list(runout)
+        hero = evaluate(np.array([hand + full_board], dtype=np.int8))[0]
+        rest = np.setdiff1d(live, runout)
+        pairs = _index_combinations(len(rest), 2)
+        ranks = evaluate(_with_board(rest[pairs], full_board))
+        # 任一两张组合弱于自己即算赢
+        lookup = np.zeros((len(rest), len(rest)), dtype=np.int32)
+        lookup[pairs[:, 0], pairs[:, 1]] = ranks
+        draws = _index_combinations(len(rest), draw_size)
+        beaten = np.zeros(len(draws), dtype=bool)
+        for i, j in combinations(range(draw_size), 2):
+            beaten |= hero > lookup[draws[:, i], draws[:, j]]
+        wins += int(beaten.sum())
+        total += len(draws)
+    return wins / total if total else 0.0
+
+
+# 发牌组合数不超过该值时按所有发牌分层（翻牌1081种、转牌46种），翻牌前只按对手组合分层
+MAX_RUNOUT_STRATA = 20000
+
+
+def _strata_tables(sampler, opp_hands, need, draw_size):
+    """
+    分层抽样用的 (对手组合, 所有发牌)：对手范围为空时是所有剩余组合；
+    对手随机抽取多于两张时不按组合分层，返回 (None, None)
+    """
+    if not len(opp_hands) and draw_size != 2:
+        return None, None
+    if not len(opp_hands):
+        opp_hands = _index_combinations(len(sampler.live), 2)
+        opp_hands = sampler.live[opp_hands]
+    runouts = None
+    if comb(len(sampler.live), need) <= MAX_RUNOUT_STRATA:
+        runouts = sampler.live[_index_combinations(len(sampler.live), need)]
+    return opp_hands, runouts
+
+
+def _draw(sampler, opp_hands, size, need, draw_size, stratify, pool=None, runouts=None):
+    """
+    抽取一批对手底牌与补齐的公共牌，返回 (opp_cards, runout)
+    pool 不为空时分层：对手组合、发牌各自均衡分配（每个组合、每种发牌出现次数相同），
+    两者冲突的行重新随机抽取发牌；对手组合均匀、给定组合时发牌在不冲突的发牌中均匀，与独立抽样分布相同
+    """
+    if pool is not None:
+        opp_cards = pool[sampler.strata(size, len(pool))]
+        if runouts is None:
+            drawn = sampler.batch(size, need + 2)
+            free = (drawn != opp_cards[:, :1]) & (drawn != opp_cards[:, 1:])
+            order = np.argsort(~free, axis=1, kind='stable')[:, :need]
+            return opp_cards, np.take_along_axis(drawn, order, axis=1)
+        runout = runouts[sampler.strata(size, len(runouts))]
+        conflict = (runout[:, :, None] == opp_cards[:, None, :]).any(axis=(1, 2))
+        while conflict.any():
+            rows = np.flatnonzero(conflict)
+            runout[rows] = runouts[sampler.rng.integers(len(runouts), size=len(rows))]
+            conflict[rows] = (runout[rows, :, None] == opp_cards[rows, None, :]).any(axis=(1, 2))
+        return opp_cards, runout
+    if len(opp_hands) > 0:
+        # 底牌范围中随机抽取一手牌，公共牌从剩下的牌中抽取
+        opp_cards = opp_hands[sampler.rng.integers(len(opp_hands), size=size)]
+        drawn = sampler.batch(size, need + 2)
+        free = (drawn != opp_cards[:, :1]) & (drawn != opp_cards[:, 1:])
+        order = np.argsort(~free, axis=1, kind='stable')[:, :need]
+        return opp_cards, np.take_along_axis(drawn, order, axis=1)
+    # 先抽公共牌再抽对手的牌，分层时作用在第一张公共牌（翻牌时为转牌）上
+    drawn = sampler.batch(size, need + draw_size, stratify)
+    return drawn[:, need:], drawn[:, :need]
+
+
+def _weakest_pair_strength(opp_cards, full_board):
+    """对手的牌多于两张时取最弱的两张（同 count_wins）"""
+    strength = np.full(len(opp_cards), np.iinfo(np.int32).max, dtype=np.int32)
+    for a, b in combinations(range(opp_cards.shape[1]), 2):
+        strength = np.minimum(strength, evaluate(np.concatenate([opp_cards[:, [a, b]], full_board], axis=1)))
+    return strength
+
+
+def sample_wins(hand, board, opp_hands, trials, draw_size=2, rng=None, sampler=None, batch=1000, stratify=True):
+    """
+    蒙特卡洛模拟，返回赢的次数（平局不计为赢）
+    每批一次抽出 (batch, k) 的牌，批量评估，不再逐次洗牌、删牌
+    :param hand: 手牌（整数）
+    :param board: 公共牌（整数）
+    :param opp_hands: 已去掉冲突组合的对手范围（整数对），为空时对手随机抽取draw_size张
+    :param rng: np.random.Generator 或种子
+    :param sampler: 可复用的 DeckSampler（已排除hand与board），为空时新建
+    :param stratify: 按对手组合与发牌分层抽样（见 _draw），同样的模拟次数方差更小，结果仍无偏
+    """
+    sampler = sampler or DeckSampler(hand + board, rng)
+    opp_hands = np.asarray(opp_hands, dtype=np.int8).reshape(-1, 2)
+    hand = np.array(hand, dtype=np.int8)
+    board = np.array(board, dtype=np.int8)
+    need = 5 - len(board)
+
+    pool, runouts = _strata_tables(sampler, opp_hands, need, draw_size) if stratify else (None, None)
+    wins = 0
+    for start in range(0, trials, batch):
+        size = min(batch, trials - start)
+        opp_cards, runout = _draw(sampler, opp_hands, size, need, draw_size, stratify, pool, runouts)
+        full_board = np.concatenate([np.broadcast_to(board, (size, len(board))), runout], axis=1)
+        wins += count_wins(hand, full_board, opp_cards)
+    return wins
+
+
+def equity_difference(hand_a, hand_b, board=None, opp_hands=None, trials=10000, draw_size=2, rng=None,
+                      batch=1000, stratify=True):
+    """
+    比较两手候选牌的胜率差（平局不计为赢），两手牌使用同一批发牌与对手底牌（公共随机数），
+    差值的方差远小于分别模拟两次；两手牌的牌都不会被发出
+    :return: EquityResult，mean 为 胜率(a) - 胜率(b)，stderr 为配对差值的标准误差
+    """
+    hand_a, hand_b, board = cards_to_ints(hand_a), cards_to_ints(hand_b), cards_to_ints(board)
+    used = hand_a + hand_b + board
+    sampler = DeckSampler(used, rng)
+    opp_hands = filter_hands(opp_hands, used)
+    board_array = np.array(board, dtype=np.int8)
+    need = 5 - len(board)
+
+    pool, runouts = _strata_tables(sampler, opp_hands, need, draw_size) if stratify else (None, None)
+    total = square = 0
+    for start in range(0, trials, batch):
+        size = min(batch, trials - start)
+        opp_cards, runout = _draw(sampler, opp_hands, size, need, draw_size, stratify, pool, runouts)
+        full_board = np.concatenate([np.broadcast_to(board_array, (size, len(board))), runout], axis=1)
+        villain = _weakest_pair_strength(opp_cards, full_board)
+        diff = np.zeros(size, dtype=np.int64)
+        for hand, sign in ((hand_a, 1), (hand_b, -1)):
+            hero = evaluate(np.concatenate([np.broadcast_to(np.array(hand, dtype=np.int8), (size, 2)), full_board],
+                                           axis=1))
+            diff += sign * (hero > villain)
+        total += int(diff.sum())
+        square += int((diff * diff).sum())
+    mean = total / trials
+    return EquityResult(mean, sqrt(max(square / trials - mean * mean, 0.0) / trials), trials)
+
+
+def multiway_shares(hand, board, opponents, trials, rng=None, sampler=None, batch=1000, stratify=True):
+    """
+    多个随机对手的蒙特卡洛模拟，返回分得底池份额之和（独赢为1，n人平局各得1/n）
+    每批一次抽出公共牌与所有对手的底牌，公共牌部分只计算一次，自己与所有对手共用
+    :param hand: 手牌（整数）
+    :param board: 公共牌（整数）
+    :param opponents: 对手数
+    :param rng: np.random.Generator 或种子
+    :param sampler: 可复用的 DeckSampler（已排除hand与board），为空时新建
+    :param stratify: 按第一张补齐的公共牌分层抽样
+    """
+    sampler = sampler or DeckSampler(hand + board, rng)
+    hand = np.array(hand, dtype=np.int8)
+    board = np.array(board, dtype=np.int8)
+    need = 5 - len(board)
+
+    shares = 0.0
+    for start in range(0, trials, batch):
+        size = min(batch, trials - start)
+        # 每行：先是补齐的公共牌，之后每两张是一个对手的底牌
+        drawn = sampler.batch(size, need + 2 * opponents, stratify and need > 0)
+        full_board = np.concatenate([np.broadcast_to(board, (size, len(board))), drawn[:, :need]], axis=1)
+        holdings = np.empty((size, 1 + opponents, 2), dtype=np.int8)
+        holdings[:, 0] = hand
+        holdings[:, 1:] = drawn[:, need:].reshape(size, opponents, 2)
+
+        ranks = evaluate_shared(full_board, holdings)
+        best = ranks.max(axis=1)
+        winners = (ranks == best[:, None]).sum(axis=1)
+        shares += float(np.where(ranks[:, 0] == best, 1.0 / winners, 0.0).sum())
+    return shares
+
+
+class EquityResult(NamedTuple):
+    """
+    胜率估计：均值、标准误差、模拟次数，是否穷举
+    穷举时标准误差为0，次数为评估的组合数；模拟的胜率恰好为0或1时标准误差也是0，以 exact 区分
+    """
+    mean: float
+    stderr: float
+    trials: int
+    exact: bool = False
+
+
+def confidence_half_width(wins, trials, confidence=0.95):
+    """
+    胜率置信区间的半宽（Agresti-Coull，胜率接近0或1时也不会低估）
+    """
+    z = NormalDist().inv_cdf((1 + confidence) / 2)
+    n = trials + z * z
+    p = (wins + z * z / 2) / n
+    return z * sqrt(p * (1 - p) / n)
+
+
+def _finished(wins, trials, precision, confidence, deadline):
+    """达到目标精度或超过截止时间"""
+    if precision is not None and confidence_half_width(wins, trials, confidence) <= precision:
+        return True
+    return deadline is not None and time.monotonic() >= deadline
+
+
+def adaptive_strength(hand, board, opp_hands, max_trials=10000, draw_size=2, precision=0.01,
+                      confidence=0.95, timeout=None, batch=250, rng=None):
+    """
+    分批模拟直到置信区间半宽不超过precision，或用时超过timeout秒，或达到max_trials
+    如 precision=0.01, confidence=0.95 表示95%置信度下误差±1%；明显领先/落后的牌几百次即可停止
+    :param hand: 手牌（整数）
+    :param board: 公共牌（整数）
+    :param opp_hands: 已去掉冲突组合的对手范围（整数对）
+    :param timeout: 时限（秒），每批结束后检查
+    :param rng: np.random.Generator 或种子
+    :return: EquityResult
+    """
+    deadline = None if timeout is None else time.monotonic() + timeout
+    sampler = DeckSampler(hand + board, rng)
+    wins = trials = 0
+    while trials < max_trials:
+        size = min(batch, max_trials - trials)
+        wins += sample_wins(hand, board, opp_hands, size, draw_size, sampler=sampler)
+        trials += size
+        if _finished(wins, trials, precision, confidence, deadline):
+            break
+    mean = wins / trials
+    return EquityResult(mean, sqrt(mean * (1 - mean) / trials), trials)
+
+
+def _init_worker():
+    # 子进程启动时构建查找表，避免第一次计算时再构建
+    array_tables()
+
+
+def _warm_worker(_):
+    # 子进程完成 initializer 后才接收任务，返回即说明该进程已就绪
+    return os.getpid()
+
+
+def _run_shard(args):
+    hand, board, opp_hands, trials, draw_size, opponents, seed, index = args
+    # 种子只由 (seed, 分片序号) 决定，与进程数、调度顺序无关
+    rng = np.random.default_rng(np.random.SeedSequence([seed, index]))
+    if opponents:
+        return multiway_shares(hand, board, opponents, trials, rng)
+    return sample_wins(hand, board, opp_hands, trials, draw_size, rng)
+
+
+class EquityEngine:
+    """
+    多进程胜率引擎
+    进程池在 start() 或第一次需要时创建，之后常驻，整个会话只启动一次；通过 get_engine() 获取共享实例
+    （会话开始时已启动，决策中不再承担创建进程、构建查找表的开销）。
+
+    用法：
+        result = get_engine().equity(['Ah', 'Kh'], ['Qh', '7h', '2c'], trials=10000, draw_size=3)
+        result.mean, result.stderr, result.trials
+        get_engine().equity(['Ah', 'Kh'], ['Qh', '7h', '2c'], opponents=4)   # 4个随机对手，平局平分
+    """
+
+    def __init__(self, processes=None, shard_trials=1000, cache=None):
+        """
+        :param processes: 进程数，默认CPU核数
+        :param shard_trials: 每个分片的模拟次数。分片方式只取决于它，不同进程数下结果相同
+                             （指定precision时也是，按分片顺序检查精度；指定timeout时停止位置取决于耗时）
+        :param cache: EquityCache 或 EquityStore，按 (situation_key, draw_size, opponents) 缓存结果，为空时不缓存
+        """
+        self.processes = processes or multiprocessing.cpu_count()
+        self.shard_trials = shard_trials
+        self.cache = cache
+        self._pool = None
+        self._pool_lock = threading.Lock()
+
+    def start(self):
+        """构建查找表、创建进程池并等待子进程就绪；会话开始时调用，已启动时不做任何事"""
+        if self.processes > 1:
+            self._get_pool()
+        else:
+            array_tables()
+        return self
+
+    def _get_pool(self):
+        # 后台胜率服务与主线程可能同时第一次使用
+        with self._pool_lock:
+            if self._pool is None:
+                # fork 时子进程直接继承已构建的查找表
+                array_tables()
+                self._pool = multiprocessing.Pool(self.processes, initializer=_init_worker)
+                self._pool.map(_warm_worker, range(self.processes), chunksize=1)
+            return self._pool
+
+    def equity(self, hand, board=None, opp_hands=None, trials=10000, draw_size=2, seed=0,
+               precision=None, confidence=0.95, timeout=None, opponents=None):
+        """
+        计算胜率，穷举开销不超过模拟时（单个对手的转牌、河牌）穷举
+        :param opp_hands: 对手范围（Range，或 'AhKd' 字符串、整数对的列表），Range 的权重不影响抽取概率
+        :param draw_size: 对手随机抽取的牌数（单个对手时）
+        :param trials: 模拟次数；指定precision或timeout时为上限
+        :param seed: 随机种子，相同参数与种子得到相同结果（有timeout时停止位置取决于耗时）
+        :param precision: 目标精度（置信区间半宽），达到后停止
+        :param confidence: 置信度
+        :param timeout: 时限（秒），从进程池就绪后开始计时；预计超过时限的一轮不再开始
+        :param opponents: 随机对手数，指定时计算多人底池的份额（平局按人数平分），忽略opp_hands与draw_size
+        :return: EquityResult
+        """
+        hand = cards_to_ints(hand)
+        board = cards_to_ints(board)
+        opp_range = opp_hands if isinstance(opp_hands, Range) else None
+        opp_hands = filter_hands(opp_hands, hand + board)
+        if opponents:
+            opp_hands, draw_size, opp_range = opp_hands[:0], 2, None
+
+        key = self._cache_key(hand, board, opp_hands, opp_range, draw_size, opponents)
+        if key is None:
+            return self._compute(hand, board, opp_hands, trials, draw_size, seed, precision, confidence, timeout,
+                                 opponents)
+        cached = self.cache.get(key)
+        if cached is not None and _satisfies(cached, trials, precision, confidence):
+            return cached
+        result = self._compute(hand, board, opp_hands, trials, draw_size, seed, precision, confidence, timeout,
+                               opponents)
+        if _improves(result, cached):
+            self.cache.put(key, result)
+        return result
+
+    def sample(self, hand, board=None, trials=1000, opponents=1, seed=0, first_shard=0):
+        """
+        对随机对手只做模拟（不穷举、不读写缓存），分片编号从 first_shard 开始
+        每次接着上一次的分片编号调用，累计结果与一次模拟全部分片完全相同，用于后台逐步细化（见 utils.equity_service）
+        :return: (赢的份额之和, 模拟次数)
+        """
+        hand, board = cards_to_ints(hand), cards_to_ints(board)
+        shards = self._shards(hand, board, np.zeros((0, 2), dtype=np.int8), trials, 2, opponents, seed, first_shard)
+        return sum(self._map(shards)), trials
+
+    def store(self, hand, board, result, opponents=1):
+        """把随机对手的结果写入缓存（已有穷举结果或模拟次数更多的结果时不覆盖）"""
+        hand, board = cards_to_ints(hand), cards_to_ints(board)
+        key = self._cache_key(hand, board, [], None, 2, opponents)
+        if key is None:
+            return
+        if _improves(result, self.cache.get(key)):
+            self.cache.put(key, result)
+
+    def _cache_key(self, hand, board, opp_hands, opp_range, draw_size, opponents):
+        """对手随机或对手范围为 Range 时缓存（范围不具有花色对称性时按具体的牌缓存），否则返回 None"""
+        if self.cache is None or len(opp_hands) and opp_range is None:
+            return None
+        return situation_key(hand, board, opp_range), draw_size, opponents
+
+    def _shards(self, hand, board, opp_hands, trials, draw_size, opponents, seed, first_shard=0):
+        return [(hand, board, opp_hands, min(self.shard_trials, trials - start), draw_size, opponents, seed,
+                 first_shard + i) for i, start in enumerate(range(0, trials, self.shard_trials))]
+
+    def _compute(self, hand, board, opp_hands, trials, draw_size, seed, precision, confidence, timeout,
+                 opponents):
+        # 穷举只用于单个对手：不指定 opponents 时平局不计为赢，opponents=1 时平局平分（与 multiway_shares 一致）
+        cost = exact_cost(len(board), len(opp_hands), draw_size)
+        if (opponents or 1) == 1 and cost <= sample_cost(trials, draw_size):
+            strength = exact_strength(hand, board, opp_hands, draw_size, tie=0.5 if opponents else 0.0)
+            return EquityResult(strength, 0.0, cost, True)
+
+        shards = self._shards(hand, board, opp_hands, trials, draw_size, opponents, seed)
+        if precision is None and timeout is None:
+            wins = sum(self._map(shards))
+            done = trials
+        else:
+            # 每轮每个进程一个分片并行计算；按分片顺序逐个累计并检查精度，停在第一个达到精度的分片，
+            # 同一轮中其后的分片丢弃，停止位置与进程数无关。
+            # 有时限时按剩余时间决定下一轮的大小：放不下一轮（按已完成轮的平均耗时估计）时停止，
+            # 只有时限时一轮可以包含剩余时间内能完成的所有分片，减少同步次数
+            if timeout is not None:
+                # 进程池与查找表的准备不计入本次时限
+                self.start()
+            deadline = None if timeout is None else time.monotonic() + timeout
+            wins = done = rounds = 0
+            elapsed = 0.0
+            first = 0
+            while first < len(shards):
+                size = self.processes
+                if deadline is not None and rounds and elapsed > 0:
+                    fit = int((deadline - time.monotonic()) / (elapsed / rounds))
+                    if fit < 1:
+                        break
+                    if precision is None:
+                        size *= fit
+                batch = shards[first:first + size]
+                started = time.monotonic()
+                reached = False
+                for shard, shard_wins in zip(batch, self._map(batch)):
+                    wins += shard_wins
+                    done += shard[3]
+                    if _finished(wins, done, precision, confidence, None):
+                        reached = True
+                        break
+                elapsed += time.monotonic() - started
+                rounds += -(-len(batch) // self.processes)
+                first += size
+                if reached or _finished(wins, done, None, confidence, deadline):
+                    break
+        mean = wins / done
+        return EquityResult(mean, sqrt(mean * (1 - mean) / done), done)
+
+    def _map(self, shards):
+        if len(shards) == 1 or self.processes == 1:
+            return list(map(_run_shard, shards))
+        return self._get_pool().map(_run_shard, shards)
+
+    def close(self):
+        """关闭进程池"""
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool.join()
+            self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _satisfies(result, trials, precision, confidence):
+    """缓存的结果是否满足本次要求：穷举结果、模拟次数不少于要求、或已达到目标精度"""
+    if result.exact or result.trials >= trials:
+        return True
+    return precision is not None and confidence_half_width(result.mean * result.trials, result.trials,
+                                                           confidence) <= precision
+
+
+def _improves(result, cached):
+    """新结果是否比缓存的更好：穷举结果不被模拟覆盖，模拟之间取次数更多的"""
+    if cached is None or result.exact and not cached.exact:
+        return True
+    return result.exact == cached.exact and result.trials > cached.trials
+
+
+# 设置后胜率缓存保存到该文件，下次启动时加载
+CACHE_PATH = os.environ.get('POKER_EQUITY_CACHE')
+# 设置后使用多个进程共享的 SQLite 胜率存储（优先于 CACHE_PATH）
+STORE_PATH = os.environ.get('POKER_EQUITY_STORE')
+
+
+@lru_cache(maxsize=None)
+def get_engine():
+    """
+    会话共享的胜率引擎，带胜率缓存；第一次调用时启动进程池（会话开始时调用，见 Strategy、EquityService），
+    进程退出时关闭进程池并保存缓存
+    """
+    if STORE_PATH:
+        from utils.equity_store import EquityStore
+        cache = EquityStore(STORE_PATH)
+    else:
+        cache = EquityCache(path=CACHE_PATH)
+    engine = EquityEngine(cache=cache).start()
+    atexit.register(engine.cache.save)
+    atexit.register(engine.close)
+    return engine
+
+
+def _with_board(holdings, board):
+    """(n, 2) 手牌拼接同一组公共牌 -> (n, 2 + len(board))"""
+    board = np.broadcast_to(np.array(board, dtype=np.int8), (len(holdings), len(board)))
+    return np.concatenate([holdings.astype(np.int8), board], axis=1)
+
+
+@lru_cache(maxsize=None)
+def _index_combinations(n, k):
+    """range(n) 中所有k个元素组合的下标数组 (C(n, k), k)"""
+    return np.array(list(combinations(range(n), k)), dtype=np.intp).reshape(comb(n, k), k)
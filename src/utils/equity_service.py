@@ -0,0 +1,152 @@
+"""
+后台胜率服务
+胜率只取决于手牌、公共牌与对手数。OCR 读出手牌、公共牌后立即 submit，后台线程按轮模拟并不断细化，
+与读取其余区域、等待其他玩家行动同时进行；决策时 best() 取截止时间前最好的估计。
+
+每轮接着上一轮的分片编号模拟（EquityEngine.sample），累计结果与一次模拟同样多的分片完全相同；
+每轮结果写入引擎缓存，GameFeature._strength 之后调用 engine.equity 时直接命中。
+
+用法：
+    service = EquityService(get_engine())
+    service.submit(['Ah', 'Kh'], ['Qh', '7h', '2c'], opponents=2)
+    ...
+    result = service.best(stage=1, deadline=time.monotonic() + 0.05)   # EquityResult 或 None
+    result = service.best(1, deadline, hand=['Ah', 'Kh'], board=['Qh', '7h', '2c'], opponents=2)  # 只接受该局面
+
+接入 OCR -> 决策 的循环（同一个服务由两端共享）：
+    service = EquityService()
+    ocr, strategy = PokerOcr(service), Strategy(service)
+    while True:
+        state = ocr.fetch_state(image)          # 读出手牌、公共牌后立即 submit，读完玩家后按对手数再 submit
+        game.add_state(state)
+        feature = GameFeature.process(game)     # 同步计算的强度，feature.hand/board 为本次决策的局面
+        action = strategy.predict(feature, deadline=time.monotonic() + 0.05)
+        # predict 只在服务当前局面与 feature 的手牌、公共牌、对手数相同时使用其估计，否则保留同步计算的强度
+"""
+import threading
+import time
+from math import sqrt
+
+from utils.card import cards_to_ints
+from utils.equity import EquityResult, confidence_half_width, get_engine
+
+
+class EquityService:
+
+    def __init__(self, engine=None, round_trials=None, max_trials=100000, precision=0.002, confidence=0.95):
+        """
+        :param engine: EquityEngine，默认 get_engine()；创建服务时启动其进程池
+        :param round_trials: 每轮模拟次数，默认每个进程一个分片；轮与轮之间检查局面是否已变化
+        :param max_trials: 每个局面最多模拟次数
+        :param precision: 达到该精度（置信区间半宽）后停止细化
+        """
+        # 服务在会话开始时创建，此时启动进程池，决策中不再承担启动开销
+        self.engine = (engine or get_engine()).start()
+        self.round_trials = round_trials or self.engine.shard_trials * self.engine.processes
+        self.max_trials = max_trials
+        self.precision = precision
+        self.confidence = confidence
+        self._cond = threading.Condition()
+        self._job = None            # (手牌, 公共牌, 对手数)，整数编码的元组
+        self._result = None         # 当前局面最好的估计
+        self._finished = False
+        self._opponents = 1
+        self._thread = None
+        self._closed = False
+
+    def submit(self, hand, board=None, opponents=None):
+        """
+        开始（或继续）计算该局面；与当前局面相同时不做任何事
+        :param opponents: 随机对手数，为空时沿用上一次的对手数（OCR 先读牌、后读玩家）
+        """
+        hand, board = _ints(hand), _ints(board)
+        if len(hand) != 2 or not board:
+            # 翻牌前直接查表（utils.preflop），不需要模拟
+            return
+        with self._cond:
+            self._opponents = opponents or self._opponents
+            job = (hand, board, self._opponents)
+            if job == self._job:
+                return
+            self._job, self._result, self._finished = job, None, False
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='equity-service', daemon=True)
+                self._thread.start()
+            self._cond.notify_all()
+
+    def best(self, stage=None, deadline=None, hand=None, board=None, opponents=None):
+        """
+        当前局面最好的估计，还没有任何结果时最多等到 deadline
+        :param stage: 只接受该街（1 翻牌、2 转牌、3 河牌）的局面，当前局面不是该街时返回 None
+        :param deadline: time.monotonic() 时刻，为空时不等待
+        :param hand: 指定时只接受该手牌与 board 的局面（如决策时的手牌、公共牌），避免取到上一手牌的估计
+        :param opponents: 指定时还要求对手数相同
+        :return: EquityResult 或 None
+        """
+        situation = None if hand is None else (_ints(hand), _ints(board), opponents)
+        with self._cond:
+            while self._matches(stage, situation) and self._result is None:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is None or remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            return self._result if self._matches(stage, situation) else None
+
+    def _matches(self, stage, situation=None):
+        if self._job is None or stage is not None and len(self._job[1]) - 2 != stage:
+            return False
+        if situation is None:
+            return True
+        hand, board, opponents = situation
+        return self._job[:2] == (hand, board) and (opponents is None or self._job[2] == opponents)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._closed and (self._job is None or self._finished):
+                    self._cond.wait()
+                if self._closed:
+                    return
+                job, result = self._job, self._result
+            result = self._refine(job, result)
+            with self._cond:
+                if job == self._job:
+                    self._result = result
+                    self._finished = (result.exact or result.trials >= self.max_trials or
+                                      confidence_half_width(result.mean * result.trials, result.trials,
+                                                            self.confidence) <= self.precision)
+                    self._cond.notify_all()
+
+    def _refine(self, job, result):
+        """在已有结果上再模拟一轮；第一轮经过引擎缓存（已算过的局面直接取用，可穷举时穷举）"""
+        hand, board, opponents = job
+        if result is None:
+            return self.engine.equity(list(hand), list(board), trials=self.round_trials, opponents=opponents)
+        first_shard = -(-result.trials // self.engine.shard_trials)
+        wins, trials = self.engine.sample(list(hand), list(board), self.round_trials, opponents,
+                                          first_shard=first_shard)
+        done = result.trials + trials
+        mean = (result.mean * result.trials + wins) / done
+        result = EquityResult(mean, sqrt(mean * (1 - mean) / done), done)
+        self.engine.store(list(hand), list(board), result, opponents)
+        return result
+
+    def close(self):
+        """停止后台线程（正在进行的一轮结束后退出）"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _ints(cards):
+    """局面比较用的整数元组，与牌的顺序、写法无关"""
+    return tuple(sorted(cards_to_ints(cards)))
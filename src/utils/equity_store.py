@@ -0,0 +1,131 @@
+"""
+跨进程共享的胜率存储（SQLite，WAL模式）
+多个进程（牌桌、训练、回测）打开同一个文件：读不加锁，也不会被写阻塞；
+写入先放在进程内缓冲区，攒够 batch_size 条、最早的一条等待超过 flush_interval 秒（或 save 时）一个事务批量写入；
+条目数超过 max_entries 时按最近使用时间淘汰。读取记录的使用时间随下一次批量写入一起更新。
+
+与 EquityCache 接口相同（get/put/save），可直接作为 EquityEngine 的 cache：
+    engine = EquityEngine(cache=EquityStore('equity.db'))
+键为整数、字符串、None 组成的元组，如 (situation_key(hand, board), draw_size, opponents)。
+"""
+import json
+import sqlite3
+import threading
+import time
+
+from utils.equity import EquityResult
+
+
+class EquityStore:
+
+    def __init__(self, path, max_entries=1000000, batch_size=256, flush_interval=1.0):
+        """
+        :param path: 数据库文件，不存在时创建
+        :param max_entries: 最多保留的条目数
+        :param batch_size: 缓冲的写入条数，达到后批量写入
+        :param flush_interval: 缓冲区中最早的写入超过该秒数时，下一次 put 批量写入，其他进程最多晚这么久看到
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._pending_since = None
+        self.hits = 0
+        self.misses = 0
+        self._pending = {}
+        self._touched = {}
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute('CREATE TABLE IF NOT EXISTS equity (key TEXT PRIMARY KEY, mean REAL, stderr REAL, '
+                           'trials INTEGER, used REAL, exact INTEGER NOT NULL DEFAULT 0) WITHOUT ROWID')
+        if 'exact' not in [row[1] for row in self._conn.execute('PRAGMA table_info(equity)')]:
+            # 没有 exact 列的旧文件：原有结果都按模拟结果处理
+            self._conn.execute('ALTER TABLE equity ADD COLUMN exact INTEGER NOT NULL DEFAULT 0')
+        self._conn.execute('CREATE INDEX IF NOT EXISTS equity_used ON equity (used)')
+
+    def get(self, key):
+        key = _encode(key)
+        with self._lock:
+            result = self._pending.get(key)
+            if result is None:
+                row = self._conn.execute('SELECT mean, stderr, trials, exact FROM equity WHERE key = ?',
+                                         (key,)).fetchone()
+                result = None if row is None else EquityResult(*row[:3], bool(row[3]))
+            if result is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._touched[key] = time.time()
+            return result
+
+    def put(self, key, result):
+        with self._lock:
+            if not self._pending:
+                self._pending_since = time.monotonic()
+            self._pending[_encode(key)] = EquityResult(*result)
+            if (len(self._pending) >= self.batch_size or
+                    time.monotonic() - self._pending_since >= self.flush_interval):
+                self._flush()
+
+    def save(self):
+        """写入缓冲区中的结果"""
+        with self._lock:
+            self._flush()
+
+    def _flush(self):
+        if self._conn is None or not self._pending and not self._touched:
+            return
+        now = time.time()
+        conn = self._conn
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            # 已有结果时只在更好时覆盖（其他进程可能已写入更精确的结果）：穷举结果不被模拟覆盖，模拟之间取次数更多的
+            conn.executemany(
+                'INSERT INTO equity (key, mean, stderr, trials, used, exact) VALUES (?, ?, ?, ?, ?, ?) '
+                'ON CONFLICT (key) DO UPDATE SET mean = excluded.mean, stderr = excluded.stderr, '
+                'trials = excluded.trials, used = excluded.used, exact = excluded.exact '
+                'WHERE excluded.exact > equity.exact '
+                'OR excluded.exact = equity.exact AND excluded.trials > equity.trials',
+                [(key, r.mean, r.stderr, r.trials, now, int(r.exact)) for key, r in self._pending.items()])
+            conn.executemany('UPDATE equity SET used = ? WHERE key = ? AND used < ?',
+                             [(used, key, used) for key, used in self._touched.items()])
+            count = conn.execute('SELECT COUNT(*) FROM equity').fetchone()[0]
+            if count > self.max_entries:
+                conn.execute('DELETE FROM equity WHERE key IN (SELECT key FROM equity ORDER BY used LIMIT ?)',
+                             (count - self.max_entries,))
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        self._pending.clear()
+        self._touched.clear()
+        self._pending_since = None
+
+    def close(self):
+        """写入缓冲区并关闭连接"""
+        with self._lock:
+            if self._conn is None:
+                return
+            self._flush()
+            self._conn.close()
+            self._conn = None
+
+    def __len__(self):
+        with self._lock:
+            # 已写入的条目数 + 缓冲区中尚未写入的新键数，一次查询
+            return self._conn.execute(
+                'SELECT (SELECT COUNT(*) FROM equity) + ? - '
+                '(SELECT COUNT(*) FROM equity WHERE key IN (SELECT value FROM json_each(?)))',
+                (len(self._pending), json.dumps(list(self._pending)))).fetchone()[0]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _encode(key):
+    return repr(key)
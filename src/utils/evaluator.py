@@ -0,0 +1,226 @@
+"""
+批量牌力评估（NumPy向量化）
+与 utils.card.hand_rank 使用同一套查找表，返回值完全一致，数值越大牌力越大。
+
+用法：
+    ranks = evaluate(cards)                   # cards: (N, 5-7) 整数数组，如 int8
+    evaluate(cards, out=np.lib.format.open_memmap('ranks.npy', mode='w+', dtype=np.int32, shape=(N,)))
+    for start, ranks in iter_evaluate(cards):  # 分块流式处理，内存占用只与chunk_size有关
+        ...
+    ranks = evaluate_shared(board, holdings)  # 同一组公共牌上的多手底牌，公共牌部分只计算一次
+    wins = count_wins(hand, boards, opp_cards)  # 模拟的一批发牌中手牌赢的次数
+
+可选依赖 numba：导入时检测，安装后 evaluate/count_wins 使用编译的逐行内核（不产生临时数组），
+结果与 NumPy 路径完全一致；未安装或设置环境变量 POKER_NO_JIT=1 时使用 NumPy 路径。
+"""
+from functools import lru_cache
+from itertools import combinations
+import os
+
+import numpy as np
+
+from utils.card import lookup_tables
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+HAVE_NUMBA = numba is not None
+# 默认是否走编译内核
+USE_JIT = HAVE_NUMBA and not os.environ.get('POKER_NO_JIT')
+
+# 每块行数。7张牌时每块的临时数组约 chunk_size * 7 * 8 字节 * 数个
+DEFAULT_CHUNK_SIZE = 1 << 18
+
+
+@lru_cache(maxsize=None)
+def array_tables():
+    """
+    lookup_tables 的数组形式：
+    rank_keys/rank_values 按点数键排序，searchsorted 查找非同花牌力
+    flush_table 13位点数掩码 -> 同花牌力；flush_suit 花色键 -> 同花花色（-1为无）
+    rank_key/suit_key 每张牌（0-51）对应的点数键、花色键
+    """
+    rank_table, flush_table, flush_suit = lookup_tables()
+    rank_keys = np.fromiter(sorted(rank_table), dtype=np.int64, count=len(rank_table))
+    rank_values = np.array([rank_table[k] for k in rank_keys.tolist()], dtype=np.int32)
+    cards = np.arange(52)
+    return {
+        'rank_keys': rank_keys,
+        'rank_values': rank_values,
+        'flush_table': np.array(flush_table, dtype=np.int32),
+        'flush_suit': np.array(flush_suit, dtype=np.int8),
+        'rank_key': 5 ** (cards >> 2).astype(np.int64),
+        'suit_key': (1 << (4 * (cards & 3))).astype(np.int64),
+    }
+
+
+@lru_cache(maxsize=None)
+def _kernel_tables():
+    """内核使用的查找表，顺序与 _rank_cards 的参数一致"""
+    tables = array_tables()
+    return tuple(tables[name] for name in ('rank_keys', 'rank_values', 'flush_table', 'flush_suit',
+                                           'rank_key', 'suit_key'))
+
+
+def _rank_cards(cards, rank_keys, rank_values, flush_table, flush_suit, rank_key, suit_key):
+    """一手牌（一维整数数组，5-7张）的牌力，逐张累加点数键、花色键"""
+    key = 0
+    suit_sum = 0
+    for j in range(cards.shape[0]):
+        card = np.int64(cards[j])
+        key += rank_key[card]
+        suit_sum += suit_key[card]
+    suit = flush_suit[suit_sum]
+    if suit < 0:
+        return rank_values[np.searchsorted(rank_keys, key)]
+    mask = 0
+    for j in range(cards.shape[0]):
+        card = np.int64(cards[j])
+        if (card & 3) == suit:
+            mask |= 1 << (card >> 2)
+    return flush_table[mask]
+
+
+def _rank_rows(cards, out, rank_keys, rank_values, flush_table, flush_suit, rank_key, suit_key):
+    """(n, k) 手牌逐行求牌力写入 out"""
+    for i in range(cards.shape[0]):
+        out[i] = _rank_cards(cards[i], rank_keys, rank_values, flush_table, flush_suit, rank_key, suit_key)
+    return out
+
+
+def _count_rows(hand, boards, opp_cards, rank_keys, rank_values, flush_table, flush_suit, rank_key, suit_key):
+    """逐行比较 hand + boards[i] 与对手 opp_cards[i] 中最弱两张 + boards[i]，返回严格赢的行数"""
+    size = boards.shape[1]
+    cards = np.empty(size + 2, dtype=np.int64)
+    wins = 0
+    for i in range(boards.shape[0]):
+        for j in range(size):
+            cards[j] = boards[i, j]
+        cards[size] = hand[0]
+        cards[size + 1] = hand[1]
+        hero = _rank_cards(cards, rank_keys, rank_values, flush_table, flush_suit, rank_key, suit_key)
+        villain = 2 ** 31 - 1
+        for a in range(opp_cards.shape[1] - 1):
+            for b in range(a + 1, opp_cards.shape[1]):
+                cards[size] = opp_cards[i, a]
+                cards[size + 1] = opp_cards[i, b]
+                villain = min(villain, _rank_cards(cards, rank_keys, rank_values, flush_table, flush_suit,
+                                                   rank_key, suit_key))
+        if hero > villain:
+            wins += 1
+    return wins
+
+
+if HAVE_NUMBA:
+    # 先编译被调用的 _rank_cards，其余内核编译时按全局名引用到编译版本
+    _rank_cards = numba.njit(cache=True)(_rank_cards)
+    _rank_rows = numba.njit(cache=True)(_rank_rows)
+    _count_rows = numba.njit(cache=True)(_count_rows)
+
+
+def _evaluate_chunk(cards, jit=False):
+    """(n, k) 整数数组 -> (n,) int32 牌力"""
+    if jit:
+        return _rank_rows(np.ascontiguousarray(cards), np.empty(len(cards), dtype=np.int32), *_kernel_tables())
+    tables = array_tables()
+    cards = cards.astype(np.intp, copy=False)
+
+    rank_key = tables['rank_key'][cards].sum(axis=1)
+    ranks = tables['rank_values'][np.searchsorted(tables['rank_keys'], rank_key)]
+
+    suit = tables['flush_suit'][tables['suit_key'][cards].sum(axis=1)]
+    flush_rows = np.flatnonzero(suit >= 0)
+    if flush_rows.size:
+        flush_cards = cards[flush_rows]
+        in_suit = (flush_cards & 3) == suit[flush_rows, None]
+        mask = np.where(in_suit, 1 << (flush_cards >> 2), 0).sum(axis=1)
+        ranks[flush_rows] = tables['flush_table'][mask]
+    return ranks
+
+
+def iter_evaluate(cards, chunk_size=DEFAULT_CHUNK_SIZE, jit=None):
+    """
+    分块评估，逐块返回 (起始行, 牌力数组)
+    :param cards: (N, 5-7) 整数数组，可以是 np.memmap，只会按块读入内存
+    :param chunk_size: 每块行数
+    :param jit: 是否使用逐行内核，None 时取 USE_JIT；未安装 numba 时内核按纯Python解释执行（很慢，仅供测试）
+    """
+    jit = USE_JIT if jit is None else jit
+    for start in range(0, len(cards), chunk_size):
+        yield start, _evaluate_chunk(np.asarray(cards[start:start + chunk_size]), jit)
+
+
+def evaluate(cards, chunk_size=DEFAULT_CHUNK_SIZE, out=None, jit=None):
+    """
+    批量计算牌力
+    :param cards: (N, 5-7) 整数数组，每行一手牌（0-51编码）
+    :param chunk_size: 每块行数，控制峰值内存
+    :param out: 可选的 (N,) int32 输出数组（如 np.memmap），结果直接写入
+    :param jit: 同 iter_evaluate
+    :return: (N,) int32 牌力数组，与 utils.card.hand_rank 一致
+    """
+    cards = np.asarray(cards)
+    if cards.ndim != 2 or not 5 <= cards.shape[1] <= 7:
+        raise ValueError(f'cards must have shape (N, 5-7), got {cards.shape}')
+    if out is None:
+        out = np.empty(len(cards), dtype=np.int32)
+    for start, ranks in iter_evaluate(cards, chunk_size, jit):
+        out[start:start + len(ranks)] = ranks
+    return out
+
+
+def evaluate_shared(board, holdings):
+    """
+    每组公共牌与多手底牌分别组成的牌力，公共牌的点数键、花色键每行只求和一次
+    :param board: (N, 3-5) 整数数组
+    :param holdings: (N, H, 2) 整数数组，每行H手底牌
+    :return: (N, H) int32 牌力，与 evaluate 一致；底牌与公共牌有重复的位置结果无意义（不会越界），由调用方排除
+    """
+    tables = array_tables()
+    board = np.asarray(board).astype(np.intp, copy=False)
+    holdings = np.asarray(holdings).astype(np.intp, copy=False)
+
+    rank_key = tables['rank_key'][board].sum(axis=1)[:, None] + tables['rank_key'][holdings].sum(axis=2)
+    index = np.minimum(np.searchsorted(tables['rank_keys'], rank_key), len(tables['rank_keys']) - 1)
+    ranks = tables['rank_values'][index]
+
+    suit_key = tables['suit_key'][board].sum(axis=1)[:, None] + tables['suit_key'][holdings].sum(axis=2)
+    suit = tables['flush_suit'][suit_key]
+    rows, cols = np.nonzero(suit >= 0)
+    if rows.size:
+        flush_cards = np.concatenate([board[rows], holdings[rows, cols]], axis=1)
+        in_suit = (flush_cards & 3) == suit[rows, cols, None]
+        mask = np.bitwise_or.reduce(np.where(in_suit, 1 << (flush_cards >> 2), 0), axis=1)
+        ranks[rows, cols] = tables['flush_table'][mask]
+    return ranks
+
+
+def count_wins(hand, boards, opp_cards, jit=None):
+    """
+    模拟的一批发牌中手牌严格赢的次数（平局不计为赢）
+    :param hand: 两张手牌（整数）
+    :param boards: (N, 5) 每次模拟的完整公共牌
+    :param opp_cards: (N, k) 每次模拟的对手底牌，k > 2 时取其中最弱的两张（原 eval_strength 的 draw_size 语义：
+                      赢过任意两张组合即算赢）
+    :param jit: 同 iter_evaluate
+    """
+    hand = np.asarray(hand, dtype=np.int8)
+    boards = np.asarray(boards)
+    opp_cards = np.asarray(opp_cards)
+    if USE_JIT if jit is None else jit:
+        return int(_count_rows(hand, np.ascontiguousarray(boards), np.ascontiguousarray(opp_cards),
+                               *_kernel_tables()))
+    hero = evaluate(np.concatenate([np.broadcast_to(hand, (len(boards), 2)), boards], axis=1), jit=False)
+    villain = np.full(len(boards), np.iinfo(np.int32).max, dtype=np.int32)
+    for a, b in combinations(range(opp_cards.shape[1]), 2):
+        villain = np.minimum(villain, evaluate(np.concatenate([opp_cards[:, [a, b]], boards], axis=1), jit=False))
+    return int((hero > villain).sum())
+
+
+def random_hands(count, size=7, seed=None):
+    """生成 (count, size) int8 随机手牌，每行无重复牌，用于生成训练数据或测试"""
+    rng = np.random.default_rng(seed)
+    keys = rng.random((count, 52))
+    return np.argpartition(keys, size, axis=1)[:, :size].astype(np.int8)
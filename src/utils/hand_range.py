@@ -0,0 +1,218 @@
+"""
+手牌范围
+1326种组合（下标见 utils.combos）的 float32 权重向量，0表示不在范围内。
+所有操作都是整体的数组运算，可直接传给 eval_strength、EquityEngine.equity（opp_hands）与 range_equity。
+
+用法：
+    villain = Range.from_hands(HandScore.get_ranges(0.6, 1.0))
+    villain = Range.full().top(0.2).remove(board)     # 前20%起手牌，去掉与公共牌冲突的组合
+    hero | villain, hero & villain                      # 并集（取较大权重）、交集（取较小权重）
+    data = villain.to_bytes(); Range.from_bytes(data)
+    parse_range('TT+, AKs, A5s-A2s, KQo, AKo:0.5')      # 范围记号，编译结果缓存
+"""
+import re
+from functools import lru_cache
+import numpy as np
+
+from utils.card import CARD_IDS, RANK_CHARS, hands_to_ints
+from utils.combos import COMBO_COUNT, COMBOS, blocked, combo_index
+
+
+class Range:
+
+    def __init__(self, weights=None):
+        """
+        :param weights: (1326,) 权重，为空时是空范围
+        """
+        if weights is None:
+            self.weights = np.zeros(COMBO_COUNT, dtype=np.float32)
+        else:
+            self.weights = np.array(weights, dtype=np.float32)
+            if self.weights.shape != (COMBO_COUNT,):
+                raise ValueError(f'weights must have shape ({COMBO_COUNT},), got {self.weights.shape}')
+
+    @classmethod
+    def full(cls):
+        """所有组合，权重均为1"""
+        return cls(np.ones(COMBO_COUNT, dtype=np.float32))
+
+    @classmethod
+    def from_hands(cls, hands, weight=1.0):
+        """'AhKd' 字符串或整数对的列表"""
+        result = cls()
+        result.weights[[combo_index(h) for h in hands_to_ints(hands)]] = weight
+        return result
+
+    def combos(self):
+        """范围内的组合，(n, 2) int8 整数对"""
+        return COMBOS[self.weights > 0]
+
+    def remove(self, cards):
+        """去掉包含已知牌（公共牌、手牌）的组合"""
+        return Range(np.where(blocked(cards), 0, self.weights))
+
+    def normalize(self):
+        """权重归一化，总和为1"""
+        total = self.weights.sum()
+        return Range(self.weights / total if total else self.weights)
+
+    def top(self, fraction, scores=None):
+        """
+        按分数从高到低，取权重占比前fraction的组合；与边界分数相同的组合一并保留
+        :param scores: (1326,) 组合分数或 (169,) 起手牌分数，默认使用单挑翻牌前胜率
+        """
+        scores = _combo_scores(scores)
+        order = np.argsort(-scores, kind='stable')
+        order = order[self.weights[order] > 0]
+        if not len(order) or fraction <= 0:
+            return Range()
+        covered = np.cumsum(self.weights[order]) / self.weights[order].sum()
+        threshold = scores[order[min(np.searchsorted(covered, fraction), len(order) - 1)]]
+        return Range(np.where(scores >= threshold, self.weights, 0))
+
+    def to_bytes(self):
+        """
+        紧凑序列化：权重都是0或1时为位图（167字节），否则为组合下标 uint16 + 权重 float16
+        """
+        active = np.flatnonzero(self.weights)
+        if np.all(self.weights[active] == 1):
+            return b'B' + np.packbits(self.weights > 0).tobytes()
+        return (b'W' + np.uint16(len(active)).tobytes() + active.astype(np.uint16).tobytes()
+                + self.weights[active].astype(np.float16).tobytes())
+
+    @classmethod
+    def from_bytes(cls, data):
+        result = cls()
+        if data[:1] == b'B':
+            bits = np.unpackbits(np.frombuffer(data, dtype=np.uint8, offset=1))[:COMBO_COUNT]
+            result.weights[:] = bits
+        elif data[:1] == b'W':
+            count = int(np.frombuffer(data, dtype=np.uint16, count=1, offset=1)[0])
+            active = np.frombuffer(data, dtype=np.uint16, count=count, offset=3)
+            result.weights[active] = np.frombuffer(data, dtype=np.float16, count=count, offset=3 + 2 * count)
+        else:
+            raise ValueError(f'unknown range format: {data[:1]!r}')
+        return result
+
+    def __or__(self, other):
+        return Range(np.maximum(self.weights, other.weights))
+
+    def __and__(self, other):
+        return Range(np.minimum(self.weights, other.weights))
+
+    def __eq__(self, other):
+        return isinstance(other, Range) and np.array_equal(self.weights, other.weights)
+
+    def __len__(self):
+        return int(np.count_nonzero(self.weights))
+
+    def __iter__(self):
+        """逐个返回范围内的组合 (hi, lo)，可直接当作手牌列表使用"""
+        return (tuple(c) for c in self.combos().tolist())
+
+    def __array__(self, dtype=None, copy=None):
+        return self.weights if dtype is None else self.weights.astype(dtype)
+
+    def __repr__(self):
+        return f'Range({len(self)} combos, weight={self.weights.sum():g})'
+
+
+def _combo_scores(scores):
+    """分数表转换为 (1326,) 组合分数"""
+    if scores is None:
+        from utils.preflop import preflop_table
+        scores = preflop_table()[:, 0]
+    scores = np.asarray(scores, dtype=np.float64)
+    if scores.shape == (169,):
+        return scores[_combo_classes()]
+    if scores.shape != (COMBO_COUNT,):
+        raise ValueError(f'scores must have shape (169,) or ({COMBO_COUNT},), got {scores.shape}')
+    return scores
+
+
+def _combo_classes():
+    """每个组合对应的起手牌下标（见 utils.preflop），(1326,)"""
+    combos = COMBOS.astype(np.intp)
+    hi, lo = combos[:, 0] >> 2, combos[:, 1] >> 2
+    suited = (combos[:, 0] & 3) == (combos[:, 1] & 3)
+    return np.where(suited, hi * 13 + lo, lo * 13 + hi)
+
+
+# 'AK'、'AKs'、'TT+'、'A5s-A2s'、'TT-77'
+_NOTATION = re.compile(r'([2-9TJQKA])([2-9TJQKA])([so]?)(?:(\+)|-([2-9TJQKA])([2-9TJQKA])([so]?))?')
+
+
+@lru_cache(maxsize=None)
+def parse_range(text):
+    """
+    范围记号编译为 Range，相同字符串只编译一次（返回的 Range 权重只读）
+    记号以逗号分隔，后面的覆盖前面的：
+        AA、AKs、AKo、AK（同花与非同花）、AhKd（具体组合）
+        TT+（TT-AA）、A5s+（A5s-AKs）、TT-77、A5s-A2s
+        AKo:0.5（权重，0到1，默认1）
+    """
+    result = Range()
+    for token in text.split(','):
+        token = token.strip()
+        if not token:
+            continue
+        notation, _, weight = token.partition(':')
+        try:
+            weight = float(weight) if weight else 1.0
+        except ValueError:
+            raise ValueError(f'invalid range weight: {token!r}') from None
+        # 权重在[0,1]内（NaN 比较为假，同样拒绝）
+        if not 0.0 <= weight <= 1.0:
+            raise ValueError(f'invalid range weight: {token!r}')
+        result.weights[_parse_notation(notation.strip())] = weight
+    result.weights.flags.writeable = False
+    return result
+
+
+def _parse_notation(notation):
+    """一个记号 -> 组合下标列表"""
+    if len(notation) == 4 and notation[:2] in CARD_IDS and notation[2:] in CARD_IDS:
+        return [combo_index(notation)]
+    # 点数大写，s/o 小写
+    match = _NOTATION.fullmatch(''.join(ch.upper() if ch.upper() in RANK_CHARS else ch.lower() for ch in notation))
+    if match is None:
+        raise ValueError(f'invalid range notation: {notation!r}')
+    hi, lo, kind, plus, end_hi, end_lo, end_kind = match.groups()
+    hi, lo = RANK_CHARS.index(hi), RANK_CHARS.index(lo)
+    if hi < lo:
+        hi, lo = lo, hi
+    if hi == lo and kind:
+        raise ValueError(f'invalid range notation: {notation!r}')
+
+    if end_hi is None:
+        if not plus:
+            return _hand_combos(hi, lo, kind)
+        # 对子一直到AA，其他牌高张不变、低张一直到比高张小1
+        if hi == lo:
+            return [c for r in range(hi, 13) for c in _hand_combos(r, r, kind)]
+        return [c for r in range(lo, hi) for c in _hand_combos(hi, r, kind)]
+
+    end_hi, end_lo = RANK_CHARS.index(end_hi), RANK_CHARS.index(end_lo)
+    if end_hi < end_lo:
+        end_hi, end_lo = end_lo, end_hi
+    if end_kind != kind:
+        raise ValueError(f'invalid range notation: {notation!r}')
+    if hi == lo and end_hi == end_lo:
+        return [c for r in range(min(hi, end_hi), max(hi, end_hi) + 1) for c in _hand_combos(r, r, kind)]
+    if hi == end_hi and hi != lo and end_hi != end_lo:
+        return [c for r in range(min(lo, end_lo), max(lo, end_lo) + 1) for c in _hand_combos(hi, r, kind)]
+    raise ValueError(f'invalid range notation: {notation!r}')
+
+
+def _hand_combos(hi, lo, kind=''):
+    """
+    一种起手牌的所有组合下标
+    :param kind: 's' 同花，'o' 非同花，'' 两者都要；对子忽略
+    """
+    combos = []
+    for s1 in range(4):
+        for s2 in range(4):
+            if hi == lo and s2 <= s1 or hi != lo and (kind == 's' and s1 != s2 or kind == 'o' and s1 == s2):
+                continue
+            combos.append(combo_index((hi * 4 + s1, lo * 4 + s2)))
+    return combos
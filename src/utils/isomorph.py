@@ -0,0 +1,147 @@
+"""
+花色同构与胜率缓存
+只差花色置换的局面（如 AhKh/Qh7h2c 与 AsKs/Qs7s2d）胜率相同。
+把每种花色在手牌、公共牌中的点数掩码作为签名，按签名排序后重新编号花色，得到规范形式；
+签名打包成的整数即规范下标，作为胜率缓存的键。
+公共牌按集合处理（胜率与发牌顺序无关）。对手范围不具有花色对称性时不能使用该键，
+situation_key 会自动改用具体的牌。
+"""
+import hashlib
+import os
+import pickle
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from itertools import permutations
+import numpy as np
+
+from utils.card import cards_to_ints
+from utils.combos import COMBOS, combo_index
+
+
+def _suit_signatures(hand, board):
+    """每种花色的 (手牌点数掩码, 公共牌点数掩码)"""
+    signatures = [[0, 0] for _ in range(4)]
+    for c in hand:
+        signatures[c & 3][0] |= 1 << (c >> 2)
+    for c in board:
+        signatures[c & 3][1] |= 1 << (c >> 2)
+    return [tuple(s) for s in signatures]
+
+
+def canonical_key(hand, board=None):
+    """
+    (手牌, 公共牌) 的规范下标，花色同构的局面得到相同的整数
+    :param hand: 手牌
+    :param board: 公共牌
+    """
+    key = 0
+    for hand_mask, board_mask in sorted(_suit_signatures(cards_to_ints(hand), cards_to_ints(board)), reverse=True):
+        key = (key << 26) | (hand_mask << 13) | board_mask
+    return key
+
+
+def canonicalize(hand, board=None):
+    """
+    花色重新编号后的规范手牌与公共牌（整数，各自从大到小排序）
+    """
+    hand, board = cards_to_ints(hand), cards_to_ints(board)
+    signatures = _suit_signatures(hand, board)
+    order = sorted(range(4), key=lambda s: signatures[s], reverse=True)
+    mapping = [0] * 4
+    for new_suit, old_suit in enumerate(order):
+        mapping[old_suit] = new_suit
+    return (sorted([(c & ~3) | mapping[c & 3] for c in hand], reverse=True),
+            sorted([(c & ~3) | mapping[c & 3] for c in board], reverse=True))
+
+
+@lru_cache(maxsize=None)
+def _combo_permutations():
+    """24种花色置换下每个组合变成的组合下标，(24, 1326)"""
+    return np.array([[combo_index(((hi & ~3) | perm[hi & 3], (lo & ~3) | perm[lo & 3])) for hi, lo in COMBOS.tolist()]
+                     for perm in permutations(range(4))])
+
+
+def range_id(weights):
+    """范围权重（(1326,) 数组或 Range）的摘要，作为缓存键的一部分"""
+    return hashlib.blake2b(np.asarray(weights, dtype=np.float32).tobytes(), digest_size=8).hexdigest()
+
+
+def suit_symmetric(weights):
+    """范围在任意花色置换下不变（如 'TT+, AKs' 这类不含具体组合的记号）"""
+    weights = np.asarray(weights, dtype=np.float32)
+    return bool((weights[_combo_permutations()] == weights).all())
+
+
+def situation_key(hand, board=None, opp_range=None):
+    """
+    胜率缓存的局面键
+    对手随机或范围花色对称时为规范下标（附加范围摘要），否则为排序后的具体牌加范围摘要
+    """
+    if opp_range is None:
+        return canonical_key(hand, board)
+    if suit_symmetric(opp_range):
+        return canonical_key(hand, board), range_id(opp_range)
+    return tuple(sorted(cards_to_ints(hand))), tuple(sorted(cards_to_ints(board))), range_id(opp_range)
+
+
+class EquityCache:
+    """
+    LRU胜率缓存，可选磁盘文件，跨会话复用
+    用法：
+        cache = EquityCache(maxsize=100000, path='equity_cache.pkl')
+        value = cache.get(key)
+        cache.put(key, value)
+        cache.save()
+    """
+
+    def __init__(self, maxsize=100000, path=None):
+        """
+        :param maxsize: 最多保留的条目数，超出时淘汰最久未使用的
+        :param path: 磁盘文件，存在时启动加载，save() 写回
+        """
+        self.maxsize = maxsize
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        # 后台胜率服务（utils.equity_service）与主线程共用
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            with open(path, 'rb') as f:
+                for key, value in pickle.load(f):
+                    self.put(key, value)
+
+    def get(self, key):
+        with self._lock:
+            value = self._data.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def save(self):
+        """写入磁盘文件（先写临时文件再替换，避免中途退出损坏）"""
+        if not self.path:
+            return
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            with self._lock:
+                items = list(self._data.items())
+            pickle.dump(items, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, self.path)
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
@@ -36,22 +36,32 @@ def ordered_hand(hand):
 
 class PokerOcr:
 
-    def __init__(self):
+    def __init__(self, equity_service=None):
+        """
+        :param equity_service: utils.equity_service.EquityService，设置后读出手牌、公共牌即开始后台计算胜率
+        """
         self.ocr = ddddocr.DdddOcr()
         self.image = None
         self.ocr_config = process_config()
+        self.equity_service = equity_service
 
     def fetch_state(self, image):
         self.image = image
         state = GameState()
         state.hand = self.__hand()
         state.board = self.__board()
+        if self.equity_service is not None:
+            # 先按上一次的对手数开始，读完其余区域的同时在后台模拟
+            self.equity_service.submit(state.hand, state.board)
         state.stage = 0 if len(state.board) == 0 else (len(state.board) - 2)
         state.position = self.__pos()
         state.pot = self.__ocr_amt(self.ocr_config['amount']['pool'])
         state.stack = self.__ocr_amt(self.ocr_config['amount']['balance'])
         state.call = self.__ocr_amt(self.ocr_config['amount']['call'])
         state.pls = self.__players(state.stage, state.position)
+        if self.equity_service is not None:
+            # 对手数与 GameFeature._strength 一致，变化时改算新的局面
+            self.equity_service.submit(state.hand, state.board, max(len(state.actives()), 1))
         return state
 
     def __ocr_txt(self, region):
@@ -261,7 +271,8 @@ class PokerOcr:
 
 
 if __name__ == '__main__':
-    ocr = PokerOcr()
+    from utils.equity_service import EquityService
+    ocr = PokerOcr(EquityService())
     # for i1 in range(1, 43):
         # img1 = Image.open('../image/20250209133629/{}.jpg'.format(i))
         # img1 = Image.open('../image/{}.jpg'.format(i1))
@@ -0,0 +1,161 @@
+"""
+翻牌前胜率表
+169种起手牌（对子13、同花78、非同花78）对1-5个随机对手，以及单挑对常见范围（前x%起手牌）的胜率，
+离线计算后保存为 data/preflop_equity.npy，运行时内存映射读取，查询只是一次数组下标。
+
+起手牌下标：点数下标 0-12 对应 2-A，高张 hi、低张 lo
+    对子 hi * 13 + hi，同花 hi * 13 + lo，非同花 lo * 13 + hi
+即 13x13 矩阵中对角线为对子，下三角为同花，上三角为非同花。
+
+重新生成：
+    cd src && python -m utils.preflop [trials]
+"""
+import os
+import sys
+from functools import lru_cache
+import numpy as np
+
+from utils.card import RANK_CHARS, cards_to_ints
+from utils.equity import multiway_shares
+from utils.evaluator import evaluate_shared
+from utils.sampler import DeckSampler
+
+TABLE_PATH = os.path.join(os.path.dirname(__file__), '..', 'data', 'preflop_equity.npy')
+
+# 表的列：前5列对1-5个随机对手，之后各列单挑对前x%起手牌范围
+OPPONENTS = (1, 2, 3, 4, 5)
+RANGE_TOPS = (0.05, 0.1, 0.2, 0.3, 0.5)
+
+
+def class_index(hand):
+    """两张手牌 -> 起手牌下标（0-168）"""
+    c1, c2 = cards_to_ints(hand)
+    hi, lo = max(c1 >> 2, c2 >> 2), min(c1 >> 2, c2 >> 2)
+    if (c1 & 3) == (c2 & 3):
+        return hi * 13 + lo
+    return lo * 13 + hi
+
+
+def class_name(index):
+    """起手牌下标 -> 'AA'、'AKs'、'AKo'"""
+    row, col = divmod(index, 13)
+    if row == col:
+        return RANK_CHARS[row] * 2
+    if row > col:
+        return RANK_CHARS[row] + RANK_CHARS[col] + 's'
+    return RANK_CHARS[col] + RANK_CHARS[row] + 'o'
+
+
+def class_combos(index):
+    """起手牌下标 -> 所有具体组合（整数对），对子6种、同花4种、非同花12种"""
+    row, col = divmod(index, 13)
+    hi, lo = max(row, col), min(row, col)
+    combos = []
+    for s1 in range(4):
+        for s2 in range(4):
+            if row == col and s2 <= s1:
+                continue
+            if row > col and s1 != s2 or row < col and s1 == s2:
+                continue
+            combos.append((hi * 4 + s1, lo * 4 + s2))
+    return combos
+
+
+@lru_cache(maxsize=None)
+def preflop_table():
+    """内存映射读取胜率表，(169, len(OPPONENTS) + len(RANGE_TOPS)) float32"""
+    return np.load(TABLE_PATH, mmap_mode='r')
+
+
+def preflop_equity(hand, opponents=1):
+    """
+    翻牌前胜率（平局按人数平分）
+    :param hand: 两张手牌，如 ['Ah', 'Kd']
+    :param opponents: 随机对手数，1-5，超出范围取边界值
+    """
+    opponents = min(max(opponents, OPPONENTS[0]), OPPONENTS[-1])
+    return float(preflop_table()[class_index(hand), opponents - 1])
+
+
+def preflop_equity_vs_range(hand, top):
+    """
+    单挑对前top比例起手牌（按单挑胜率排序）的胜率
+    :param top: RANGE_TOPS 中的值，如 0.2 表示前20%
+    """
+    return float(preflop_table()[class_index(hand), len(OPPONENTS) + RANGE_TOPS.index(top)])
+
+
+def top_classes(top, scores=None):
+    """
+    按分数从高到低、以组合数计的前top比例起手牌下标
+    :param scores: (169,) 分数，默认使用单挑胜率
+    """
+    scores = preflop_table()[:, 0] if scores is None else np.asarray(scores)
+    weights = np.array([len(class_combos(i)) for i in range(169)])
+    order = np.argsort(-scores, kind='stable')
+    covered = np.cumsum(weights[order]) / weights.sum()
+    return order[:np.searchsorted(covered, top) + 1].tolist()
+
+
+def _simulate(hand, opponents, trials, rng, opp_combos=None, batch=2000, stratify=True):
+    """
+    模拟胜率，平局按人数平分
+    :param opp_combos: 单挑时对手的范围（整数对数组），为空时对手随机
+    :param stratify: 对手随机时按公共牌分层抽样（见 multiway_shares）
+    """
+    hand = list(hand)
+    sampler = DeckSampler(hand, rng)
+    if opp_combos is None:
+        return multiway_shares(hand, [], opponents, trials, sampler=sampler, batch=batch, stratify=stratify) / trials
+    share = 0.0
+    for start in range(0, trials, batch):
+        size = min(batch, trials - start)
+        opp = opp_combos[sampler.rng.integers(len(opp_combos), size=size)]
+        drawn = sampler.batch(size, 7)
+        free = (drawn != opp[:, :1]) & (drawn != opp[:, 1:])
+        board = np.take_along_axis(drawn, np.argsort(~free, axis=1, kind='stable')[:, :5], axis=1)
+        holdings = np.stack([np.broadcast_to(np.array(hand, dtype=np.int8), (size, 2)), opp], axis=1)
+        ranks = evaluate_shared(board, holdings)
+        share += np.where(ranks[:, 0] > ranks[:, 1], 1.0, np.where(ranks[:, 0] == ranks[:, 1], 0.5, 0.0)).sum()
+    return share / trials
+
+
+def _table_cell(table, index, col, trials, seed):
+    """
+    表中一格的模拟值；范围列按 table 第一列（单挑胜率）排序取范围
+    不分层抽样，与提交的 preflop_equity.npy 生成时的随机数流相同，重新生成得到同样的表
+    """
+    hand = class_combos(index)[0]
+    rng = np.random.default_rng([seed, index, col])
+    if col < len(OPPONENTS):
+        return _simulate(hand, OPPONENTS[col], trials, rng, stratify=False)
+    top = RANGE_TOPS[col - len(OPPONENTS)]
+    combos = np.array([c for i in top_classes(top, table[:, 0]) for c in class_combos(i)], dtype=np.int8)
+    opp = combos[~np.isin(combos, hand).any(axis=1)]
+    return _simulate(hand, 1, trials, rng, opp)
+
+
+def build_table(trials=20000, seed=0, path=TABLE_PATH):
+    """
+    离线计算胜率表并保存
+    :param trials: 每个起手牌每列的模拟次数
+    """
+    table = np.zeros((169, len(OPPONENTS) + len(RANGE_TOPS)), dtype=np.float32)
+    for index in range(169):
+        for col in range(len(OPPONENTS)):
+            table[index, col] = _table_cell(table, index, col, trials, seed)
+        print(f'{class_name(index):>4} vs 1-5: {np.round(table[index, :len(OPPONENTS)], 3)}')
+
+    # 范围按单挑胜率排序后取前x%
+    for offset, top in enumerate(RANGE_TOPS):
+        for index in range(169):
+            table[index, len(OPPONENTS) + offset] = _table_cell(table, index, len(OPPONENTS) + offset, trials, seed)
+        print(f'vs top {top:.0%}: done')
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    np.save(path, table)
+    preflop_table.cache_clear()
+    return table
+
+if __name__ == '__main__':
+    build_table(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
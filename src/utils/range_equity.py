@@ -0,0 +1,286 @@
+"""
+范围对范围胜率
+自己与对手的范围都是 (1326,) 权重向量（下标见 utils.combos），按发牌批量评估：
+每组公共牌只评估一次所有有权重的组合，再一次性比较得到 自己组合 x 对手组合 的胜负，
+与公共牌、彼此冲突的组合用牌位掩码整批排除。平局计为0.5。
+
+转牌、河牌穷举所有发牌，结果精确；翻牌、翻牌前发牌数超过 max_runouts 时随机抽取发牌。
+耗时约与 发牌数 x 自己组合数 x 对手组合数 成正比：完整范围对完整范围转牌约0.2-1秒、翻牌1000组发牌数秒，
+适合离线计算；对局中使用时传 timeout，到时只用已处理的（随机顺序的）发牌，相当于抽样估计。
+河牌的范围胜率不需要两两比较：river_ranks 一次算出所有组合的牌力，river_equity 排序后累加，O(n log n)。
+hand_potential 在同一批发牌上同时得到胜率、E[HS²]、正/负潜力与胜率分布直方图。
+
+用法：
+    matrix = equity_matrix(hero_weights, villain_weights, ['Qh', '7h', '2c', '9d'])   # (1326, 1326)
+    result = range_equity(hero_weights, villain_weights, board)
+    result = range_equity(hero_weights, villain_weights, board, timeout=0.05)   # 对局中：最多约50ms
+    result.equity, result.hands   # 整体胜率、自己每个组合对对手范围的胜率
+    river_equity(board, villain_weights)   # 河牌：每个组合对对手范围的胜率 (1326,)
+    hand_potential(['Ah', 'Kh'], ['Qh', '7h', '2c'])   # 翻牌、转牌的听牌潜力
+"""
+import time
+from functools import lru_cache
+from itertools import combinations
+from math import comb
+from typing import NamedTuple
+import numpy as np
+
+from utils.card import cards_to_ints
+from utils.combos import COMBO_COUNT, COMBOS, COMBO_MASKS, blocked, combo_index
+from utils.evaluator import evaluate, evaluate_shared
+
+
+class RangeEquity(NamedTuple):
+    """范围胜率：整体胜率（按双方权重加权），自己每个组合对对手范围的胜率 (1326,)"""
+    equity: float
+    hands: np.ndarray
+
+
+class HandPotential(NamedTuple):
+    """
+    手牌潜力（Billings 等的定义，平局计一半）
+    equity: 发完公共牌后对对手范围的胜率
+    ehs2: 各种发牌下胜率平方的均值 E[HS²]，同样的胜率下越依赖听牌越大
+    ppot: 现在落后（或平）、发完牌后领先的概率
+    npot: 现在领先（或平）、发完牌后落后的概率
+    histogram: 各种发牌下胜率的分布，等宽分箱，和为1
+    """
+    equity: float
+    ehs2: float
+    ppot: float
+    npot: float
+    histogram: np.ndarray
+
+
+# 每块处理的发牌数，timeout 在块之间检查
+RUNOUT_CHUNK = 4
+
+
+def _runouts(board, max_runouts, rng, dead=()):
+    """补齐公共牌的所有发牌（不含dead中的牌），数量超过max_runouts时随机抽取，(R, 5) int8"""
+    need = 5 - len(board)
+    live = np.flatnonzero(~np.isin(np.arange(52), list(board) + list(dead))).astype(np.int8)
+    if comb(len(live), need) <= max_runouts:
+        runouts = list(combinations(live.tolist(), need))
+        runouts = np.array(runouts, dtype=np.int8).reshape(len(runouts), need)
+    else:
+        rng = rng if isinstance(rng, np.random.Generator) else np.random.default_rng(rng)
+        runouts = np.argsort(rng.random((max_runouts, len(live))), axis=1)[:, :need]
+        runouts = live[runouts]
+    return np.concatenate([np.broadcast_to(np.array(board, dtype=np.int8), (len(runouts), len(board))), runouts],
+                          axis=1)
+
+
+def _active_mask(weights, board):
+    """有权重且不与公共牌冲突的组合"""
+    weights = np.asarray(weights, dtype=np.float32)
+    if weights.shape != (COMBO_COUNT,):
+        raise ValueError(f'weights must have shape ({COMBO_COUNT},), got {weights.shape}')
+    return (weights > 0) & ~blocked(board)
+
+
+def _active(weights, board):
+    """有权重且不与公共牌冲突的组合下标"""
+    return np.flatnonzero(_active_mask(weights, board))
+
+
+def _matrix(hero_idx, villain_idx, board, max_runouts, rng, timeout=None):
+    """有效组合之间的胜率矩阵 (nh, nv) 与两两不冲突的掩码"""
+    rng = rng if isinstance(rng, np.random.Generator) else np.random.default_rng(rng)
+    boards = _runouts(board, max_runouts, rng)
+    if timeout is not None:
+        # 打乱发牌顺序，到时停止时已处理的部分是所有发牌的均匀抽样
+        boards = boards[rng.permutation(len(boards))]
+        deadline = time.monotonic() + timeout
+    hero_cards, villain_cards = COMBOS[hero_idx], COMBOS[villain_idx]
+    hero_masks, villain_masks = COMBO_MASKS[hero_idx], COMBO_MASKS[villain_idx]
+
+    # 胜计2分、平计1分，最后除以2；counts 为双方都不与公共牌冲突的发牌数
+    points = np.zeros((len(hero_idx), len(villain_idx)), dtype=np.int32)
+    counts = np.zeros((len(hero_idx), len(villain_idx)), dtype=np.int64)
+    for start in range(0, len(boards), RUNOUT_CHUNK):
+        chunk = boards[start:start + RUNOUT_CHUNK]
+        board_masks = np.bitwise_or.reduce(np.uint64(1) << chunk.astype(np.uint64), axis=1)
+        # 每组公共牌只评估一次所有组合；与发出的公共牌冲突的组合，自己记为-1、对手记为最大值，比较时既不算赢也不算平
+        hero_conflict = (hero_masks & board_masks[:, None]) != 0
+        villain_conflict = (villain_masks & board_masks[:, None]) != 0
+        hero = evaluate_shared(chunk, np.broadcast_to(hero_cards, (len(chunk),) + hero_cards.shape))
+        villain = evaluate_shared(chunk, np.broadcast_to(villain_cards, (len(chunk),) + villain_cards.shape))
+        hero[hero_conflict] = -1
+        villain[villain_conflict] = np.iinfo(np.int32).max
+        for hero_ranks, villain_ranks in zip(hero, villain):
+            points += hero_ranks[:, None] > villain_ranks
+            points += hero_ranks[:, None] >= villain_ranks
+        # 不冲突的发牌数 = 总数 - 自己冲突数 - 对手冲突数 + 同时冲突数
+        counts += (len(chunk) - hero_conflict.sum(axis=0)[:, None] - villain_conflict.sum(axis=0)[None, :]
+                   + (hero_conflict.T.astype(np.float32) @ villain_conflict.astype(np.float32)).astype(np.int64))
+        if timeout is not None and time.monotonic() >= deadline:
+            break
+
+    compatible = ((hero_masks[:, None] & villain_masks[None, :]) == 0) & (counts > 0)
+    equity = np.divide(points, 2 * counts, out=np.zeros(points.shape), where=compatible)
+    return equity.astype(np.float32), compatible
+
+
+def equity_matrix(hero, villain, board=None, max_runouts=1000, rng=None, timeout=None):
+    """
+    自己每个组合对对手每个组合的胜率
+    :param hero: (1326,) 自己的范围权重
+    :param villain: (1326,) 对手的范围权重
+    :param board: 公共牌
+    :param max_runouts: 穷举的发牌数上限，超过时随机抽取这么多组发牌
+    :param rng: np.random.Generator 或种子
+    :param timeout: 时限（秒），到时只用已处理的发牌（随机顺序，相当于抽样）；为空时处理全部发牌
+    :return: (1326, 1326) float32，无权重或冲突的位置为0
+    """
+    board = cards_to_ints(board)
+    hero_idx, villain_idx = _active(hero, board), _active(villain, board)
+    equity, _ = _matrix(hero_idx, villain_idx, board, max_runouts, rng, timeout)
+    matrix = np.zeros((COMBO_COUNT, COMBO_COUNT), dtype=np.float32)
+    matrix[np.ix_(hero_idx, villain_idx)] = equity
+    return matrix
+
+
+def range_equity(hero, villain, board=None, max_runouts=1000, rng=None, timeout=None):
+    """
+    按权重汇总的范围胜率，参数同 equity_matrix；河牌使用 river_equity，不计算矩阵
+    :return: RangeEquity，hands 中无权重或与公共牌冲突的组合为0
+    """
+    board = cards_to_ints(board)
+    if len(board) == 5:
+        hero_weights = np.where(_active_mask(hero, board), np.asarray(hero, dtype=np.float64), 0.0)
+        wins, totals = _river_sweep(board, villain)
+        hands = np.divide(wins, totals, out=np.zeros(COMBO_COUNT), where=(totals > 0) & (hero_weights > 0))
+        total = (hero_weights * totals).sum()
+        return RangeEquity(float((hero_weights * wins).sum() / total) if total else 0.0, hands.astype(np.float32))
+    hero_idx, villain_idx = _active(hero, board), _active(villain, board)
+    equity, compatible = _matrix(hero_idx, villain_idx, board, max_runouts, rng, timeout)
+
+    # 对手每个组合的权重只计入与自己组合不冲突的部分
+    villain_weights = np.where(compatible, np.asarray(villain, dtype=np.float64)[villain_idx], 0.0)
+    villain_totals = villain_weights.sum(axis=1)
+    wins = (equity * villain_weights).sum(axis=1)
+    hands = np.zeros(COMBO_COUNT, dtype=np.float32)
+    hands[hero_idx] = np.divide(wins, villain_totals, out=np.zeros_like(wins), where=villain_totals > 0)
+
+    hero_weights = np.asarray(hero, dtype=np.float64)[hero_idx]
+    total = (hero_weights * villain_totals).sum()
+    return RangeEquity(float((hero_weights * wins).sum() / total) if total else 0.0, hands)
+
+
+@lru_cache(maxsize=256)
+def _river_ranks(board):
+    ranks = evaluate_shared(np.array([board], dtype=np.int8), COMBOS[None])[0]
+    ranks[blocked(list(board))] = -1
+    ranks.flags.writeable = False
+    return ranks
+
+
+def river_ranks(board):
+    """
+    河牌（5张公共牌）上每个组合的牌力，一次批量评估，结果按公共牌缓存
+    :return: (1326,) int32，与公共牌冲突的组合为-1
+    """
+    board = cards_to_ints(board)
+    if len(board) != 5:
+        raise ValueError(f'river board must have 5 cards, got {len(board)}')
+    return _river_ranks(tuple(sorted(board)))
+
+
+# 每张牌所在的51个组合的下标，(52, 51)
+_CARD_COMBOS = np.array([[combo_index((c, other)) for other in range(52) if other != c] for c in range(52)])
+
+
+def _river_sweep(board, villain):
+    """
+    每个组合对对手范围的 (胜分, 不冲突的对手权重)，胜分 = 更弱组合权重 + 牌力相同组合权重 / 2
+    按牌力排序后前缀和查找，与自己冲突的对手组合（含同一张牌）按牌用同样的方法减去：
+    不冲突 = 全部 - 含c1 - 含c2 + 自己（自己同时含c1、c2，被减了两次）
+    """
+    ranks = river_ranks(board).astype(np.int64)
+    weights = np.where(ranks >= 0, np.asarray(villain, dtype=np.float64), 0.0)
+    if weights.shape != (COMBO_COUNT,):
+        raise ValueError(f'weights must have shape ({COMBO_COUNT},), got {weights.shape}')
+
+    # 全部组合：牌力严格更小、小于等于的权重和
+    order = np.argsort(ranks, kind='stable')
+    sorted_ranks = ranks[order]
+    prefix = np.concatenate([[0.0], np.cumsum(weights[order])])
+    less = prefix[np.searchsorted(sorted_ranks, ranks, 'left')]
+    less_equal = prefix[np.searchsorted(sorted_ranks, ranks, 'right')]
+    total = np.full(COMBO_COUNT, prefix[-1])
+
+    # 含某张牌的组合：每行按牌力排序后加上行偏移拼成一个整体有序的数组，一次 searchsorted
+    offset = 1 << 25
+    card_ranks = ranks[_CARD_COMBOS] + 1
+    card_order = np.argsort(card_ranks, axis=1, kind='stable')
+    card_keys = (np.take_along_axis(card_ranks, card_order, axis=1) + np.arange(52)[:, None] * offset).ravel()
+    card_weights = np.take_along_axis(weights[_CARD_COMBOS], card_order, axis=1)
+    card_prefix = np.concatenate([[0.0], np.cumsum(card_weights.ravel())])
+    row_start = card_prefix[np.arange(52) * 51]
+    for card in (COMBOS[:, 0].astype(np.intp), COMBOS[:, 1].astype(np.intp)):
+        keys = card * offset + ranks + 1
+        less -= card_prefix[np.searchsorted(card_keys, keys, 'left')] - row_start[card]
+        less_equal -= card_prefix[np.searchsorted(card_keys, keys, 'right')] - row_start[card]
+        total -= card_prefix[card * 51 + 51] - row_start[card]
+    less_equal += weights
+    total += weights
+
+    wins = less + (less_equal - less) / 2
+    return np.where(ranks >= 0, wins, 0.0), np.where(ranks >= 0, total, 0.0)
+
+
+def river_equity(board, villain):
+    """
+    河牌上每个组合对对手加权范围的胜率（平局0.5，已排除与自己冲突的对手组合），O(n log n)
+    :param board: 5张公共牌
+    :param villain: (1326,) 对手范围权重或 Range
+    :return: (1326,) float32，与公共牌冲突或对手范围为空的组合为0
+    """
+    wins, totals = _river_sweep(cards_to_ints(board), villain)
+    return np.divide(wins, totals, out=np.zeros(COMBO_COUNT), where=totals > 0).astype(np.float32)
+
+
+def hand_potential(hand, board, villain=None, max_runouts=1081, bins=10, rng=None):
+    """
+    手牌潜力，所有输出来自同一批发牌：每组发牌只评估一次自己与对手范围的所有组合
+    :param hand: 手牌
+    :param board: 公共牌，3-5张（河牌没有后续发牌，潜力为0）
+    :param villain: (1326,) 对手范围权重或 Range，默认所有组合
+    :param max_runouts: 穷举的发牌数上限，超过时随机抽取；默认翻牌（1081种）、转牌都穷举
+    :param bins: 直方图分箱数
+    :param rng: np.random.Generator 或种子
+    :return: HandPotential
+    """
+    hand, board = cards_to_ints(hand), cards_to_ints(board)
+    if not 3 <= len(board) <= 5:
+        raise ValueError(f'board must have 3-5 cards, got {len(board)}')
+    villain = np.ones(COMBO_COUNT) if villain is None else np.asarray(villain, dtype=np.float64)
+    active = _active(villain, hand + board)
+    opp_cards, opp_masks, weights = COMBOS[active], COMBO_MASKS[active], villain[active]
+
+    # 现在的胜负：0落后 1平 2领先
+    hero_now = evaluate(np.array([hand + board], dtype=np.int8))[0]
+    opp_now = evaluate_shared(np.array([board], dtype=np.int8), opp_cards[None])[0]
+    now = np.sign(hero_now - opp_now).astype(np.intp) + 1
+
+    boards = _runouts(board, max_runouts, rng, hand)
+    board_masks = np.bitwise_or.reduce(np.uint64(1) << boards.astype(np.uint64), axis=1)
+    hero_final = evaluate(np.concatenate([np.broadcast_to(np.array(hand, dtype=np.int8), (len(boards), 2)), boards],
+                                         axis=1))
+    opp_final = evaluate_shared(boards, np.broadcast_to(opp_cards, (len(boards),) + opp_cards.shape))
+    final = np.sign(hero_final[:, None] - opp_final).astype(np.intp) + 1
+    # 与发出的公共牌冲突的对手组合不参与该次比较
+    valid = np.where((opp_masks & board_masks[:, None]) == 0, weights, 0.0)
+
+    totals = valid.sum(axis=1)
+    hs = np.divide((final * valid).sum(axis=1) / 2, totals, out=np.zeros(len(boards)), where=totals > 0)
+    # 转移表 hp[现在][最终]，按对手权重累计
+    hp = np.bincount((now * 3 + final).ravel(), weights=valid.ravel(), minlength=9).reshape(3, 3)
+    behind, tied, ahead = hp.sum(axis=1)
+    ppot = (hp[0, 2] + hp[0, 1] / 2 + hp[1, 2] / 2) / (behind + tied / 2) if behind + tied else 0.0
+    npot = (hp[2, 0] + hp[2, 1] / 2 + hp[1, 0] / 2) / (ahead + tied / 2) if ahead + tied else 0.0
+
+    histogram = np.histogram(hs, bins=bins, range=(0.0, 1.0))[0] / len(hs)
+    return HandPotential(float(hs.mean()), float((hs * hs).mean()), float(ppot), float(npot),
+                         histogram.astype(np.float32))
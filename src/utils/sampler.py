@@ -0,0 +1,62 @@
+"""
+胜率模拟用的发牌器
+剩余牌在创建时确定（已知牌直接排除），之后每批模拟复用同一块缓冲区，
+按列做部分 Fisher–Yates 洗牌，一次得到 (trials, k) 的抽牌结果。
+
+分层抽样（stratify=True）：第一列不随机抽取，而是让每张剩余牌出现相同的次数（余数部分随机不重复地补齐），
+其余列照常随机抽取。每组结果的分布与独立抽样相同，估计无偏，但去掉了第一张牌（如转牌）带来的方差。
+"""
+import numpy as np
+
+from utils.card import card_mask
+
+
+class DeckSampler:
+    """
+    用法：
+        sampler = DeckSampler(dead=hand + board, rng=np.random.default_rng(0))
+        draws = sampler.batch(1000, 4)   # (1000, 4)，每行4张不重复的剩余牌
+        draws = sampler.batch(1000, 4, stratify=True)   # 第一列每张剩余牌出现次数相同
+    """
+
+    def __init__(self, dead=None, rng=None):
+        """
+        :param dead: 已知牌（手牌、公共牌），不会被抽到
+        :param rng: np.random.Generator 或种子
+        """
+        mask = card_mask(dead or [])
+        self.live = np.array([c for c in range(52) if not mask >> c & 1], dtype=np.int8)
+        self.rng = rng if isinstance(rng, np.random.Generator) else np.random.default_rng(rng)
+        self._perm = np.empty((0, len(self.live)), dtype=np.int8)
+        self._rows = np.empty(0, dtype=np.intp)
+
+    def strata(self, trials, n):
+        """
+        分层下标：0..n-1 各出现 trials // n 次，余下 trials % n 个随机不重复，(trials,) 已打乱
+        """
+        index = np.concatenate([np.tile(np.arange(n), trials // n), self.rng.choice(n, trials % n, replace=False)])
+        self.rng.shuffle(index)
+        return index
+
+    def batch(self, trials, k, stratify=False):
+        """
+        不放回抽取k张牌，共trials组
+        :param stratify: 第一列按剩余牌分层
+        :return: (trials, k) int8，内部缓冲区的视图，下一次调用会被覆盖，需要保留时请copy
+        """
+        n = len(self.live)
+        if k > n:
+            raise ValueError(f'cannot draw {k} cards from {n} live cards')
+        if len(self._perm) < trials:
+            self._perm = np.empty((trials, n), dtype=np.int8)
+            self._rows = np.arange(trials)
+        perm = self._perm[:trials]
+        rows = self._rows[:trials]
+        perm[:] = self.live
+        # 部分 Fisher–Yates：第i列与 [i, n) 中随机一列交换，只需要做k次
+        for i in range(k):
+            j = self.strata(trials, n) if stratify and i == 0 else self.rng.integers(i, n, size=trials)
+            picked = perm[rows, j]
+            perm[rows, j] = perm[:, i]
+            perm[:, i] = picked
+        return perm[:, :k]
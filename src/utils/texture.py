@@ -0,0 +1,225 @@
+"""
+公共牌牌面结构表
+牌面结构（顺子、同花、对子、高张得分及湿润度档位）只与点数和花色分布有关，花色置换后不变。
+翻牌 22100 种、转牌 270725 种、河牌 2598960 种公共牌，花色同构后只有 1755 / 16432 / 134459 类；
+离线对每类计算一次，保存为 data/board_texture.npy，运行时内存映射读取，查询只是一次二分查找。
+
+规范下标：每种花色的13位点数掩码从大到小排序后拼接（52位），花色同构的公共牌得到相同的整数。
+表按下标排序，每行 (key, straight, flush, pair, high, wetness)，四项得分以 0.1 为单位存为整数。
+
+重新生成：
+    cd src && python -m utils.texture
+"""
+import os
+from functools import lru_cache
+from itertools import combinations
+from math import comb
+import numpy as np
+
+from utils.card import cards_to_ints
+
+TABLE_PATH = os.path.join(os.path.dirname(__file__), '..', 'data', 'board_texture.npy')
+
+SCORES = ('straight', 'flush', 'pair', 'high')
+FIELDS = SCORES + ('wetness',)
+TABLE_DTYPE = np.dtype([('key', '<u8')] + [(name, 'i1') for name in FIELDS])
+
+
+def score_board(board):
+    """
+    直接计算牌面得分（建表与3-5张以外的牌面使用），0-2的连续值，保留1位小数
+    :param board: 公共牌（整数编码）
+    :return: {'straight', 'flush', 'pair', 'high'}
+    """
+    cards = sorted([(c >> 2) + 2 for c in board], reverse=True)
+    suits = [c & 3 for c in board]
+    result = {'straight': 0.0, 'flush': 0.0, 'pair': 0.0, 'high': 0.0}
+
+    # ------------------ 顺子计算 ------------------
+    unique_ranks = sorted(list(set(cards + [1 if r == 14 else r for r in cards])))  # 包含A作为1的情况
+    straight_scores = []
+
+    # 遍历所有可能的顺子组合
+    for high in range(14, 4, -1):  # 从最大的A-high顺子开始检查
+        target = set(range(high - 4, high + 1)) if high > 5 else {1, 2, 3, 4, 5}
+        present = [r for r in unique_ranks if r in target]
+        gap = 5 - len(present)
+
+        if gap <= 2 or len(board) == 3 and gap == 3:  # 允许最多缺2张牌，翻牌允许缺3张
+            # 计算顺子强度：基础分 + 最大牌加成
+            dif = max(present) - min(present)
+            strength = (5 - gap) / 5 * 1.5 + (high / 14) * 0.5 - dif * 0.2
+            straight_scores.append(min(strength, 2.0))
+
+    result['straight'] = max(straight_scores) if straight_scores else 0.0
+
+    # ------------------ 同花计算 ------------------
+    suit_counts = {}
+    max_suit = None
+    for s in suits:
+        suit_counts[s] = suit_counts.get(s, 0) + 1
+        if suit_counts[s] > suit_counts.get(max_suit, 0):
+            max_suit = s
+
+    if max_suit is not None and suit_counts[max_suit] >= 3:
+        # 同花牌中的最大数值（按每张牌自己的花色取点数，与传入顺序无关）
+        flush_cards = sorted([(c >> 2) + 2 for c in board if c & 3 == max_suit], reverse=True)
+        # 计算同花强度：数量分（60%） + 最大牌分（40%）
+        count_score = (suit_counts[max_suit] / 5) * 1.2  # 3张=0.72, 4张=0.96, 5张=1.2
+        high_score = (flush_cards[0] / 14) * 0.8  # 最大牌占比
+        result['flush'] = min(count_score + high_score, 2.0)
+    elif max_suit is not None and len(board) == 3 and suit_counts[max_suit] == 2:
+        flush_cards = sorted([(c >> 2) + 2 for c in board if c & 3 == max_suit], reverse=True)
+        count_score = (suit_counts[max_suit] / 5) * 0.6
+        high_score = (flush_cards[0] / 14) * 0.4
+        result['flush'] = min(count_score + high_score, 2.0)
+
+    # ------------------ 对子计算 ------------------
+    rank_counts = {}
+    for r in cards:
+        rank_counts[r] = rank_counts.get(r, 0) + 1
+
+    # 计算对子强度（考虑对子大小和数量）
+    pairs = sorted([r for r, cnt in rank_counts.items() if cnt >= 2], reverse=True)
+    set_score = 0.0
+    if len(pairs) >= 2:  # 两对
+        set_score = (pairs[0] + pairs[1]) / 28 * 1.9  # AA+KK=27/28*1.5≈1.45
+    elif len(pairs) == 1:  # 一对
+        set_score = pairs[0] / 14 * 0.9  # AA=14/14*1=1.0
+
+    # 三条/葫芦额外加分
+    trips = [r for r, cnt in rank_counts.items() if cnt >= 3]
+    if trips:
+        set_score += (sum(trips) / 14) * 0.5  # 三条加成
+
+    result['pair'] = min(set_score, 2.0)
+
+    # ------------------ 高张计算 ------------------
+    high_cards = [r for r in cards if r >= 11]  # J以上算高牌
+    unique_high = sorted(list(set(high_cards)), reverse=True)
+
+    # 强度计算规则：
+    # - 每张高牌基础分：A=0.5, K=0.4, Q=0.3, J=0.2
+    # - 组合加成：同时有AK加0.5，AQ加0.3等
+    base_scores = {14: 0.5, 13: 0.4, 12: 0.3, 11: 0.2}
+    score = sum(base_scores.get(r, 0) for r in unique_high)
+
+    # 组合加成
+    if 14 in unique_high and 13 in unique_high: score += 0.5  # AK
+    if 14 in unique_high and 12 in unique_high: score += 0.3  # AQ
+    if 13 in unique_high and 12 in unique_high: score += 0.2  # KQ
+
+    result['high'] = min(score * 1.5, 2.0)  # 最高得分2.0
+
+    # 四舍五入保留1位小数
+    return {k: round(v, 1) for k, v in result.items()}
+
+
+def wetness_level(scores):
+    """
+    湿润程度 0 干燥  1 湿润  2 非常湿润
+    :param scores: score_board 的结果
+    """
+    if scores['high'] > 1.3 or scores['pair'] > 0.7 or scores['flush'] > 1 or scores['straight'] > 1:
+        # 三同花、三连牌、大公对、两高张、三张
+        return 2
+    if scores['high'] > 0.5 or scores['pair'] > 0 or scores['flush'] > 0.5 or scores['straight'] > 0.5:
+        # 两同花、两连牌、小公对、高张、
+        return 1
+    return 0
+
+
+def board_key(board):
+    """公共牌（整数编码）的规范下标，花色同构的公共牌得到相同的整数"""
+    masks = [0, 0, 0, 0]
+    for c in board:
+        masks[c & 3] |= 1 << (c >> 2)
+    masks.sort(reverse=True)
+    return (masks[0] << 39) | (masks[1] << 26) | (masks[2] << 13) | masks[3]
+
+
+def board_keys(boards):
+    """(N, k) 公共牌数组的规范下标，(N,) uint64"""
+    boards = np.asarray(boards).astype(np.int64, copy=False)
+    bits = np.int64(1) << (boards >> 2)
+    masks = np.stack([np.where((boards & 3) == s, bits, 0).sum(axis=1) for s in range(4)], axis=1)
+    masks = -np.sort(-masks, axis=1)
+    return ((masks[:, 0] << 39) | (masks[:, 1] << 26) | (masks[:, 2] << 13) | masks[:, 3]).astype(np.uint64)
+
+
+@lru_cache(maxsize=None)
+def texture_table():
+    """内存映射读取牌面结构表，返回 (按顺序排列的规范下标, 结构化数组)"""
+    table = np.load(TABLE_PATH, mmap_mode='r')
+    # 下标单独复制一份连续数组，二分查找不必每次跨步读取；按行读取用普通数组视图（仍映射文件，省去 memmap 子类的开销）
+    return np.ascontiguousarray(table['key']), np.asarray(table)
+
+
+def _lookup(keys):
+    sorted_keys, table = texture_table()
+    index = np.minimum(np.searchsorted(sorted_keys, keys), len(sorted_keys) - 1)
+    if np.any(sorted_keys[index] != keys):
+        raise ValueError('board not found in texture table (duplicate cards?)')
+    return table[index]
+
+
+def board_texture(board):
+    """
+    牌面结构
+    :param board: 公共牌列表，如 ['Ah', 'Kd', 'Qc']，或对应的整数编码
+    :return: {'straight', 'flush', 'pair', 'high'}（0-2，保留1位小数）与 'wetness'（0-2档位）；
+    3-5张时查表，其他张数直接计算
+    """
+    board = cards_to_ints(board)
+    if not 3 <= len(board) <= 5:
+        result = score_board(board)
+        result['wetness'] = wetness_level(result)
+        return result
+    sorted_keys, table = texture_table()
+    key = np.uint64(board_key(board))
+    index = sorted_keys.searchsorted(key)
+    if index == len(sorted_keys) or sorted_keys[index] != key:
+        raise ValueError('board not found in texture table (duplicate cards?)')
+    _, straight, flush, pair, high, wetness = table[index].item()
+    return {'straight': straight / 10, 'flush': flush / 10, 'pair': pair / 10, 'high': high / 10,
+            'wetness': wetness}
+
+
+def board_textures(boards):
+    """
+    批量查表
+    :param boards: (N, 3-5) 公共牌整数数组
+    :return: (N, 5) float32，列依次为 FIELDS
+    """
+    rows = _lookup(board_keys(boards))
+    values = np.stack([rows[name] for name in FIELDS], axis=1).astype(np.float32)
+    values[:, :len(SCORES)] /= 10
+    return values
+
+
+def build_table(path=TABLE_PATH):
+    """离线枚举3-5张的全部公共牌，按规范下标去重后逐类计算并保存"""
+    parts = []
+    for size in (3, 4, 5):
+        boards = np.fromiter(combinations(range(52), size), dtype=np.dtype((np.int8, size)), count=comb(52, size))
+        keys, first = np.unique(board_keys(boards), return_index=True)
+        part = np.zeros(len(keys), dtype=TABLE_DTYPE)
+        part['key'] = keys
+        for row, board in zip(part, boards[first].tolist()):
+            scores = score_board(board)
+            for name in SCORES:
+                row[name] = round(scores[name] * 10)
+            row['wetness'] = wetness_level(scores)
+        print(f'{size} cards: {len(boards)} boards, {len(keys)} classes')
+        parts.append(part)
+
+    table = np.concatenate(parts)
+    table = table[np.argsort(table['key'], kind='stable')]
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    np.save(path, table)
+    texture_table.cache_clear()
+    return table
+
+
+if __name__ == '__main__':
+    build_table()
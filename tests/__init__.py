@@ -2,3 +2,32 @@
 Pobot项目测试包
 """
 
+import sys
+from types import ModuleType
+
+
+def stub_database():
+    """
+    models.* 导入时需要数据库配置（config.db）与 peewee，缺少时放入占位模块：
+    模型基类为普通类，字段声明不做任何事；只为导入，不连接数据库
+    """
+    try:
+        import config.db  # noqa: F401
+        return
+    except ImportError:
+        pass
+
+    class Field:
+        def __init__(self, *args, **kwargs):
+            pass
+
+    try:
+        import peewee  # noqa: F401
+    except ImportError:
+        peewee = sys.modules['peewee'] = ModuleType('peewee')
+        peewee.__getattr__ = lambda name: Field
+    config = sys.modules['config'] = ModuleType('config')
+    config.db = sys.modules['config.db'] = ModuleType('config.db')
+    config.db.BaseModel = type('BaseModel', (), {})
+    config.db.JSONArrayField = Field
+    config.db.db = None
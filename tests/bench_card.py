@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+牌力评估速度对比：21个组合逐个evaluate_hand vs 查表hand_rank vs 批量evaluate
+运行: python tests/bench_card.py [hands]
+"""
+
+import os
+import random
+import sys
+import time
+from itertools import combinations
+
+# 添加src目录到Python路径
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from utils.card import evaluate_hand, hand_rank, lookup_tables, cards_to_ints
+from utils.evaluator import evaluate
+import numpy as np
+
+RANKS = ['2', '3', '4', '5', '6', '7', '8', '9', '10', 'J', 'Q', 'K', 'A']
+SUITS = ['h', 'd', 'c', 's']
+DECK = [r + s for s in SUITS for r in RANKS]
+
+
+def combinations_best(cards):
+    """原get_best_hand的做法"""
+    best = (0, [])
+    for combo in combinations(cards, 5):
+        score = evaluate_hand(combo)
+        if score > best:
+            best = score
+    return best
+
+
+def hands_per_sec(func, hands):
+    start = time.perf_counter()
+    for cards in hands:
+        func(cards)
+    return len(hands) / (time.perf_counter() - start)
+
+
+def main(count=20000):
+    rng = random.Random(0)
+    hands = [rng.sample(DECK, 7) for _ in range(count)]
+    start = time.perf_counter()
+    lookup_tables()
+    print(f'table build: {time.perf_counter() - start:.2f}s')
+    before = hands_per_sec(combinations_best, hands)
+    after = hands_per_sec(hand_rank, hands)
+    array = np.array([cards_to_ints(h) for h in hands], dtype=np.int8)
+    evaluate(array[:10])
+    start = time.perf_counter()
+    evaluate(array)
+    bulk = len(array) / (time.perf_counter() - start)
+    print(f'combinations + evaluate_hand: {before:,.0f} hands/sec')
+    print(f'hand_rank (lookup table):     {after:,.0f} hands/sec')
+    print(f'evaluator.evaluate (NumPy):   {bulk:,.0f} hands/sec')
+    print(f'speedup: {after / before:.1f}x (scalar), {bulk / before:.1f}x (bulk)')
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+胜率模拟方差对比：独立抽样 vs 分层抽样，分别模拟两手牌求差 vs 公共随机数配对
+同样的模拟次数下重复多次，比较估计值的方差；方差比即达到同样精度所需模拟次数的倍数
+另外对比穷举与5000次模拟的耗时，检查 exact_cost/sample_cost 的选择是否选中了更快的一方
+运行: python tests/bench_equity.py [repeats]
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+
+# 添加src目录到Python路径
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from utils.card import cards_to_ints
+from utils.equity import sample_wins, equity_difference, filter_hands, exact_strength, exact_cost, sample_cost
+from utils.hand_range import parse_range
+from utils.sampler import DeckSampler
+
+SPOTS = [
+    ('flop, random opponent', ['Ah', 'Kh'], ['Qh', '7h', '2c'], None),
+    ('turn, random opponent', ['Ah', 'Kh'], ['Qh', '7h', '2c', '9d'], None),
+    ('flop, draw', ['9c', 'Tc'], ['Jc', 'Qd', '2h'], None),
+    ('flop, vs range', ['Ah', 'Kh'], ['Qh', '7h', '2c'], parse_range('TT+, AQs+, AKo, KQs, QJs')),
+]
+
+
+def estimates(hand, board, opp_range, trials, repeats, stratify):
+    hand, board = cards_to_ints(hand), cards_to_ints(board)
+    opp_hands = filter_hands(opp_range, hand + board)
+    rng = np.random.default_rng(0)
+    return np.array([sample_wins(hand, board, opp_hands, trials, rng=rng, stratify=stratify) / trials
+                     for _ in range(repeats)])
+
+
+def main(repeats=200, trials=1000):
+    print(f'{repeats} repeats x {trials} trials')
+    for name, hand, board, opp_range in SPOTS:
+        plain = estimates(hand, board, opp_range, trials, repeats, False)
+        stratified = estimates(hand, board, opp_range, trials, repeats, True)
+        print(f'{name:<24} mean {plain.mean():.4f} / {stratified.mean():.4f}  '
+              f'variance ratio {plain.var() / stratified.var():.2f}x')
+
+    # 两手候选牌的胜率差：分别独立模拟 vs 同一批发牌
+    # 两手牌不共用牌，且两种估计都不发出任意一手的牌（equity_difference 的定义），估计的是同一个量
+    hand_a, hand_b, board = ['Ah', 'Kh'], ['Qs', 'Jd'], ['Jh', '7h', '2c']
+    rng = np.random.default_rng(1)
+    a, b, board_ints = cards_to_ints(hand_a), cards_to_ints(hand_b), cards_to_ints(board)
+    sampler = DeckSampler(a + b + board_ints, rng)
+    independent = np.array([(sample_wins(a, board_ints, [], trials, sampler=sampler)
+                             - sample_wins(b, board_ints, [], trials, sampler=sampler)) / trials
+                            for _ in range(repeats)])
+    paired = np.array([equity_difference(hand_a, hand_b, board, trials=trials, rng=rng).mean for _ in range(repeats)])
+    print(f'{"AKs vs QJo difference":<24} mean {independent.mean():.4f} / {paired.mean():.4f}  '
+          f'variance ratio {independent.var() / paired.var():.2f}x')
+
+CROSSOVER_SPOTS = [
+    ('flop vs AA', ['Ah', 'Kd'], ['7c', '8d', '2s'], parse_range('AA')),
+    ('flop vs QQ+, AKs', ['Ah', 'Kd'], ['7c', '8d', '2s'], parse_range('QQ+, AKs')),
+    ('flop vs wide range', ['Ah', 'Kd'], ['7c', '8d', '2s'], parse_range('22+, A2s+, KTs+, ATo+')),
+    ('turn, random opponent', ['Ah', 'Kd'], ['7c', '8d', '2s', 'Qh'], None),
+    ('river, random opponent', ['Ah', 'Kd'], ['7c', '8d', '2s', 'Qh', '3c'], None),
+]
+
+
+def crossover(trials=5000):
+    """穷举与模拟各自的耗时，以及 exact_cost/sample_cost 的选择"""
+    exact_strength(['Ah', 'Kd'], ['7c', '8d', '2s', 'Qh', '3c'])
+    for name, hand, board, opp_range in CROSSOVER_SPOTS:
+        hand, board = cards_to_ints(hand), cards_to_ints(board)
+        opp_hands = filter_hands(opp_range, hand + board)
+        start = time.perf_counter()
+        exact_strength(hand, board, opp_hands)
+        exact_ms = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        sample_wins(hand, board, opp_hands, trials)
+        sample_ms = (time.perf_counter() - start) * 1000
+        choice = 'exact' if exact_cost(len(board), len(opp_hands)) <= sample_cost(trials) else 'sample'
+        faster = 'exact' if exact_ms <= sample_ms else 'sample'
+        print(f'{name:<24} exact {exact_ms:8.2f}ms  sample {sample_ms:8.2f}ms  chosen {choice:<6} faster {faster}')
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
+    crossover()
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+牌力评估与胜率计算的基准测试：各函数按街道统计吞吐量（手/秒、次/秒）与单次调用延迟 p50/p99，
+与 JSON 基线比较，吞吐量下降超过阈值时以非零状态退出（可用于 CI）
+运行:
+    python tests/bench_suite.py                      # 与基线比较，默认允许下降 20%
+    python tests/bench_suite.py --tolerance 10       # 或环境变量 BENCH_TOLERANCE=10
+    python tests/bench_suite.py --update             # 用本次结果更新基线
+基线与机器相关，换机器后先 --update；导入失败的基准（缺少依赖）跳过，不参与比较；
+models.* 缺少数据库配置时用占位模块导入（见 tests.stub_database）
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+# 添加项目根目录（tests 包）与src目录到Python路径
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from tests import stub_database
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), 'bench_baseline.json')
+
+RANKS = ['2', '3', '4', '5', '6', '7', '8', '9', 'T', 'J', 'Q', 'K', 'A']
+SUITS = ['h', 'd', 'c', 's']
+DECK = [r + s for s in SUITS for r in RANKS]
+STREETS = {'preflop': 0, 'flop': 3, 'turn': 4, 'river': 5}
+
+
+def deals(count, board_size, seed):
+    """(手牌, 公共牌, 对手手牌) 随机样本"""
+    rng = random.Random(seed)
+    result = []
+    for _ in range(count):
+        cards = rng.sample(DECK, 4 + board_size)
+        result.append((cards[:2], cards[4:], cards[2:4]))
+    return result
+
+
+def bench_evaluate_hand(count):
+    from utils.card import evaluate_hand
+    return {'5 cards': (evaluate_hand, [(d[0] + d[1],) for d in deals(count, 3, 0)], 'hands')}
+
+
+def bench_get_best_hand(count):
+    from utils.card import get_best_hand
+    return {street: (get_best_hand, [(hand, board) for hand, board, _ in deals(count, size, size)], 'hands')
+            for street, size in STREETS.items() if size}
+
+
+def bench_compare_hands(count):
+    from utils.card import compare_hands
+    return {street: (compare_hands, [(hand, opp, board) for hand, board, opp in deals(count, size, size)], 'hands')
+            for street, size in STREETS.items() if size}
+
+
+def bench_card_eval_strength(count):
+    from utils.card import eval_strength
+    return {street: (eval_strength, [(hand, board) for hand, board, _ in deals(max(count // 500, 5), size, size)],
+                     'calls') for street, size in STREETS.items()}
+
+
+def bench_feature_eval_strength(count):
+    stub_database()
+    from models.game_feature import eval_strength
+    return {street: (eval_strength, [(hand, board) for hand, board, _ in deals(max(count // 500, 5), size, size)],
+                     'calls') for street, size in STREETS.items()}
+
+
+def bench_eval_wetness(count):
+    stub_database()
+    from models.game_feature import eval_wetness
+    return {street: (eval_wetness, [(board,) for _, board, _ in deals(count // 10, size, size)], 'calls')
+            for street, size in STREETS.items() if size}
+
+
+def bench_board_texture(count):
+    from utils.texture import board_texture
+    return {street: (board_texture, [(board,) for _, board, _ in deals(count // 10, size, size)], 'calls')
+            for street, size in STREETS.items() if size}
+
+
+def bench_draw_potential(count):
+    """FeatureExtractor 听牌潜力特征每个状态的开销（未命中缓存时）"""
+    from core.game_feature import POTENTIAL_RUNOUTS
+    from utils.range_equity import hand_potential
+
+    def draw_potential(hand, board):
+        return hand_potential(hand, board, max_runouts=POTENTIAL_RUNOUTS, rng=0).ppot
+    return {street: (draw_potential, [(hand, board) for hand, board, _ in deals(max(count // 500, 5), size, size)],
+                     'states') for street, size in STREETS.items() if 3 <= size <= 4}
+
+
+BENCHMARKS = {
+    'evaluate_hand': bench_evaluate_hand,
+    'get_best_hand': bench_get_best_hand,
+    'compare_hands': bench_compare_hands,
+    'utils.card.eval_strength': bench_card_eval_strength,
+    'models.game_feature.eval_strength': bench_feature_eval_strength,
+    'eval_wetness': bench_eval_wetness,
+    'board_texture': bench_board_texture,
+    'draw_potential': bench_draw_potential,
+}
+
+
+def measure(func, inputs, rounds=5):
+    """
+    吞吐量：整批连续调用计时（不含逐次计时的开销）；延迟：逐次调用计时
+    各重复 rounds 轮取最快的一轮，减少频率调节、其他进程等噪声
+    :return: (每秒次数, p50毫秒, p99毫秒)
+    """
+    func(*inputs[0])
+    elapsed = float('inf')
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for args in inputs:
+            func(*args)
+        elapsed = min(elapsed, time.perf_counter() - start)
+    best = None
+    for _ in range(rounds):
+        latencies = np.empty(len(inputs))
+        for i, args in enumerate(inputs):
+            start = time.perf_counter()
+            func(*args)
+            latencies[i] = time.perf_counter() - start
+        if best is None or latencies.sum() < best.sum():
+            best = latencies
+    p50, p99 = np.percentile(best, [50, 99]) * 1000
+    return len(inputs) / elapsed, float(p50), float(p99)
+
+
+def run(count=20000, names=None, rounds=5):
+    """运行基准，返回 {'函数/街道': {'unit', 'per_sec', 'p50_ms', 'p99_ms'}}"""
+    results = {}
+    for name, setup in BENCHMARKS.items():
+        if names and name not in names:
+            continue
+        try:
+            cases = setup(count)
+        except ImportError as e:
+            print(f'{name:<36} skipped ({e})')
+            continue
+        for street, (func, inputs, unit) in cases.items():
+            per_sec, p50, p99 = measure(func, inputs, rounds)
+            results[f'{name}/{street}'] = {'unit': unit, 'per_sec': per_sec, 'p50_ms': p50, 'p99_ms': p99}
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """返回吞吐量比基线下降超过 tolerance% 的条目"""
+    regressions = []
+    for key, result in results.items():
+        base = baseline.get(key)
+        change = '' if base is None else f'{(result["per_sec"] / base["per_sec"] - 1) * 100:+.1f}%'
+        print(f'{key:<44} {result["per_sec"]:>12,.0f} {result["unit"]}/sec  '
+              f'p50 {result["p50_ms"]:.3f}ms  p99 {result["p99_ms"]:.3f}ms  {change}')
+        if base is not None and result['per_sec'] < base['per_sec'] * (1 - tolerance / 100):
+            regressions.append(key)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--count', type=int, default=20000, help='牌力评估的样本数，胜率计算按比例减少')
+    parser.add_argument('--rounds', type=int, default=5, help='每项重复轮数，取最快一轮')
+    parser.add_argument('--tolerance', type=float, default=float(os.environ.get('BENCH_TOLERANCE', 20)),
+                        help='允许的吞吐量下降百分比')
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--update', action='store_true', help='把本次结果写入基线')
+    parser.add_argument('names', nargs='*', help=f'只运行部分基准：{", ".join(BENCHMARKS)}')
+    args = parser.parse_args(argv)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+    results = run(args.count, args.names, args.rounds)
+    regressions = compare(results, baseline, args.tolerance)
+
+    if args.update:
+        baseline.update({key: {k: round(v, 4) if isinstance(v, float) else v for k, v in result.items()}
+                         for key, result in results.items()})
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        print(f'baseline updated: {args.baseline}')
+        return 0
+    if regressions:
+        print(f'regressed more than {args.tolerance:g}%: {", ".join(regressions)}')
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
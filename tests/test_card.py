@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+utils.card 牌力评估测试
+查表评估器与逐个组合枚举的结果必须一致
+"""
+
+import os
+import random
+import sys
+import unittest
+from itertools import combinations
+
+# 添加src目录到Python路径
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from utils.card import (evaluate_hand, get_best_hand, compare_hands, hand_rank, rank_to_score, rank_showdown,
+                        card_to_int, cards_to_ints, int_to_card, card_mask, hands_to_ints,
+                        HIGH_CARD, ONE_PAIR, TWO_PAIR, FULL_HOUSE, STRAIGHT, ROYAL_FLUSH)
+
+RANKS = ['2', '3', '4', '5', '6', '7', '8', '9', '10', 'J', 'Q', 'K', 'A']
+SUITS = ['h', 'd', 'c', 's']
+DECK = [r + s for s in SUITS for r in RANKS]
+
+
+def brute_force_best(cards):
+    """逐个5张组合调用evaluate_hand取最大值"""
+    best = (HIGH_CARD, [])
+    for combo in combinations(cards, 5):
+        score = evaluate_hand(combo)
+        if score > best:
+            best = score
+    return best
+
+
+class HandRankTest(unittest.TestCase):
+    """查表评估器测试"""
+
+    def test_matches_brute_force(self):
+        """随机5-7张牌与枚举结果一致"""
+        rng = random.Random(7)
+        for _ in range(3000):
+            cards = rng.sample(DECK, rng.choice([5, 6, 7]))
+            self.assertEqual(get_best_hand(cards[:2], cards[2:]), brute_force_best(cards), cards)
+
+    def test_rank_order_matches_score_order(self):
+        """整数牌力的大小关系与 (牌型, kickers) 一致"""
+        rng = random.Random(11)
+        for _ in range(1000):
+            a, b = rng.sample(DECK, 7), rng.sample(DECK, 7)
+            ra, rb = hand_rank(a), hand_rank(b)
+            sa, sb = rank_to_score(ra), rank_to_score(rb)
+            self.assertEqual(ra > rb, sa > sb)
+            self.assertEqual(ra == rb, sa == sb)
+
+    def test_special_hands(self):
+        """皇家同花顺、A-5顺子、两个三条组成葫芦、三个对子"""
+        self.assertEqual(get_best_hand(['Ah', 'Kh'], ['Qh', 'Jh', '10h', '2c', '3d']),
+                         (ROYAL_FLUSH, [14, 13, 12, 11, 10]))
+        self.assertEqual(get_best_hand(['Ah', '2d'], ['3h', '4c', '5s', '9c', '9d']),
+                         (STRAIGHT, [5, 4, 3, 2, 1]))
+        self.assertEqual(get_best_hand(['Kh', 'Kd'], ['Kc', '7s', '7d', '7h', '2c']),
+                         (FULL_HOUSE, [13, 7]))
+        self.assertEqual(get_best_hand(['Kh', 'Kd'], ['Qc', 'Qs', '7d', '7h', '2c']),
+                         (TWO_PAIR, [13, 12, 7]))
+        self.assertEqual(get_best_hand(['Ah', 'Kd'], ['2c']), (HIGH_CARD, []))
+
+    def test_string_formats(self):
+        """'T'与'10'、字母花色与符号花色等价"""
+        self.assertEqual(hand_rank(['Th', 'Td', '2c', '5s', '9h']),
+                         hand_rank(['10♥', '10♦', '2♣', '5♠', '9♥']))
+        self.assertEqual(rank_to_score(hand_rank(['Th', 'Td', '2c', '5s', '9h'])),
+                         (ONE_PAIR, [10, 9, 5, 2]))
+
+    def test_compare_hands(self):
+        """kicker决定胜负以及平分"""
+        board = ['Ah', 'Kd', '7c', '7s', '2h']
+        self.assertEqual(compare_hands(['Qh', '3d'], ['Jh', '3c'], board), 1)
+        self.assertEqual(compare_hands(['3h', '4d'], ['3c', '5c'], board), -1)
+        self.assertEqual(compare_hands(['3h', '4d'], ['3c', '4c'], board), 0)
+
+    def test_rank_showdown(self):
+        """名次分组与两两比较一致"""
+        board = ['Ah', 'Kd', '7c', '7s', '2h']
+        hands = [['3h', '4d'], ['Qh', '3d'], ['Ac', '9d'], ['3c', '4c'], ['7h', '2d']]
+        self.assertEqual(rank_showdown(hands, board), [[4], [2], [1], [0, 3]])
+
+        rng = random.Random(5)
+        for _ in range(300):
+            cards = rng.sample(DECK, 5 + 2 * 6)
+            board, hands = cards[:5], [cards[5 + 2 * i:7 + 2 * i] for i in range(6)]
+            tiers = rank_showdown(hands, board)
+            self.assertEqual(sorted(i for tier in tiers for i in tier), list(range(6)))
+            for upper, lower in zip(tiers, tiers[1:]):
+                self.assertEqual(compare_hands(hands[upper[0]], hands[lower[0]], board), 1)
+            for tier in tiers:
+                for i in tier[1:]:
+                    self.assertEqual(compare_hands(hands[tier[0]], hands[i], board), 0)
+
+    def test_fewer_than_five_cards(self):
+        """不足5张牌：比较与摊牌视为平分，hand_rank 明确报错"""
+        self.assertEqual(compare_hands(['Ah', 'Kd'], ['Qc', 'Qd'], []), 0)
+        self.assertEqual(compare_hands(['Ah', 'Kd'], ['Qc', 'Qd'], ['2c', '7h']), 0)
+        self.assertEqual(rank_showdown([['Ah', 'Kd'], ['Qc', 'Qd'], ['7s', '2d']], ['2c']), [[0, 1, 2]])
+        with self.assertRaises(ValueError):
+            hand_rank(['Ah', 'Kd', 'Qc', 'Qd'])
+
+
+class CardEncodingTest(unittest.TestCase):
+    """整数编码测试"""
+
+    def test_round_trip(self):
+        """52张牌编码唯一且可还原"""
+        ids = cards_to_ints(DECK)
+        self.assertEqual(sorted(ids), list(range(52)))
+        for card, c in zip(DECK, ids):
+            self.assertEqual(card_to_int(int_to_card(c)), c)
+            self.assertEqual(int_to_card(c), card.replace('10', 'T'))
+
+    def test_aliases(self):
+        """不同写法得到同一个整数"""
+        self.assertEqual(card_to_int('Td'), card_to_int('10d'))
+        self.assertEqual(card_to_int('10♦'), card_to_int('td'))
+        self.assertEqual(card_to_int('A♠'), card_to_int('As'))
+        self.assertEqual(card_to_int(51), 51)
+        self.assertEqual(cards_to_ints(None), [])
+
+    def test_mask_and_hands(self):
+        """掩码与范围写法"""
+        self.assertEqual(card_mask(['2c', '2d']), 0b11)
+        self.assertEqual(hands_to_ints(['AhKd', (0, 1)]), [(card_to_int('Ah'), card_to_int('Kd')), (0, 1)])
+
+    def test_int_and_str_agree(self):
+        """评估函数对整数与字符串输入结果一致"""
+        rng = random.Random(3)
+        for _ in range(200):
+            cards = rng.sample(DECK, 7)
+            self.assertEqual(hand_rank(cards), hand_rank(cards_to_ints(cards)))
+            self.assertEqual(evaluate_hand(cards[:5]), evaluate_hand(cards_to_ints(cards[:5])))
+
+
+if __name__ == '__main__':
+    unittest.main()
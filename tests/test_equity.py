@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+utils.equity 胜率计算测试
+"""
+
+import os
+import sys
+import time
+import unittest
+from math import sqrt
+
+import numpy as np
+from itertools import combinations
+
+# 添加src目录到Python路径
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from utils.card import cards_to_ints, hand_rank, hands_to_ints, eval_strength
+from utils.equity import (exact_strength, exact_cost, sample_cost, EquityEngine, adaptive_strength,
+                          confidence_half_width, sample_wins, multiway_shares, equity_difference)
+from utils.evaluator import evaluate, evaluate_shared
+from utils.isomorph import EquityCache
+from utils.sampler import DeckSampler
+
+
+def brute_force(hand, board, draw_size=2):
+    """逐个枚举对手抽牌计算河牌胜率；对手多于两张时取最弱的两张，赢过任意两张组合即算赢"""
+    hand, board = cards_to_ints(hand), cards_to_ints(board)
+    hero = hand_rank(hand + board)
+    live = [c for c in range(52) if c not in hand + board]
+    wins = total = 0
+    for draw in combinations(live, draw_size):
+        total += 1
+        if any(hero > hand_rank(list(pair) + board) for pair in combinations(draw, 2)):
+            wins += 1
+    return wins / total
+
+
+def brute_force_share(hand, board):
+    """逐个枚举单个对手的两张牌计算河牌底池份额（平局平分）"""
+    hand, board = cards_to_ints(hand), cards_to_ints(board)
+    hero = hand_rank(hand + board)
+    live = [c for c in range(52) if c not in hand + board]
+    ranks = [hand_rank(list(opp) + board) for opp in combinations(live, 2)]
+    return sum(1.0 if hero > r else 0.5 if hero == r else 0.0 for r in ranks) / len(ranks)
+
+
+class ExactStrengthTest(unittest.TestCase):
+    """穷举胜率测试"""
+
+    def test_river_matches_brute_force(self):
+        hand, board = ['Ah', 'Kh'], ['Qh', '7h', '2c', '9d', '3s']
+        self.assertAlmostEqual(exact_strength(hand, board), brute_force(hand, board))
+        self.assertAlmostEqual(exact_strength(hand, board, draw_size=3), brute_force(hand, board, 3))
+
+    def test_draw_size_weakest_pair(self):
+        """draw_size=3 保持原 eval_strength 的语义（treys 牌力取最大即最弱的两张）：穷举与模拟一致"""
+        hand, board = ['Ah', 'Kh'], ['Qh', '7h', '2c', '9d', '3s']
+        self.assertAlmostEqual(eval_strength(hand, board, draw_size=3), 0.6889)
+        self.assertGreater(eval_strength(hand, board, draw_size=3), eval_strength(hand, board))
+        hand, board = ['Ah', 'Kh'], ['Qh', '7h', '2c', '9d']
+        wins = sample_wins(cards_to_ints(hand), cards_to_ints(board), [], 20000, draw_size=3, rng=0)
+        self.assertAlmostEqual(wins / 20000, exact_strength(hand, board, draw_size=3), delta=0.015)
+
+    def test_river_with_range(self):
+        """范围中被公共牌或手牌挡住的组合不计入"""
+        hand, board = ['Ah', 'Kh'], ['Qh', '7h', '2c', '9d', '3s']
+        opp = hands_to_ints(['QsQd', '7s7d', 'AhQc', '9h8h', 'KsKd', 'AsTs'])
+        # AhQc 与手牌冲突；剩余5手中只赢 AsTs
+        self.assertAlmostEqual(exact_strength(hand, board, opp), 1 / 5)
+
+    def test_flop_vs_narrow_range(self):
+        """翻牌对窄范围时穷举不超过所替代的5000次模拟，eval_strength 选择穷举：结果与逐个发牌一致"""
+        hand, board = cards_to_ints(['Ah', 'Kd']), cards_to_ints(['7c', '8d', '2s'])
+        combos = ['QsQd', 'QhQc', 'KsKh', 'AsKs', 'AcKc']
+        opp = hands_to_ints(combos)
+        self.assertLessEqual(exact_cost(3, len(opp)), sample_cost(5000))
+        live = [c for c in range(52) if c not in hand + board]
+        wins = total = 0
+        for runout in combinations(live, 2):
+            full = board + list(runout)
+            for pair in opp:
+                if not set(pair) & set(runout):
+                    total += 1
+                    wins += hand_rank(hand + full) > hand_rank(list(pair) + full)
+        self.assertAlmostEqual(exact_strength(hand, board, opp), wins / total)
+        # 走穷举时结果固定，等于精确值（模拟不会每次都恰好落在精确值上）
+        strength = eval_strength(['Ah', 'Kd'], ['7c', '8d', '2s'], combos, trials=5000)
+        self.assertEqual(strength, round(wins / total, 4))
+        self.assertEqual(strength, eval_strength(['Ah', 'Kd'], ['7c', '8d', '2s'], combos, trials=5000))
+
+    def test_turn_close_to_sampling(self):
+        hand, board = ['Ah', 'Kh'], ['Qh', '7h', '2c', '9d']
+        # 转牌5000次模拟时不满足穷举条件，走蒙特卡洛
+        self.assertAlmostEqual(exact_strength(hand, board), eval_strength(hand, board, trials=5000), delta=0.03)
+
+    def test_auto_selection(self):
+        """河牌默认穷举（结果固定），翻牌仍然模拟"""
+        self.assertLessEqual(exact_cost(5), sample_cost(5000))
+        self.assertGreater(exact_cost(4), sample_cost(5000))
+        self.assertGreater(exact_cost(3, 0, 3), sample_cost(10000, 3))
+        self.assertLessEqual(exact_cost(5, 0, 3), sample_cost(10000, 3))
+        hand, board = ['Ah', 'Kh'], ['Qh', '7h', '2c', '9d', '3s']
+        self.assertEqual(eval_strength(hand, board), round(brute_force(hand, board), 4))
+
+
+
+class DeckSamplerTest(unittest.TestCase):
+    """批量发牌测试"""
+
+    def test_batch_excludes_dead_cards(self):
+        dead = cards_to_ints(['Ah', 'Kh', 'Qh', '7h', '2c'])
+        sampler = DeckSampler(dead, rng=0)
+        draws = sampler.batch(5000, 4)
+        self.assertEqual(draws.shape, (5000, 4))
+        self.assertFalse(np.isin(draws, dead).any())
+        self.assertTrue(all(len(set(row)) == 4 for row in draws.tolist()))
+        # 每张剩余牌出现的次数大致相同
+        counts = np.bincount(draws.ravel(), minlength=52)[sampler.live]
+        self.assertLess(counts.max() / counts.min(), 1.3)
+
+    def test_buffer_reused(self):
+        sampler = DeckSampler(rng=1)
+        first = sampler.batch(100, 3)
+        second = sampler.batch(50, 3)
+        self.assertTrue(np.shares_memory(first, second))
+        with self.assertRaises(ValueError):
+            sampler.batch(1, 53)
+
+    def test_sample_wins_matches_exact(self):
+        """批量模拟与穷举结果一致（含对手范围）"""
+        hand, board = cards_to_ints(['Ah', 'Kh']), cards_to_ints(['Qh', '7h', '2c', '9d'])
+        opp = hands_to_ints(['QsQd', '7s7d', '9h8h', 'KsKd', 'AsTs', 'Jh5h'])
+        for opp_hands in ([], opp):
+            exact = exact_strength(hand, board, opp_hands)
+            sampled = sample_wins(hand, board, opp_hands, 20000, rng=2) / 20000
+            self.assertAlmostEqual(sampled, exact, delta=0.015)
+
+
+class AdaptiveStrengthTest(unittest.TestCase):
+    """目标精度与时限测试"""
+
+    def test_half_width(self):
+        """9604次、胜率0.5时95%区间约±1%"""
+        self.assertAlmostEqual(confidence_half_width(4802, 9604), 0.01, places=4)
+        self.assertGreater(confidence_half_width(0, 100), 0)
+
+    def test_stops_at_precision(self):
+        """大幅领先时达到±2%所需次数远少于上限"""
+        hand, board = cards_to_ints(['Ah', 'Ad']), cards_to_ints(['2c', '7d', '9s'])
+        result = adaptive_strength(hand, board, [], max_trials=20000, precision=0.02, rng=np.random.default_rng(3))
+        self.assertLess(result.trials, 20000)
+        self.assertLessEqual(confidence_half_width(result.mean * result.trials, result.trials), 0.02)
+        self.assertGreater(result.mean, 0.8)
+
+    def test_deadline(self):
+        """时限到达后停止"""
+        hand, board = cards_to_ints(['Ah', 'Kh']), cards_to_ints(['Qh', '7h', '2c'])
+        start = time.monotonic()
+        result = adaptive_strength(hand, board, [], max_trials=10 ** 7, precision=0.0001, timeout=0.05, batch=100)
+        self.assertLess(time.monotonic() - start, 0.5)
+        self.assertLess(result.trials, 10 ** 7)
+
+    def test_eval_strength_precision(self):
+        strength = eval_strength(['Ah', 'Kh'], ['Qh', '7h', '2c', '9d'], trials=20000, precision=0.02)
+        self.assertAlmostEqual(strength, exact_strength(['Ah', 'Kh'], ['Qh', '7h', '2c', '9d']), delta=0.04)
+
+
+class EquityEngineTest(unittest.TestCase):
+    """多进程引擎测试"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.engine = EquityEngine(processes=2, shard_trials=500)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.engine.close()
+
+    def test_deterministic_across_process_counts(self):
+        """相同种子结果相同，与进程数无关"""
+        hand, board = ['Ah', 'Kh'], ['Qh', '7h', '2c']
+        result = self.engine.equity(hand, board, trials=3000, draw_size=3, seed=42)
+        self.assertEqual(result, self.engine.equity(hand, board, trials=3000, draw_size=3, seed=42))
+        with EquityEngine(processes=1, shard_trials=500) as single:
+            self.assertEqual(result, single.equity(hand, board, trials=3000, draw_size=3, seed=42))
+        self.assertNotEqual(result, self.engine.equity(hand, board, trials=3000, draw_size=3, seed=43))
+
+    def test_mean_and_stderr(self):
+        result = self.engine.equity(['Ah', 'Kh'], ['Qh', '7h', '2c', '9d'], trials=4000, seed=1)
+        self.assertEqual(result.trials, 4000)
+        self.assertAlmostEqual(result.mean, exact_strength(['Ah', 'Kh'], ['Qh', '7h', '2c', '9d']),
+                               delta=4 * result.stderr)
+        self.assertAlmostEqual(result.stderr, (result.mean * (1 - result.mean) / 4000) ** 0.5)
+
+    def test_precision_stop(self):
+        """分轮检查精度，结果仍可复现，与进程数无关"""
+        hand, board = ['Ah', 'Ad'], ['2c', '7d', '9s']
+        result = self.engine.equity(hand, board, trials=20000, precision=0.02, seed=5)
+        self.assertLess(result.trials, 20000)
+        self.assertEqual(result, self.engine.equity(hand, board, trials=20000, precision=0.02, seed=5))
+        # 停止位置按分片顺序确定，与进程数无关
+        with EquityEngine(processes=3, shard_trials=500) as other:
+            self.assertEqual(result, other.equity(hand, board, trials=20000, precision=0.02, seed=5))
+
+    def test_deadline_after_start(self):
+        """进程池启动后再计时，预计超过时限的一轮不再开始"""
+        with EquityEngine(processes=2, shard_trials=500) as engine:
+            engine.start()
+            self.assertIsNotNone(engine._pool)
+            start = time.monotonic()
+            result = engine.equity(['Ah', 'Kh'], ['Qh', '7h', '2c'], trials=10 ** 7, opponents=3, timeout=0.1)
+            self.assertLess(time.monotonic() - start, 0.3)
+            self.assertLess(result.trials, 10 ** 7)
+
+    def test_exact_when_cheaper(self):
+        """河牌直接穷举，标准误差为0"""
+        result = self.engine.equity(['Ah', 'Kh'], ['Qh', '7h', '2c', '9d', '3s'], trials=10000, draw_size=3)
+        self.assertEqual(result.stderr, 0.0)
+        self.assertTrue(result.exact)
+        self.assertAlmostEqual(result.mean, brute_force(['Ah', 'Kh'], ['Qh', '7h', '2c', '9d', '3s'], 3))
+
+    def test_certain_sample_not_exact(self):
+        """模拟的胜率恰好为1时标准误差也是0，但不是穷举结果，不满足更多模拟次数的要求"""
+        with EquityEngine(processes=1, shard_trials=500, cache=EquityCache()) as engine:
+            hand, board = ['Ah', 'Kh'], ['Qh', 'Jh', 'Th']
+            first = engine.equity(hand, board, trials=1000, opponents=2)
+            self.assertEqual((first.mean, first.stderr, first.exact), (1.0, 0.0, False))
+            self.assertEqual(engine.equity(hand, board, trials=4000, opponents=2).trials, 4000)
+
+
+
+class MultiwayTest(unittest.TestCase):
+    """多人底池胜率测试"""
+
+    def test_evaluate_shared_matches_evaluate(self):
+        rng = np.random.default_rng(0)
+        cards = np.argsort(rng.random((2000, 52)), axis=1)[:, :11].astype(np.int8)
+        board, holdings = cards[:, :5], cards[:, 5:].reshape(-1, 3, 2)
+        shared = evaluate_shared(board, holdings)
+        for i in range(3):
+            np.testing.assert_array_equal(shared[:, i], evaluate(np.concatenate([holdings[:, i], board], axis=1)))
+
+    def test_heads_up_river_matches_brute_force(self):
+        """单个对手时，份额 = 赢的概率 + 平局概率 / 2"""
+        hand, board = cards_to_ints(['Ah', 'Kh']), cards_to_ints(['Qh', '7h', '2c', '9d', 'Ks'])
+        share = multiway_shares(hand, board, 1, 20000, rng=np.random.default_rng(1)) / 20000
+        self.assertAlmostEqual(share, brute_force_share(hand, board), delta=0.01)
+
+    def test_heads_up_exact_shares_ties(self):
+        """单个对手的河牌直接穷举，平局平分：与逐个枚举一致，标准误差为0；不指定对手数时平局不计为赢"""
+        hand, board = ['Ah', 'Kh'], ['Qh', '7h', '2c', '9d', 'Ks']
+        with EquityEngine(processes=1) as engine:
+            result = engine.equity(hand, board, trials=10000, opponents=1)
+            self.assertTrue(result.exact)
+            self.assertEqual(result.stderr, 0.0)
+            self.assertAlmostEqual(result.mean, brute_force_share(hand, board))
+            self.assertAlmostEqual(engine.equity(hand, board, trials=10000).mean, brute_force(hand, board))
+            # 转牌同样穷举，与模拟的份额一致
+            turn = engine.equity(hand, board[:4], trials=10000, opponents=1)
+            self.assertTrue(turn.exact)
+            share = multiway_shares(cards_to_ints(hand), cards_to_ints(board[:4]), 1, 20000, rng=2) / 20000
+            self.assertAlmostEqual(turn.mean, share, delta=0.01)
+
+    def test_split_pot_shared_equally(self):
+        """公共牌皇家同花顺，所有人平分"""
+        hand, board = cards_to_ints(['2c', '3d']), cards_to_ints(['Ah', 'Kh', 'Qh', 'Jh', 'Th'])
+        self.assertAlmostEqual(multiway_shares(hand, board, 4, 100, rng=0), 100 / 5)
+
+    def test_more_opponents_lower_equity(self):
+        engine = EquityEngine(processes=1, shard_trials=2000)
+        hand, board = ['Ah', 'Kh'], ['Qh', '7h', '2c']
+        means = [engine.equity(hand, board, trials=4000, opponents=n).mean for n in (1, 3, 5)]
+        self.assertGreater(means[0], means[1])
+        self.assertGreater(means[1], means[2])
+
+
+
+class VarianceReductionTest(unittest.TestCase):
+    """分层抽样与公共随机数测试"""
+
+    def test_strata_balanced(self):
+        index = DeckSampler(rng=0).strata(1000, 47)
+        counts = np.bincount(index, minlength=47)
+        self.assertEqual(counts.min(), 21)
+        self.assertEqual(counts.max(), 22)
+
+    def test_stratified_unbiased_lower_variance(self):
+        hand, board = cards_to_ints(['Ah', 'Kh']), cards_to_ints(['Qh', '7h', '2c', '9d'])
+        rng = np.random.default_rng(0)
+        plain = [sample_wins(hand, board, [], 500, rng=rng, stratify=False) / 500 for _ in range(150)]
+        stratified = [sample_wins(hand, board, [], 500, rng=rng) / 500 for _ in range(150)]
+        self.assertAlmostEqual(np.mean(stratified), exact_strength(hand, board), delta=0.004)
+        self.assertLess(np.var(stratified) * 1.5, np.var(plain))
+
+    def test_stratified_range(self):
+        hand, board = cards_to_ints(['Ah', 'Kh']), cards_to_ints(['Qh', '7h', '2c', '9d'])
+        opp_hands = np.array(hands_to_ints(['QsQd', 'JhTh', 'AcKc', '7c7d', '9s8s']), dtype=np.int8)
+        rng = np.random.default_rng(1)
+        estimates = [sample_wins(hand, board, opp_hands, 500, rng=rng) / 500 for _ in range(100)]
+        self.assertAlmostEqual(np.mean(estimates), exact_strength(hand, board, opp_hands), delta=0.005)
+
+    def test_paired_difference(self):
+        hand_a, hand_b, board = ['Ah', 'Kh'], ['Ah', 'Qd'], ['Jh', '7h', '2c', '9d']
+        result = equity_difference(hand_a, hand_b, board, trials=5000, rng=0)
+        # 两手牌的牌都不会发出，精确值在同样的条件下计算
+        live = [c for c in range(52) if c not in cards_to_ints(hand_a + hand_b + board)]
+        expected = []
+        for hand in (hand_a, hand_b):
+            hero = cards_to_ints(hand)
+            wins = total = 0
+            for river in live:
+                full = cards_to_ints(board) + [river]
+                rank = hand_rank(hero + full)
+                for opp in combinations([c for c in live if c != river], 2):
+                    wins += rank > hand_rank(list(opp) + full)
+                    total += 1
+            expected.append(wins / total)
+        self.assertAlmostEqual(result.mean, expected[0] - expected[1], delta=4 * result.stderr)
+        # 配对后的标准误差小于两次独立模拟
+        independent = sqrt(sum(p * (1 - p) for p in expected) / 5000)
+        self.assertLess(result.stderr, independent)
+
+
+if __name__ == '__main__':
+    unittest.main()
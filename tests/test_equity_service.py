@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+utils.equity_service 后台胜率服务测试
+"""
+
+import os
+import sys
+import time
+import unittest
+
+# 添加src目录到Python路径
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from utils.equity import EquityEngine
+from utils.equity_service import EquityService
+from utils.isomorph import EquityCache
+
+
+class EquityServiceTest(unittest.TestCase):
+
+    def setUp(self):
+        self.engine = EquityEngine(processes=1, shard_trials=500, cache=EquityCache())
+
+    def tearDown(self):
+        self.engine.close()
+
+    def wait_finished(self, service, stage):
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            result = service.best(stage)
+            if result is not None and result.trials >= service.max_trials:
+                return result
+            time.sleep(0.01)
+        self.fail('service did not finish')
+
+    def test_refines_to_same_result_as_one_run(self):
+        """分轮累计与一次模拟同样多的分片结果相同"""
+        with EquityService(self.engine, round_trials=1000, max_trials=4000, precision=0) as service:
+            service.submit(['Ah', 'Kh'], ['Qh', '7h', '2c'], opponents=2)
+            result = self.wait_finished(service, 1)
+        expected = EquityEngine(processes=1, shard_trials=500).equity(['Ah', 'Kh'], ['Qh', '7h', '2c'],
+                                                                      trials=4000, opponents=2)
+        self.assertEqual(result.trials, 4000)
+        self.assertAlmostEqual(result.mean, expected.mean, places=12)
+        # 结果写入引擎缓存，之后同一局面直接命中
+        self.assertEqual(self.engine.equity(['Ah', 'Kh'], ['Qh', '7h', '2c'], trials=4000, opponents=2), result)
+
+    def test_best_at_deadline(self):
+        with EquityService(self.engine, round_trials=500, max_trials=2000) as service:
+            self.assertIsNone(service.best(1))
+            service.submit(['Ah', 'Kh'], ['Qh', '7h', '2c', '9d'])
+            self.assertIsNone(service.best(1))
+            result = service.best(2, deadline=time.monotonic() + 10)
+            self.assertGreaterEqual(result.trials, 500)
+            self.assertTrue(0.0 < result.mean < 1.0)
+            # 对手数沿用上一次，变化时改算新的局面
+            service.submit(['Ah', 'Kh'], ['Qh', '7h', '2c', '9d'], opponents=3)
+            self.assertLess(service.best(2, deadline=time.monotonic() + 10).mean, result.mean)
+
+    def test_stale_situation_rejected(self):
+        """只接受与决策时手牌、公共牌、对手数相同的估计，上一手牌的结果不会被取到"""
+        board = ['Qh', '7h', '2c']
+        with EquityService(self.engine, round_trials=500, max_trials=2000) as service:
+            service.submit(['Ah', 'Kh'], board, opponents=2)
+            deadline = time.monotonic() + 10
+            self.assertIsNotNone(service.best(1, deadline, hand=['Kh', 'Ah'], board=['2c', 'Qh', '7h'], opponents=2))
+            # 新的一手牌已发到同一街，后台还没有 submit
+            self.assertIsNone(service.best(1, deadline, hand=['9c', '9d'], board=['Jd', '8s', '3c'], opponents=2))
+            self.assertIsNone(service.best(1, deadline, hand=['Ah', 'Kh'], board=board, opponents=3))
+            self.assertIsNotNone(service.best(1, hand=['Ah', 'Kh'], board=board))
+
+    def test_certain_sample_keeps_refining(self):
+        """模拟的胜率恰好为1（标准误差为0）不是穷举结果，继续细化到 max_trials"""
+        with EquityService(self.engine, round_trials=500, max_trials=2000, precision=0) as service:
+            service.submit(['Ah', 'Kh'], ['Qh', 'Jh', 'Th'], opponents=2)
+            result = self.wait_finished(service, 1)
+        self.assertEqual((result.mean, result.stderr, result.exact), (1.0, 0.0, False))
+
+    def test_preflop_ignored(self):
+        with EquityService(self.engine) as service:
+            service.submit(['Ah', 'Kh'], [])
+            self.assertIsNone(service.best())
+
+
+if __name__ == '__main__':
+    unittest.main()
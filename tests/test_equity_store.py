@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+utils.equity_store 跨进程胜率存储测试
+"""
+
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+import unittest
+
+# 添加src目录到Python路径
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from utils.equity import EquityEngine, EquityResult
+from utils.equity_store import EquityStore
+from utils.hand_range import parse_range, Range
+from utils.isomorph import situation_key
+
+
+def write_in_child(path):
+    with EquityStore(path) as store:
+        store.put((1, 2, None), EquityResult(0.25, 0.01, 1000))
+
+
+class EquityStoreTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'equity.db')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_batched_writes(self):
+        with EquityStore(self.path, batch_size=3) as writer, EquityStore(self.path) as reader:
+            writer.put(('a',), EquityResult(0.5, 0.0, 10))
+            writer.put(('b',), EquityResult(0.6, 0.0, 10))
+            self.assertEqual(writer.get(('a',)).mean, 0.5)
+            self.assertIsNone(reader.get(('a',)))
+            writer.put(('c',), EquityResult(0.7, 0.0, 10))
+            self.assertEqual(reader.get(('a',)), EquityResult(0.5, 0.0, 10))
+            self.assertEqual(len(reader), 3)
+
+    def test_flush_after_interval(self):
+        """缓冲区中最早的写入等待超过 flush_interval 后，下一次 put 写入，不必等攒够 batch_size"""
+        with EquityStore(self.path, batch_size=100, flush_interval=0.05) as writer, \
+                EquityStore(self.path) as reader:
+            writer.put(('a',), EquityResult(0.5, 0.0, 10))
+            self.assertIsNone(reader.get(('a',)))
+            self.assertEqual(len(writer), 1)
+            time.sleep(0.06)
+            writer.put(('b',), EquityResult(0.6, 0.0, 10))
+            self.assertEqual(reader.get(('b',)), EquityResult(0.6, 0.0, 10))
+            # 已写入的键再次放入缓冲区时不重复计数
+            writer.put(('a',), EquityResult(0.5, 0.0, 20))
+            self.assertEqual(len(writer), 2)
+
+    def test_keeps_more_accurate_result(self):
+        with EquityStore(self.path) as store:
+            store.put(('a',), EquityResult(0.5, 0.01, 5000))
+            store.save()
+            store.put(('a',), EquityResult(0.4, 0.05, 100))
+            store.save()
+            self.assertEqual(store.get(('a',)).trials, 5000)
+
+    def test_exact_result_kept(self):
+        """穷举结果读回后仍标记为穷举，不被模拟次数更多的结果覆盖"""
+        with EquityStore(self.path) as store:
+            store.put(('a',), EquityResult(0.5, 0.0, 1000, True))
+            store.save()
+            store.put(('a',), EquityResult(0.4, 0.01, 5000))
+            store.save()
+            self.assertEqual(store.get(('a',)), EquityResult(0.5, 0.0, 1000, True))
+
+    def test_eviction_least_recently_used(self):
+        with EquityStore(self.path, max_entries=2) as store:
+            store.put(('a',), EquityResult(0.1, 0.0, 1))
+            store.put(('b',), EquityResult(0.2, 0.0, 1))
+            store.save()
+            time.sleep(0.01)
+            store.get(('a',))
+            store.put(('c',), EquityResult(0.3, 0.0, 1))
+            store.save()
+            self.assertEqual(len(store), 2)
+            self.assertIsNone(store.get(('b',)))
+            self.assertIsNotNone(store.get(('a',)))
+
+    def test_shared_between_processes(self):
+        process = multiprocessing.get_context('spawn').Process(target=write_in_child, args=(self.path,))
+        process.start()
+        process.join(30)
+        with EquityStore(self.path) as store:
+            self.assertEqual(store.get((1, 2, None)), EquityResult(0.25, 0.01, 1000))
+
+    def test_engine_uses_store(self):
+        villain = parse_range('TT+, AKs')
+        with EquityStore(self.path) as store, EquityEngine(processes=1, cache=store) as engine:
+            first = engine.equity(['Ah', 'Kh'], ['Qh', '7h', '2c'], villain, trials=2000)
+            # 花色对称的范围按规范下标缓存，同构局面直接命中
+            self.assertEqual(engine.equity(['As', 'Ks'], ['Qs', '7s', '2d'], villain, trials=2000), first)
+            self.assertEqual(store.hits, 1)
+        with EquityStore(self.path) as store:
+            self.assertEqual(store.get((situation_key(['Ah', 'Kh'], ['Qh', '7h', '2c'], villain), 2, None)), first)
+
+    def test_asymmetric_range_key(self):
+        villain = Range.from_hands(['AsKs', 'QdQc'])
+        self.assertNotEqual(situation_key(['Ah', 'Kh'], ['Qh', '7h', '2c'], villain),
+                            situation_key(['As', 'Ks'], ['Qs', '7s', '2d'], villain))
+
+
+if __name__ == '__main__':
+    unittest.main()
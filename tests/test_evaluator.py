@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+utils.evaluator 批量评估测试
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+
+# 添加src目录到Python路径
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from utils.card import hand_rank, cards_to_ints
+from utils.evaluator import evaluate, iter_evaluate, random_hands, count_wins, HAVE_NUMBA
+
+
+class BulkEvaluatorTest(unittest.TestCase):
+    """批量评估与逐手评估一致"""
+
+    def test_matches_hand_rank(self):
+        for size in (5, 6, 7):
+            hands = random_hands(4000, size, seed=size)
+            ranks = evaluate(hands)
+            self.assertEqual(ranks.dtype, np.int32)
+            self.assertEqual(ranks.tolist(), [hand_rank(h) for h in hands.tolist()])
+
+    def test_flush_rows(self):
+        """同花、同花顺与普通牌混在一块时结果正确"""
+        hands = np.array([cards_to_ints(['Ah', 'Kh', 'Qh', 'Jh', 'Th', '2c', '2d']),
+                          cards_to_ints(['2h', '7h', '9h', 'Jh', '3h', '3c', '3d']),
+                          cards_to_ints(['As', 'Ad', 'Ac', 'Kh', 'Kd', '2c', '3h'])], dtype=np.int8)
+        self.assertEqual(evaluate(hands).tolist(), [hand_rank(h) for h in hands.tolist()])
+
+    def test_chunked_streaming(self):
+        """分块大小不影响结果，可写入memmap"""
+        hands = random_hands(10000, seed=9)
+        expected = evaluate(hands)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'hands.npy')
+            np.save(path, hands)
+            mapped = np.load(path, mmap_mode='r')
+            out = np.lib.format.open_memmap(os.path.join(tmp, 'ranks.npy'), mode='w+',
+                                            dtype=np.int32, shape=(len(hands),))
+            evaluate(mapped, chunk_size=777, out=out)
+            np.testing.assert_array_equal(out, expected)
+            del out, mapped
+        starts = [start for start, _ in iter_evaluate(hands, chunk_size=4096)]
+        self.assertEqual(starts, [0, 4096, 8192])
+
+    def test_bad_shape(self):
+        with self.assertRaises(ValueError):
+            evaluate(np.zeros((3, 4), dtype=np.int8))
+
+
+class KernelParityTest(unittest.TestCase):
+    """逐行内核与 NumPy 路径结果一致；未安装 numba 时内核按纯Python执行"""
+
+    def test_rank_parity(self):
+        count = 20000 if HAVE_NUMBA else 2000
+        for size in (5, 6, 7):
+            hands = random_hands(count, size, seed=100 + size)
+            np.testing.assert_array_equal(evaluate(hands, jit=True), evaluate(hands, jit=False))
+
+    def test_count_wins_parity(self):
+        for draw_size in (2, 3):
+            deals = random_hands(3000, 7 + draw_size, seed=draw_size)
+            hand, boards, opp_cards = deals[0, :2], deals[:, 2:7], deals[:, 7:]
+            valid = ~np.isin(boards, hand).any(axis=1) & ~np.isin(opp_cards, hand).any(axis=1)
+            boards, opp_cards = boards[valid], opp_cards[valid]
+            self.assertEqual(count_wins(hand, boards, opp_cards, jit=True),
+                             count_wins(hand, boards, opp_cards, jit=False))
+
+    @unittest.skipUnless(HAVE_NUMBA, 'numba 未安装')
+    def test_compiled(self):
+        from utils import evaluator
+        self.assertTrue(hasattr(evaluator._rank_rows, 'py_func'))
+
+
+if __name__ == '__main__':
+    unittest.main()
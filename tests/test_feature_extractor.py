@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+core.game_feature.FeatureExtractor 批量提取测试
+"""
+
+import os
+import random
+import sys
+import unittest
+from types import SimpleNamespace
+
+import numpy as np
+
+# 添加src目录到Python路径
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from core.feature_registry import FeatureRegistry
+from core.game_feature import FeatureExtractor, _draw_potential
+from utils.card import CARD_STRS
+
+
+class TableState:
+    """测试用的牌桌状态，提供 FeatureExtractor 读取的接口"""
+
+    def __init__(self, rng):
+        deck = rng.sample(CARD_STRS, 7)
+        street = rng.choice(['preflop', 'flop', 'turn', 'river', 'showdown'])
+        self.community_cards = deck[2:2 + {'flop': 3, 'turn': 4, 'river': 5}.get(street, 0)]
+        self.street = SimpleNamespace(value=street)
+        self.players = {}
+        for i in range(rng.randint(2, 6)):
+            self.players[i] = SimpleNamespace(
+                id=i, cards=deck[:2] if i == 0 else [], stack=rng.choice([0.0, rng.uniform(1, 300)]),
+                is_in_hand=rng.random() < 0.8, current_bet=rng.uniform(0, 20), vpip=rng.random(), pfr=rng.random(),
+                aggression_factor=rng.uniform(0, 8), three_bet_percent=rng.random())
+        self.hero = self.players[0] if rng.random() < 0.9 else None
+        self.bet_amount = rng.uniform(0, 50)
+        self.max_buy_in = rng.choice([0, 100, 200])
+        self.min_raise = rng.uniform(0, 40)
+        self.time_bank = rng.uniform(0, 60)
+        actions = ['fold', 'check', 'call', 'bet', 'raise', 'all_in']
+        self.current_street_actions = [SimpleNamespace(action_type=rng.choice(actions))
+                                       for _ in range(rng.randint(0, 6))]
+        # 行动历史块假定有加注者时英雄可见
+        self.preflop_raiser = rng.choice([None, 0, 1]) if self.hero else None
+        self.aggressor = rng.choice([None, 0, 1]) if self.hero else None
+
+    def get_hero(self):
+        return self.hero
+
+    def get_opponents(self):
+        return [p for i, p in self.players.items() if i != 0]
+
+    def get_relative_position(self, player_id):
+        return player_id % 6
+
+    def get_pot_odds(self, bet):
+        return bet / (bet + 100.0)
+
+    def get_stack_to_pot_ratio(self, player_id):
+        return self.players[player_id].stack / 7.0
+
+    def get_effective_stack(self, player_id):
+        return min(p.stack for p in self.players.values())
+
+    def get_previous_actions(self, count):
+        return self.current_street_actions[-count:]
+
+
+class Extractor(FeatureExtractor):
+    """补全骨架中尚未实现的辅助方法（取值只依赖状态，便于比较两条路径）"""
+
+    def _calculate_board_texture(self, community_cards):
+        return len(community_cards) / 5.0
+
+    def _calculate_hand_board_compatibility(self, cards, community_cards):
+        return [0.1, 0.2, len(community_cards) / 10.0]
+
+    def _calculate_position_advantage(self, game_state, player_id):
+        return 1.0 / 3.0
+
+    def _estimate_implied_odds(self, game_state, player_id):
+        return game_state.bet_amount / 7.0
+
+    def _get_opponent_stat(self, player_id, name, default):
+        return default
+
+    def _estimate_opponent_range_strength(self, game_state, player_id):
+        return player_id / 7.0
+
+    def _calculate_action_aggressiveness(self, action, game_state):
+        return 0.3 if action.action_type in ('bet', 'raise') else 0.1
+
+    def _get_player_aggression(self, player_id, game_state):
+        return 0.7
+
+    def _calculate_decision_urgency(self, game_state):
+        return game_state.time_bank / 61.0
+
+    def _calculate_risk_reward_ratio(self, game_state, player_id):
+        return 0.4
+
+    def _estimate_fold_equity(self, game_state):
+        return 0.2
+
+    def _estimate_expected_value(self, game_state, player_id):
+        return -0.1
+
+    def _calculate_bankroll_factor(self, game_state, player_id):
+        return 0.9
+
+    def _assess_table_dynamics(self, game_state):
+        return 0.6
+
+    def _calculate_confidence_level(self, game_state, player_id):
+        return 0.55
+
+
+class ExtractBatchTest(unittest.TestCase):
+
+    def test_matches_single_state(self):
+        rng = random.Random(0)
+        states = [TableState(rng) for _ in range(150)]
+        extractor = Extractor()
+        batch = extractor.extract_batch(states)
+        self.assertEqual(batch.shape, (150, 87))
+        self.assertEqual(batch.dtype, np.float32)
+        single = np.stack([extractor.extract_features(s) for s in states])
+        np.testing.assert_array_equal(batch, single)
+
+    def test_preallocated_output(self):
+        states = [TableState(random.Random(i)) for i in range(5)]
+        out = np.full((5, 87), np.nan, dtype=np.float32)
+        self.assertIs(Extractor().extract_batch(states, out=out), out)
+        self.assertFalse(np.isnan(out).any())
+        with self.assertRaises(ValueError):
+            Extractor().extract_batch(states, out=np.empty((4, 87), dtype=np.float32))
+
+    def test_draw_potential_cached_per_situation(self):
+        """同一手牌、公共牌（顺序不同）只计算一次"""
+        extractor = Extractor()
+        _draw_potential.cache_clear()
+        first = extractor._calculate_draw_potential(['Ah', 'Kh'], ['Qh', '7h', '2c'])
+        self.assertEqual(extractor._calculate_draw_potential(['Kh', 'Ah'], ['2c', 'Qh', '7h']), first)
+        self.assertEqual(_draw_potential.cache_info().hits, 1)
+        self.assertTrue(0.0 < first < 1.0)
+
+
+class FeatureRegistryTest(unittest.TestCase):
+
+    def test_subset_only_computes_requested_blocks(self):
+        calls = []
+
+        class Spy(Extractor):
+            def _extract_opponent_features(self, game_state):
+                calls.append(game_state)
+                return super()._extract_opponent_features(game_state)
+
+        states = [TableState(random.Random(i)) for i in range(20)]
+        full = Extractor().extract_batch(states)
+        extractor = Spy(['game_stage', 'pot_stack'])
+        self.assertEqual(extractor.feature_dim, 13)
+        batch = extractor.extract_batch(states)
+        np.testing.assert_array_equal(batch, np.concatenate([full[:, 74:79], full[:, 15:23]], axis=1))
+        np.testing.assert_array_equal(extractor.extract_features(states[0]), batch[0])
+        self.assertEqual(calls, [])
+        self.assertEqual(list(extractor.timings.report()), ['pot_stack', 'game_stage'])
+        self.assertEqual(extractor.timings.states['pot_stack'], 21)
+
+    def test_dependent_block_on_subclass(self):
+        """
+        子类在注册表副本上增加依赖 hand_strength、pot_stack 的块：只请求该块时依赖每个状态各计算一次，
+        不输出，其余块不计算；FeatureExtractor 的注册表不变
+        """
+        class WithMargin(Extractor):
+            features = Extractor.features.copy()
+
+            @features.block('strength_margin', 1, depends=('hand_strength', 'pot_stack'))
+            def _strength_margin(self, game_state, hand_strength, pot_stack):
+                return [hand_strength[0] - pot_stack[0]]
+
+        self.assertNotIn('strength_margin', FeatureExtractor.features.names())
+        self.assertEqual(WithMargin().feature_dim, 88)
+        states = [TableState(random.Random(i)) for i in range(20)]
+        full = Extractor().extract_batch(states)
+        extractor = WithMargin(['strength_margin'])
+        batch = extractor.extract_batch(states)
+        np.testing.assert_allclose(batch[:, 0], full[:, 0] - full[:, 15], atol=1e-6)
+        np.testing.assert_array_equal(extractor.extract_features(states[0]), batch[0])
+        self.assertEqual(list(extractor.timings.report()), ['hand_strength', 'pot_stack', 'strength_margin'])
+        self.assertEqual(extractor.timings.states['hand_strength'], 21)
+
+    def test_no_blocks(self):
+        extractor = Extractor([])
+        self.assertEqual(extractor.feature_dim, 0)
+        states = [TableState(random.Random(i)) for i in range(3)]
+        self.assertEqual(extractor.extract_features(states[0]).shape, (0,))
+        self.assertEqual(extractor.extract_batch(states).shape, (3, 0))
+        self.assertEqual(list(extractor.timings.report()), [])
+
+    def test_dependencies_evaluated_lazily_once(self):
+        registry = FeatureRegistry()
+        calls = []
+
+        @registry.block('pot', 2)
+        def pot(owner, state):
+            calls.append('pot')
+            return [state, state * 2]
+
+        @registry.block('odds', 1, depends=('pot',))
+        def odds(owner, state, pot):
+            calls.append('odds')
+            return [pot[0] / pot[1]]
+
+        @registry.block('unused', 3)
+        def unused(owner, state):
+            calls.append('unused')
+            return [0, 0, 0]
+
+        values = registry.evaluate(None, 3.0, ['odds'])
+        self.assertEqual(list(values), ['pot', 'odds'])
+        self.assertEqual(values['odds'].tolist(), [0.5])
+        self.assertEqual(calls, ['pot', 'odds'])
+        batch = registry.evaluate_batch(None, [1.0, 3.0], ['odds', 'pot'])
+        self.assertEqual(batch['pot'].tolist(), [[1, 2], [3, 6]])
+        with self.assertRaises(ValueError):
+            registry.block('bad', 1, depends=('missing',))(pot)
+        # 长度与声明的维度不符时报错
+        registry.block('short', 2)(lambda owner, state: [state])
+        with self.assertRaises(ValueError):
+            registry.evaluate(None, 1.0, ['short'])
+
+
+if __name__ == '__main__':
+    unittest.main()
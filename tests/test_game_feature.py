@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+models.game_feature 每手牌特征缓存（FeatureContext）测试
+models.* 依赖数据库配置（config.db）与 peewee，缺少时放入占位模块，只为导入，不连接数据库
+"""
+
+import os
+import sys
+import unittest
+from unittest import mock
+
+# 添加项目根目录（tests 包）与src目录到Python路径
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from tests import stub_database
+
+stub_database()
+
+from models.game_feature import GameFeature, FeatureContext
+from utils.card import cards_to_ints
+
+WETNESS = {'straight': 0.5, 'flush': 0.0, 'pair': 0.0, 'high': 1.0, 'wetness': 1}
+
+
+class State:
+    """测试用的状态，提供 GameFeature.process 读取的字段"""
+
+    def __init__(self, stage, board, actives, pot, hand=('Ah', 'Kh')):
+        self.stage = stage
+        self.board = list(board)
+        self.hand = list(hand)
+        self.pot = pot
+        self.call = 1.0
+        self.position = 3
+        self.pls = [mock.Mock(position=i + 1, active=i < actives, action='call') for i in range(5)]
+
+    def actives(self):
+        return [p for p in self.pls if p.active]
+
+
+class Game:
+
+    def __init__(self, code):
+        self.code = code
+        self.bb = 1.0
+        # 与 models.game.Game.new 一样，一手牌从盲注后的初始状态开始
+        self.states = [State(0, [], 4, 1.5)]
+
+    def play(self, state):
+        self.states.append(state)
+        return GameFeature.process(self)
+
+
+class FeatureContextTest(unittest.TestCase):
+
+    def setUp(self):
+        patches = [mock.patch.object(GameFeature, '_strength', autospec=True, return_value=0.5),
+                   mock.patch.object(GameFeature, '_wetness', return_value=WETNESS)]
+        self.strength, self.wetness = [p.start() for p in patches]
+        for p in patches:
+            self.addCleanup(p.stop)
+
+    def test_street_invariant_values_computed_once(self):
+        game = Game('hand-1')
+        game.play(State(0, [], 4, 3.0))
+        game.play(State(0, [], 4, 6.0))
+        flop = ['Qh', '7h', '2c']
+        for pot in (8.0, 12.0, 20.0):
+            feature = game.play(State(1, flop, 4, pot))
+        # 翻牌前、翻牌各一次
+        self.assertEqual(self.strength.call_count, 2)
+        self.assertEqual(self.wetness.call_count, 2)
+        self.assertEqual(feature.pots, 20.0)
+        self.assertEqual(feature.ppots, 6.0)
+        self.assertEqual(feature.wet_high, 1.0)
+        # 本次决策的局面，供 Strategy.predict 与后台胜率服务的局面比较
+        self.assertEqual((feature.hand, feature.board), (cards_to_ints(['Ah', 'Kh']), cards_to_ints(flop)))
+
+        game.play(State(2, flop + ['9d'], 4, 30.0))
+        self.assertEqual(self.strength.call_count, 3)
+        self.assertEqual(self.wetness.call_count, 3)
+        self.assertIs(game.feature_context, FeatureContext.of(game, game.states[-1]))
+
+    def test_player_count_invalidates_strength_only(self):
+        game = Game('hand-1')
+        game.play(State(0, [], 4, 3.0))
+        flop = ['Qh', '7h', '2c']
+        game.play(State(1, flop, 4, 8.0))
+        feature = game.play(State(1, flop, 3, 8.0))
+        self.assertEqual(feature.players, 3)
+        self.assertEqual(self.strength.call_count, 3)
+        self.assertEqual(self.wetness.call_count, 2)
+
+    def test_new_hand_invalidates(self):
+        game = Game('hand-1')
+        flop = ['Qh', '7h', '2c']
+        game.play(State(0, [], 4, 3.0))
+        game.play(State(1, flop, 4, 8.0))
+        context = game.feature_context
+
+        # 换一手牌（新的 code），同样的街与公共牌也重新计算
+        game.code = 'hand-2'
+        game.states = [State(0, [], 4, 3.0)]
+        game.play(State(1, flop, 4, 8.0))
+        self.assertIsNot(game.feature_context, context)
+        self.assertEqual(self.strength.call_count, 3)
+        self.assertEqual(self.wetness.call_count, 3)
+
+        # 同一 code 下手牌变化同样视为新的一手
+        game.play(State(1, flop, 4, 8.0, hand=('9c', '9d')))
+        self.assertEqual(self.strength.call_count, 4)
+        self.assertEqual(self.wetness.call_count, 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+utils.hand_range 手牌范围测试
+"""
+
+import os
+import sys
+import unittest
+
+import numpy as np
+
+# 添加src目录到Python路径
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from utils.card import cards_to_ints, eval_strength
+from utils.combos import COMBO_COUNT, combo_index
+from utils.equity import EquityEngine, filter_hands
+from utils.hand_range import Range, parse_range
+from utils.preflop import class_combos, class_index
+
+
+class RangeTest(unittest.TestCase):
+
+    def test_from_hands_and_iter(self):
+        r = Range.from_hands(['AhKd', 'QsQc'])
+        self.assertEqual(len(r), 2)
+        self.assertEqual(sorted(combo_index(h) for h in r), sorted([combo_index('AhKd'), combo_index('QsQc')]))
+        self.assertEqual(Range.from_hands(r), r)
+
+    def test_remove(self):
+        r = Range.full().remove(['Ah', 'Kd', '2c'])
+        self.assertEqual(len(r), COMBO_COUNT - 3 * 51 + 3)
+        self.assertFalse(np.isin(r.combos(), cards_to_ints(['Ah', 'Kd', '2c'])).any())
+
+    def test_normalize(self):
+        r = Range.from_hands(['AhKd', 'QsQc'], weight=3.0).normalize()
+        self.assertAlmostEqual(float(r.weights.sum()), 1.0, places=6)
+        self.assertEqual(Range().normalize(), Range())
+
+    def test_top(self):
+        top = Range.full().top(0.03)
+        # 前3%：AA-88 共 7 x 6 = 42 个组合
+        self.assertEqual(len(top), 42)
+        self.assertTrue(all(class_index(h) in [r * 14 for r in range(6, 13)] for h in top))
+        # 边界上同一起手牌的组合一起保留
+        scores = np.zeros(169)
+        scores[class_index(['Ah', 'Kh'])] = 1
+        self.assertEqual(len(Range.full().top(0.0001, scores)), 4)
+
+    def test_union_intersection(self):
+        a = Range.from_hands(['AhKd', 'QsQc'])
+        b = Range.from_hands(['QsQc', '7h2c'], weight=0.5)
+        self.assertEqual(len(a | b), 3)
+        self.assertEqual((a | b).weights[combo_index('QsQc')], 1.0)
+        self.assertEqual(len(a & b), 1)
+        self.assertEqual((a & b).weights[combo_index('QsQc')], 0.5)
+
+    def test_serialisation(self):
+        for r in (Range.full().top(0.2), Range.from_hands(['AhKd'], 0.25) | Range.from_hands(['QsQc'])):
+            data = r.to_bytes()
+            self.assertEqual(Range.from_bytes(data), r)
+        self.assertEqual(len(Range.full().to_bytes()), 167)
+        with self.assertRaises(ValueError):
+            Range.from_bytes(b'X')
+
+    def test_consumers_accept_range(self):
+        villain = Range.from_hands([c for i in (168, 167, 166) for c in class_combos(i)])
+        hand, board = ['Ah', 'Kh'], ['Qh', '7h', '2c', '9d']
+        self.assertEqual(eval_strength(hand, board, villain), eval_strength(hand, board, list(villain)))
+        np.testing.assert_array_equal(filter_hands(villain, ['Ah']), filter_hands(list(villain), ['Ah']))
+        with EquityEngine(processes=1) as engine:
+            self.assertEqual(round(engine.equity(hand, board, villain).mean, 4), eval_strength(hand, board, villain))
+
+
+
+class ParseRangeTest(unittest.TestCase):
+    """范围记号测试"""
+
+    def test_counts(self):
+        for text, count in [('AA', 6), ('AKs', 4), ('AKo', 12), ('AK', 16), ('AhKd', 1), ('TT+', 30),
+                            ('A5s+', 36), ('TT-77', 24), ('77-TT', 24), ('A5s-A2s', 16), ('kqo', 12)]:
+            self.assertEqual(len(parse_range(text)), count, text)
+
+    def test_combined_with_weights(self):
+        r = parse_range('TT+, AKs, A5s-A2s, KQo, AKo:0.5')
+        self.assertEqual(len(r), 30 + 4 + 16 + 12 + 12)
+        self.assertEqual(r.weights[combo_index('AhKd')], 0.5)
+        self.assertEqual(r.weights[combo_index('AhKh')], 1.0)
+        # 后面的记号覆盖前面的
+        self.assertEqual(parse_range('AK, AKs:0.25').weights[combo_index('AsKs')], 0.25)
+
+    def test_memoised_read_only(self):
+        r = parse_range('QQ+, AK')
+        self.assertIs(r, parse_range('QQ+, AK'))
+        with self.assertRaises(ValueError):
+            r.weights[0] = 1
+        self.assertEqual(len(r.remove(['As'])), len(r) - 3 - 4)
+
+    def test_invalid(self):
+        for text in ('AAs', 'AKx', 'A5s-K2s', 'A5s-A2o', 'AK:x', 'TT-A2',
+                     'AKs:-1', 'AKs:nan', 'AKs:inf', 'AKs:1.5'):
+            with self.assertRaises(ValueError, msg=text):
+                parse_range(text)
+
+
+if __name__ == '__main__':
+    unittest.main()
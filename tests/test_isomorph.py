@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+utils.isomorph 花色同构与胜率缓存测试
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+from itertools import permutations
+
+import numpy as np
+
+# 添加src目录到Python路径
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from utils.card import cards_to_ints
+from utils.equity import EquityEngine, exact_strength
+from utils.isomorph import canonical_key, canonicalize, EquityCache
+
+
+def permute_suits(cards, perm):
+    return [(c & ~3) | perm[c & 3] for c in cards_to_ints(cards)]
+
+
+class CanonicalTest(unittest.TestCase):
+    """规范下标测试"""
+
+    def test_invariant_under_suit_permutation(self):
+        rng = np.random.default_rng(0)
+        for _ in range(50):
+            cards = rng.choice(52, size=int(rng.integers(2, 8)), replace=False).tolist()
+            hand, board = cards[:2], cards[2:]
+            key = canonical_key(hand, board)
+            form = canonicalize(hand, board)
+            for perm in permutations(range(4)):
+                self.assertEqual(key, canonical_key(permute_suits(hand, perm), permute_suits(board, perm)))
+                self.assertEqual(form, canonicalize(permute_suits(hand, perm), permute_suits(board, perm)))
+
+    def test_distinguishes_non_isomorphic(self):
+        self.assertNotEqual(canonical_key(['Ah', 'Kh'], ['Qh', '7h', '2c']),
+                            canonical_key(['Ah', 'Kh'], ['Qc', '7h', '2h']))
+        self.assertNotEqual(canonical_key(['Ah', 'Kh']), canonical_key(['Ah', 'Kd']))
+        # 公共牌按集合处理，发牌顺序不影响
+        self.assertEqual(canonical_key(['Ah', 'Kh'], ['Qh', '7h', '2c']),
+                         canonical_key(['Kh', 'Ah'], ['2c', 'Qh', '7h']))
+
+    def test_equity_preserved(self):
+        hand, board = ['Ah', 'Kh'], ['Qh', '7h', '2c', '9d']
+        canon_hand, canon_board = canonicalize(hand, board)
+        self.assertAlmostEqual(exact_strength(hand, board), exact_strength(canon_hand, canon_board))
+
+
+class EquityCacheTest(unittest.TestCase):
+    """LRU缓存与磁盘文件测试"""
+
+    def test_lru_eviction(self):
+        cache = EquityCache(maxsize=2)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        self.assertEqual(cache.get('a'), 1)
+        cache.put('c', 3)
+        self.assertNotIn('b', cache)
+        self.assertEqual(len(cache), 2)
+        self.assertEqual((cache.hits, cache.misses), (1, 0))
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.misses, 1)
+
+    def test_disk_round_trip(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'cache.pkl')
+            cache = EquityCache(path=path)
+            cache.put((1, 2), 0.5)
+            cache.save()
+            self.assertEqual(EquityCache(path=path).get((1, 2)), 0.5)
+
+    def test_engine_hits_isomorphic_spot(self):
+        with EquityEngine(processes=1, cache=EquityCache()) as engine:
+            first = engine.equity(['Ah', 'Kh'], ['Qh', '7h', '2c'], trials=2000, draw_size=3)
+            second = engine.equity(['As', 'Ks'], ['Qs', '7s', '2d'], trials=2000, draw_size=3)
+            self.assertEqual(first, second)
+            self.assertEqual(engine.cache.hits, 1)
+            # 要求更多模拟次数时重新计算并覆盖
+            third = engine.equity(['As', 'Ks'], ['Qs', '7s', '2d'], trials=4000, draw_size=3)
+            self.assertEqual(third.trials, 4000)
+            self.assertEqual(len(engine.cache), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
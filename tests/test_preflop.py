@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+utils.preflop 翻牌前胜率表测试
+"""
+
+import os
+import sys
+import unittest
+
+import numpy as np
+
+# 添加src目录到Python路径
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from utils.card import CARD_STRS
+from utils.preflop import (class_index, class_name, class_combos, preflop_table, preflop_equity,
+                           preflop_equity_vs_range, top_classes, OPPONENTS, RANGE_TOPS, _simulate, _table_cell)
+
+
+class HandClassTest(unittest.TestCase):
+    """起手牌下标测试"""
+
+    def test_all_combos_covered(self):
+        """1326种组合恰好分到169类，每类组合数正确"""
+        counts = np.zeros(169, dtype=int)
+        for a in range(52):
+            for b in range(a + 1, 52):
+                counts[class_index([CARD_STRS[a], CARD_STRS[b]])] += 1
+        self.assertEqual(counts.tolist(), [len(class_combos(i)) for i in range(169)])
+        for i in range(169):
+            for combo in class_combos(i):
+                self.assertEqual(class_index(list(combo)), i)
+
+    def test_names(self):
+        self.assertEqual(class_name(class_index(['Ah', 'Kh'])), 'AKs')
+        self.assertEqual(class_name(class_index(['Kd', 'Ah'])), 'AKo')
+        self.assertEqual(class_name(class_index(['7h', '7d'])), '77')
+        self.assertEqual(class_name(class_index(['2c', '3d'])), '32o')
+
+
+class PreflopTableTest(unittest.TestCase):
+    """胜率表测试"""
+
+    def test_shape_and_memmap(self):
+        table = preflop_table()
+        self.assertIsInstance(table, np.memmap)
+        self.assertEqual(table.shape, (169, len(OPPONENTS) + len(RANGE_TOPS)))
+
+    def test_known_values(self):
+        """AA单挑约85%，对5人约49%；单挑32o最差"""
+        self.assertAlmostEqual(preflop_equity(['Ah', 'Ad']), 0.852, delta=0.01)
+        self.assertAlmostEqual(preflop_equity(['Ah', 'Ad'], 5), 0.49, delta=0.015)
+        self.assertEqual(int(np.argmin(preflop_table()[:, 0])), class_index(['3h', '2d']))
+        # 对手越多胜率越低；对手超出范围时取边界
+        self.assertTrue(np.all(np.diff(preflop_table()[:, :len(OPPONENTS)], axis=1) < 0.01))
+        self.assertEqual(preflop_equity(['Kh', 'Qh'], 9), preflop_equity(['Kh', 'Qh'], 5))
+
+    def test_range_columns(self):
+        """对紧范围的胜率低于对随机牌"""
+        self.assertLess(preflop_equity_vs_range(['Ah', 'Kd'], 0.05), preflop_equity(['Ah', 'Kd']))
+        # 单挑对随机牌时中等对子排在AKs之前
+        self.assertEqual([class_name(i) for i in top_classes(0.03)], ['AA', 'KK', 'QQ', 'JJ', 'TT', '99', '88'])
+
+    def test_matches_simulation(self):
+        """表中的值与重新模拟一致"""
+        hand = class_combos(class_index(['Jh', 'Tc']))[0]
+        simulated = _simulate(hand, 2, 20000, np.random.default_rng(99))
+        self.assertAlmostEqual(preflop_equity(list(hand), 2), simulated, delta=0.015)
+
+    def test_builder_reproduces_table(self):
+        """重新生成的格子与提交的表完全相同（生成器的随机数流没有改变）"""
+        table = preflop_table()
+        for index, col in ((class_index(['Ah', 'Ad']), 0), (class_index(['7h', '6h']), 2),
+                           (class_index(['3h', '2d']), 4), (class_index(['Ah', 'Kd']), len(OPPONENTS) + 1)):
+            self.assertEqual(np.float32(_table_cell(table, index, col, 20000, 0)), table[index, col],
+                             msg=(class_name(index), col))
+
+
+if __name__ == '__main__':
+    unittest.main()
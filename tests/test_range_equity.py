@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+utils.range_equity 范围对范围胜率测试
+"""
+
+import os
+import sys
+import time
+import unittest
+from itertools import combinations
+
+import numpy as np
+
+# 添加src目录到Python路径
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from utils.card import cards_to_ints, hand_rank
+from utils.combos import COMBOS, COMBO_COUNT, combo_index, blocked
+from utils.hand_range import parse_range
+from utils.range_equity import equity_matrix, range_equity, river_equity, river_ranks, hand_potential
+
+
+def brute_force(hero, villain, board):
+    """逐张枚举河牌，平局计0.5"""
+    points = []
+    for river in range(52):
+        if river in hero + villain + board:
+            continue
+        a, b = hand_rank(hero + board + [river]), hand_rank(villain + board + [river])
+        points.append(1.0 if a > b else 0.5 if a == b else 0.0)
+    return sum(points) / len(points)
+
+
+class CombosTest(unittest.TestCase):
+
+    def test_index_round_trip(self):
+        self.assertEqual(len(COMBOS), COMBO_COUNT)
+        for i in range(COMBO_COUNT):
+            self.assertEqual(combo_index(COMBOS[i].tolist()), i)
+        self.assertEqual(combo_index('AhKd'), combo_index(['Kd', 'Ah']))
+
+    def test_blocked(self):
+        self.assertEqual(blocked(['Ah']).sum(), 51)
+        self.assertEqual(blocked(['Ah', 'Kd']).sum(), 101)
+
+
+class RangeEquityTest(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.hero = (rng.random(COMBO_COUNT) < 0.05).astype(np.float32)
+        self.villain = (rng.random(COMBO_COUNT) < 0.05) * rng.random(COMBO_COUNT)
+        self.board = cards_to_ints(['Qh', '7h', '2c', '9d'])
+
+    def test_turn_matrix_matches_brute_force(self):
+        matrix = equity_matrix(self.hero, self.villain, self.board)
+        for h in np.flatnonzero(self.hero)[:8]:
+            for v in np.flatnonzero(self.villain)[:8]:
+                hero, villain = COMBOS[h].tolist(), COMBOS[v].tolist()
+                if set(hero) & set(villain + self.board) or set(villain) & set(self.board):
+                    self.assertEqual(matrix[h, v], 0.0)
+                else:
+                    self.assertAlmostEqual(matrix[h, v], brute_force(hero, villain, self.board), places=5)
+
+    def test_river_matrix_antisymmetric(self):
+        """同一范围互相比较，M + M.T = 1（不冲突的位置）"""
+        board = self.board + cards_to_ints(['3s'])
+        matrix = equity_matrix(self.hero, self.hero, board)
+        active = np.flatnonzero((self.hero > 0) & ~blocked(board))
+        sub = matrix[np.ix_(active, active)]
+        compatible = ~blocked_pairs(active)
+        np.testing.assert_allclose((sub + sub.T)[compatible], 1.0)
+
+    def test_marginals(self):
+        result = range_equity(self.hero, self.villain, self.board)
+        matrix = equity_matrix(self.hero, self.villain, self.board)
+        h = np.flatnonzero((self.hero > 0) & ~blocked(self.board))[0]
+        weights = self.villain * ~blocked(self.board + COMBOS[h].tolist())
+        self.assertAlmostEqual(result.hands[h], (matrix[h] * weights).sum() / weights.sum(), places=5)
+        self.assertTrue(0.0 < result.equity < 1.0)
+
+    def test_symmetric_ranges_even(self):
+        full = np.ones(COMBO_COUNT)
+        self.assertAlmostEqual(range_equity(full, full, self.board).equity, 0.5)
+        self.assertAlmostEqual(range_equity(full, full, ['Qh', '7h', '2c'], max_runouts=50, rng=0).equity, 0.5)
+
+    def test_timeout(self):
+        """限时：完整范围对完整范围很快返回抽样估计，接近穷举结果"""
+        range_equity(self.hero, self.villain, self.board)
+        hero = parse_range('22+, A2s+, K9s+, ATo+, KJo+').weights
+        villain = np.ones(COMBO_COUNT)
+        exact = range_equity(hero, villain, self.board).equity
+        start = time.monotonic()
+        result = range_equity(hero, villain, self.board, rng=0, timeout=0.01)
+        self.assertLess(time.monotonic() - start, 0.5)
+        self.assertAlmostEqual(result.equity, exact, delta=0.05)
+
+    def test_bad_shape(self):
+        with self.assertRaises(ValueError):
+            range_equity(np.ones(169), np.ones(COMBO_COUNT), self.board)
+
+
+class RiverEquityTest(unittest.TestCase):
+    """河牌排序累加测试"""
+
+    def setUp(self):
+        rng = np.random.default_rng(1)
+        self.board = cards_to_ints(['Qh', '7h', '2c', '9d', '3s'])
+        self.villain = (rng.random(COMBO_COUNT) < 0.3) * rng.random(COMBO_COUNT)
+
+    def test_ranks(self):
+        ranks = river_ranks(self.board)
+        self.assertEqual(ranks[combo_index('AhKh')], hand_rank(cards_to_ints(['Ah', 'Kh']) + self.board))
+        self.assertTrue((ranks[blocked(self.board)] == -1).all())
+        self.assertIs(ranks, river_ranks(list(reversed(self.board))))
+
+    def test_matches_pairwise(self):
+        matrix = equity_matrix(np.ones(COMBO_COUNT), self.villain, self.board)
+        equity = river_equity(self.board, self.villain)
+        for h in np.flatnonzero(~blocked(self.board))[::97]:
+            weights = self.villain * ~blocked(self.board + COMBOS[h].tolist())
+            self.assertAlmostEqual(equity[h], (matrix[h] * weights).sum() / weights.sum(), places=5)
+
+    def test_range_equity_river(self):
+        """河牌的 range_equity 走排序累加，结果与两两比较一致"""
+        hero = parse_range('TT+, AK, KQs')
+        result = range_equity(hero, self.villain, self.board)
+        matrix = equity_matrix(hero, self.villain, self.board)
+        active = (np.asarray(hero) > 0) & ~blocked(self.board)
+        compatible = np.array([[not set(COMBOS[h].tolist()) & set(COMBOS[v].tolist()) for v in range(COMBO_COUNT)]
+                               for h in np.flatnonzero(active)])
+        weights = compatible * (self.villain * ~blocked(self.board))
+        expected = (matrix[active] * weights).sum() / weights.sum()
+        self.assertAlmostEqual(result.equity, expected, places=5)
+
+
+class HandPotentialTest(unittest.TestCase):
+    """手牌潜力测试"""
+
+    def test_turn_matches_brute_force(self):
+        hand, board = cards_to_ints(['5h', '6h']), cards_to_ints(['7h', '8c', 'Kh', '2s'])
+        live = [c for c in range(52) if c not in hand + board]
+        hp = np.zeros((3, 3))
+        strengths = []
+        for river in live:
+            hero = hand_rank(hand + board + [river])
+            points = []
+            for opp in combinations([c for c in live if c != river], 2):
+                now = np.sign(hand_rank(hand + board) - hand_rank(list(opp) + board)) + 1
+                final = np.sign(hero - hand_rank(list(opp) + board + [river])) + 1
+                hp[now, final] += 1
+                points.append(final / 2)
+            strengths.append(np.mean(points))
+        behind, tied, ahead = hp.sum(axis=1)
+        result = hand_potential(hand, board)
+        self.assertAlmostEqual(result.equity, np.mean(strengths))
+        self.assertAlmostEqual(result.ehs2, np.mean(np.square(strengths)))
+        self.assertAlmostEqual(result.ppot, (hp[0, 2] + hp[0, 1] / 2 + hp[1, 2] / 2) / (behind + tied / 2))
+        self.assertAlmostEqual(result.npot, (hp[2, 0] + hp[2, 1] / 2 + hp[1, 0] / 2) / (ahead + tied / 2))
+        self.assertAlmostEqual(float(result.histogram.sum()), 1.0, places=5)
+
+    def test_river_has_no_potential(self):
+        board = ['Qh', '7h', '2c', '9d', '3s']
+        result = hand_potential(['Ah', 'Ad'], board)
+        self.assertEqual((result.ppot, result.npot), (0.0, 0.0))
+        self.assertAlmostEqual(result.ehs2, result.equity ** 2)
+        self.assertAlmostEqual(result.equity, float(river_equity(board, np.ones(COMBO_COUNT))[combo_index('AhAd')]),
+                               places=5)
+
+    def test_draw_vs_made_hand(self):
+        """同花听牌正潜力高，暗三条负潜力低"""
+        self.assertGreater(hand_potential(['Ah', 'Kh'], ['Qh', '7h', '2c'], max_runouts=300, rng=0).ppot, 0.3)
+        self.assertLess(hand_potential(['7s', '7d'], ['7h', 'Kc', '2d'], max_runouts=300, rng=0).npot, 0.05)
+        with self.assertRaises(ValueError):
+            hand_potential(['Ah', 'Kh'], [])
+
+
+def blocked_pairs(active):
+    cards = COMBOS[active]
+    return (cards[:, None, :, None] == cards[None, :, None, :]).any(axis=(2, 3))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+utils.texture 牌面结构表测试
+"""
+
+import os
+import random
+import sys
+import unittest
+from itertools import combinations
+
+import numpy as np
+
+# 添加src目录到Python路径
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from utils.card import cards_to_ints
+from utils.texture import (board_texture, board_textures, board_key, score_board, wetness_level, texture_table,
+                           FIELDS)
+
+
+class BoardTextureTest(unittest.TestCase):
+
+    def test_every_flop_matches_direct_scores(self):
+        for board in combinations(range(52), 3):
+            scores = score_board(list(board))
+            expected = dict(scores, wetness=wetness_level(scores))
+            self.assertEqual(board_texture(list(board)), expected)
+
+    def test_random_rivers_and_order(self):
+        rng = random.Random(0)
+        for _ in range(2000):
+            board = rng.sample(range(52), rng.choice((4, 5)))
+            scores = score_board(board)
+            self.assertEqual(board_texture(board), dict(scores, wetness=wetness_level(scores)))
+            # 结果与牌的顺序无关
+            self.assertEqual(score_board(board), score_board(sorted(board)))
+
+    def test_suit_isomorphic_boards_share_row(self):
+        self.assertEqual(board_key(cards_to_ints(['Ah', 'Kh', '2c'])), board_key(cards_to_ints(['As', 'Ks', '2d'])))
+        self.assertNotEqual(board_key(cards_to_ints(['Ah', 'Kh', '2c'])), board_key(cards_to_ints(['Ah', 'Kd', '2c'])))
+        self.assertEqual(len(texture_table()[1]), 1755 + 16432 + 134459)
+
+    def test_batch(self):
+        rng = np.random.default_rng(1)
+        boards = np.argsort(rng.random((500, 52)), axis=1)[:, :5].astype(np.int8)
+        values = board_textures(boards)
+        self.assertEqual(values.shape, (500, len(FIELDS)))
+        for row, board in zip(values.tolist(), boards.tolist()):
+            texture = board_texture(board)
+            self.assertEqual(row, [np.float32(texture[name]) for name in FIELDS])
+
+    def test_other_sizes(self):
+        """3-5张以外直接计算；有重复牌的公共牌不在表中"""
+        self.assertEqual(board_texture([]), {'straight': 0.0, 'flush': 0.0, 'pair': 0.0, 'high': 0.0, 'wetness': 0})
+        with self.assertRaises(ValueError):
+            board_textures(np.array([cards_to_ints(['Ah', 'Ah', 'Kd'])]))
+
+
+if __name__ == '__main__':
+    unittest.main()